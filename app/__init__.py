@@ -1,11 +1,19 @@
 # -*- coding: utf-8 -*-
 import os
+import click
 from flask import Flask
 from app.extensions import db, init_db
-from flask_migrate import Migrate
 
-# Inicializar extensiones
-migrate = Migrate()
+def _init_migraciones(app):
+    """
+    Flask-Migrate (y con él Alembic) solo se carga para los comandos de la
+    CLI de Flask (`flask db upgrade`); los workers web no lo necesitan.
+    """
+    if click.get_current_context(silent=True) is None:
+        return
+    
+    from flask_migrate import Migrate
+    Migrate(app, db)
 
 def create_app():
     app = Flask(__name__)
@@ -19,26 +27,35 @@ def create_app():
     
     # Inicializar extensiones con la app
     init_db(app)
-    migrate.init_app(app, db)
+    _init_migraciones(app)
+    
+    # Métricas por endpoint: consultas SQL, tiempo en base de datos y latencia
+    from app.services.request_metrics import init_metricas
+    init_metricas(app)
     
     # Agregar filtro para JSON
     import json
+    # El contenido de las actividades ya llega decodificado (dict); el filtro
+    # solo decodifica texto y registra el JSON inválido en lugar de ocultarlo
     @app.template_filter('from_json')
     def from_json_filter(value):
         if isinstance(value, str):
             try:
                 return json.loads(value)
-            except:
+            except ValueError as e:
+                app.logger.warning(f"from_json: JSON inválido ({e})")
                 return {}
         return value
-
+    
     # Importar y registrar solo el blueprint de TEA
     from app.routes.tea import tea_bp
     app.register_blueprint(tea_bp)
-
-    # Crear tablas de la base de datos
-    with app.app_context():
-        from app.models import tea_models
-        db.create_all()
-
+    
+    # El esquema se administra con Alembic (migrations/). DB_AUTO_CREATE=1
+    # crea las tablas faltantes al arrancar, solo para entornos locales.
+    if config.DB_AUTO_CREATE:
+        with app.app_context():
+            from app.models import tea_models
+            db.create_all()
+    
     return app
\ No newline at end of file
@@ -1,23 +1,84 @@
 # -*- coding: utf-8 -*-
 from flask import g
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
 import config
 
-# Instancia de SQLAlchemy para usar con Flask-Migrate
-db = SQLAlchemy()
+def _opciones_pool(url):
+    """Parámetros del pool desde config.py (SQLite en memoria no usa QueuePool)"""
+    opciones = {'pool_pre_ping': config.DB_POOL_PRE_PING}
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return opciones
+
+    opciones.update(
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE
+    )
+    return opciones
 
-# Engine manual (para modelos con SQLAlchemy puro)
+# Engine único del proceso: lo usan los modelos TEA (db) y los de SQLAlchemy puro
 engine = create_engine(
     config.SQLALCHEMY_DATABASE_URI,
     echo=config.SQLALCHEMY_ECHO,
     future=True,
-    pool_pre_ping=True,
+    **_opciones_pool(config.SQLALCHEMY_DATABASE_URI)
 )
 SessionLocal = scoped_session(sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True))
 Base = declarative_base()
 
+class _SQLAlchemyCompartido(SQLAlchemy):
+    """Flask-SQLAlchemy sobre el engine único en lugar de crear su propio pool"""
+
+    def _make_engine(self, bind_key, options, app):
+        if bind_key is None:
+            return engine
+        return super()._make_engine(bind_key, options, app)
+
+# Instancia de SQLAlchemy para usar con Flask-Migrate
+db = _SQLAlchemyCompartido()
+
+# Contadores del pool para monitoreo
+_eventos_pool = {'conexiones_creadas': 0, 'prestamos': 0, 'invalidadas': 0}
+
+@event.listens_for(engine, 'connect')
+def _al_conectar(conexion, registro):
+    _eventos_pool['conexiones_creadas'] += 1
+
+@event.listens_for(engine, 'checkout')
+def _al_prestar(conexion, registro, proxy):
+    _eventos_pool['prestamos'] += 1
+
+@event.listens_for(engine, 'invalidate')
+def _al_invalidar(conexion, registro, excepcion):
+    _eventos_pool['invalidadas'] += 1
+
+def estadisticas_pool():
+    """Estado actual del pool de conexiones del proceso"""
+    pool = engine.pool
+    estadisticas = {
+        'pool': type(pool).__name__,
+        'configuracion': {
+            'pool_size': config.DB_POOL_SIZE,
+            'max_overflow': config.DB_MAX_OVERFLOW,
+            'pool_timeout': config.DB_POOL_TIMEOUT,
+            'pool_recycle': config.DB_POOL_RECYCLE
+        },
+        **_eventos_pool
+    }
+
+    # Solo QueuePool expone tamaño y préstamos actuales
+    for clave, metodo in (('tamano', 'size'), ('disponibles', 'checkedin'),
+                          ('en_uso', 'checkedout'), ('desborde', 'overflow')):
+        if hasattr(pool, metodo):
+            estadisticas[clave] = getattr(pool, metodo)()
+
+    return estadisticas
+
 def get_db():
     if "db" not in g:
         g.db = SessionLocal()
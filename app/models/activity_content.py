@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Esquemas del contenido de las actividades TEA
+Cada `tipo` de actividad declara qué listas de elementos admite su JSON de
+`contenido`. El contenido se valida al guardar, se almacena como JSONB en
+PostgreSQL (JSON en otros motores) y se decodifica una sola vez al leerlo.
+"""
+
+import json
+from sqlalchemy import JSON
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import TypeDecorator
+
+class ContenidoActividad:
+    """Contenido validado de una actividad; acceso por atributo o como diccionario"""
+    
+    TIPO = None
+    # Listas de elementos que admite el tipo; al menos una debe venir con datos
+    LISTAS = ()
+    OPCIONALES = {'tiempo_por_palabra': int}
+    
+    def __init__(self, datos):
+        self._datos = datos
+        self.instrucciones = datos['instrucciones']
+        self.listas = {clave: datos[clave] for clave in self.LISTAS if clave in datos}
+        self.tiempo_por_palabra = datos.get('tiempo_por_palabra')
+    
+    @classmethod
+    def validar(cls, datos):
+        """Valida el diccionario y devuelve el contenido tipado (ValueError si no cumple)"""
+        if not isinstance(datos, dict):
+            raise ValueError(f"El contenido de '{cls.TIPO}' debe ser un objeto JSON")
+        
+        instrucciones = datos.get('instrucciones')
+        if not isinstance(instrucciones, str) or not instrucciones.strip():
+            raise ValueError(f"El contenido de '{cls.TIPO}' requiere 'instrucciones'")
+        
+        desconocidas = set(datos) - set(cls.LISTAS) - set(cls.OPCIONALES) - {'instrucciones'}
+        if desconocidas:
+            raise ValueError(
+                f"Claves no válidas para '{cls.TIPO}': {', '.join(sorted(desconocidas))} "
+                f"(admite {', '.join(cls.LISTAS)})"
+            )
+        
+        for clave in cls.LISTAS:
+            if clave in datos and not isinstance(datos[clave], list):
+                raise ValueError(f"'{clave}' debe ser una lista en '{cls.TIPO}'")
+        
+        if cls.LISTAS and not any(datos.get(clave) for clave in cls.LISTAS):
+            raise ValueError(f"El contenido de '{cls.TIPO}' requiere al menos una de: {', '.join(cls.LISTAS)}")
+        
+        for clave, tipo in cls.OPCIONALES.items():
+            if clave in datos and (not isinstance(datos[clave], tipo) or datos[clave] <= 0):
+                raise ValueError(f"'{clave}' debe ser un entero positivo")
+        
+        return cls(datos)
+    
+    def a_dict(self):
+        """Diccionario listo para guardar"""
+        return dict(self._datos)
+    
+    def __getitem__(self, clave):
+        return self._datos[clave]
+    
+    def get(self, clave, defecto=None):
+        return self._datos.get(clave, defecto)
+    
+    def __repr__(self):
+        return f'<{type(self).__name__} {", ".join(self.listas)}>'
+
+class ContenidoImitacion(ContenidoActividad):
+    TIPO = 'imitacion'
+    LISTAS = ('palabras', 'numeros', 'animales')
+
+class ContenidoAsociacion(ContenidoActividad):
+    TIPO = 'asociacion'
+    LISTAS = ('colores', 'objetos', 'animales', 'asociaciones')
+
+class ContenidoConstruccion(ContenidoActividad):
+    TIPO = 'construccion'
+    LISTAS = ('frases',)
+
+class ContenidoReconocimiento(ContenidoActividad):
+    TIPO = 'reconocimiento'
+    LISTAS = ('numeros', 'objetos')
+
+class ContenidoComprension(ContenidoActividad):
+    TIPO = 'comprension'
+    LISTAS = ('preguntas', 'mezclas')
+
+class ContenidoNarrativa(ContenidoActividad):
+    TIPO = 'narrativa'
+    LISTAS = ('historias',)
+
+class ContenidoConversacion(ContenidoActividad):
+    TIPO = 'conversacion'
+    LISTAS = ('conversaciones',)
+
+class ContenidoDescripcion(ContenidoActividad):
+    TIPO = 'descripcion'
+    LISTAS = ('objetos',)
+
+class ContenidoCreatividad(ContenidoActividad):
+    TIPO = 'creatividad'
+    LISTAS = ('elementos',)
+
+class ContenidoOperacion(ContenidoActividad):
+    TIPO = 'operacion'
+    LISTAS = ('sumas', 'restas', 'operaciones')
+
+class ContenidoResolucionProblemas(ContenidoActividad):
+    TIPO = 'resolucion_problemas'
+    LISTAS = ('problemas',)
+
+class ContenidoClasificacion(ContenidoActividad):
+    TIPO = 'clasificacion'
+    LISTAS = ('clasificaciones',)
+
+ESQUEMAS = {
+    esquema.TIPO: esquema
+    for esquema in (
+        ContenidoImitacion, ContenidoAsociacion, ContenidoConstruccion,
+        ContenidoReconocimiento, ContenidoComprension, ContenidoNarrativa,
+        ContenidoConversacion, ContenidoDescripcion, ContenidoCreatividad,
+        ContenidoOperacion, ContenidoResolucionProblemas, ContenidoClasificacion
+    )
+}
+
+def decodificar_contenido(tipo, contenido):
+    """
+    Convierte el contenido guardado (dict o texto JSON) en su esquema tipado.
+    Lanza ValueError si el tipo no existe o el contenido no es válido.
+    """
+    esquema = ESQUEMAS.get(tipo)
+    if esquema is None:
+        raise ValueError(f"Tipo de actividad desconocido: '{tipo}'")
+    
+    if isinstance(contenido, (str, bytes)):
+        try:
+            contenido = json.loads(contenido)
+        except ValueError as e:
+            raise ValueError(f"El contenido de '{tipo}' no es JSON válido: {e}")
+    
+    return esquema.validar(contenido)
+
+class ContenidoJSON(TypeDecorator):
+    """
+    JSONB en PostgreSQL y JSON en otros motores. Acepta diccionarios o texto
+    JSON (los scripts existentes guardan json.dumps(...)) y devuelve diccionarios.
+    """
+    impl = JSON
+    cache_ok = True
+    
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(JSON())
+    
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, (str, bytes)):
+            return json.loads(value)
+        return value
@@ -1,8 +1,9 @@
 # -*- coding: utf-8 -*-
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, Text, ForeignKey, LargeBinary, UniqueConstraint, Index, JSON, event
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from app.extensions import db
+from app.models.activity_content import ContenidoJSON, decodificar_contenido
 from sqlalchemy.orm import relationship
 
 class PerfilNino(db.Model):
@@ -22,21 +23,31 @@ class PerfilNino(db.Model):
     nivel_maximo_alcanzado = Column(String(20), default='inicial')  # Nivel más alto alcanzado
     puntos_totales_acumulados = Column(Integer, default=0)  # Puntos totales ganados
     actividades_completadas_total = Column(Integer, default=0)  # Total de actividades completadas
+    actividades_exitosas_total = Column(Integer, default=0)  # Completadas con al menos el 70% de los puntos
     dias_consecutivos = Column(Integer, default=0)  # Días consecutivos de uso
     fecha_ultima_actividad = Column(DateTime, nullable=True)  # Última vez que jugó
+    dias_actividad_inicio = Column(Date, nullable=True)  # Día del bit 0 del mapa de actividad
+    dias_actividad = Column(LargeBinary, nullable=True)  # Mapa de bits: un bit por día con actividad
     
-    # padre_id = Column(Integer, ForeignKey('usuario_padre.id'), nullable=True)  # Temporalmente comentado
+    padre_id = Column(Integer, ForeignKey('usuario_padre.id'), nullable=True, index=True)  # Padre/terapeuta a cargo
     creado_en = Column(DateTime, default=datetime.utcnow)
     activo = Column(Boolean, default=True)
     
     # Relaciones
     sesiones = relationship("SesionTEA", back_populates="nino")
     progresos = relationship("ProgresoTEA", back_populates="nino")
-    # padre = relationship("UsuarioPadre", back_populates="ninos")  # Temporalmente comentado
+    padre = relationship("UsuarioPadre", back_populates="ninos")
 
 class ActividadTEA(db.Model):
     """Actividades de terapia de lenguaje para TEA"""
     __tablename__ = 'actividades_tea'
+    __table_args__ = (
+        Index('ix_actividades_tea_categoria_activa_nivel', 'categoria', 'activa', 'nivel_dificultad'),
+        Index(
+            'ix_actividades_tea_contenido', 'contenido',
+            postgresql_using='gin', postgresql_ops={'contenido': 'jsonb_path_ops'}
+        ).ddl_if(dialect='postgresql'),
+    )
     
     id = Column(Integer, primary_key=True)
     titulo = Column(String(200), nullable=False)
@@ -44,7 +55,7 @@ class ActividadTEA(db.Model):
     tipo = Column(String(50), nullable=False)  # imitacion, asociacion, construccion, reconocimiento
     nivel_dificultad = Column(String(20), nullable=False)  # basico, intermedio, avanzado
     categoria = Column(String(50), nullable=False)  # lenguaje, numeros, colores, animales
-    contenido = Column(Text, nullable=False)  # JSON con datos de la actividad
+    contenido = Column(ContenidoJSON, nullable=False)  # JSON validado según `tipo` (ver activity_content)
     imagen_url = Column(String(500), nullable=True)
     audio_url = Column(String(500), nullable=True)
     puntos_recompensa = Column(Integer, default=10)
@@ -54,10 +65,28 @@ class ActividadTEA(db.Model):
     
     # Relaciones
     sesiones_actividades = relationship("SesionActividad", back_populates="actividad")
+    
+    @property
+    def datos(self):
+        """Contenido tipado según `tipo`, decodificado una sola vez por instancia"""
+        cache = getattr(self, '_datos_cache', None)
+        if cache is None or cache[0] is not self.contenido:
+            cache = (self.contenido, decodificar_contenido(self.tipo, self.contenido))
+            self._datos_cache = cache
+        return cache[1]
+
+@event.listens_for(ActividadTEA, 'before_insert')
+@event.listens_for(ActividadTEA, 'before_update')
+def _validar_contenido_actividad(mapper, conexion, actividad):
+    """Rechaza contenido que no cumple el esquema de su tipo antes de escribirlo"""
+    actividad.contenido = decodificar_contenido(actividad.tipo, actividad.contenido).a_dict()
 
 class SesionTEA(db.Model):
     """Sesiones diarias del niño"""
     __tablename__ = 'sesiones_tea'
+    __table_args__ = (
+        Index('ix_sesiones_tea_nino_fecha', 'nino_id', 'fecha'),
+    )
     
     id = Column(Integer, primary_key=True)
     nino_id = Column(Integer, ForeignKey('perfil_nino.id'), nullable=False)
@@ -75,6 +104,10 @@ class SesionTEA(db.Model):
 class SesionActividad(db.Model):
     """Actividades dentro de una sesión"""
     __tablename__ = 'sesion_actividades'
+    __table_args__ = (
+        UniqueConstraint('sesion_id', 'actividad_id', name='uq_sesion_actividades_sesion_actividad'),
+        Index('ix_sesion_actividades_actividad_fecha', 'actividad_id', 'fecha_completada'),
+    )
     
     id = Column(Integer, primary_key=True)
     sesion_id = Column(Integer, ForeignKey('sesiones_tea.id'), nullable=False)
@@ -82,7 +115,8 @@ class SesionActividad(db.Model):
     orden = Column(Integer, nullable=False)
     completada = Column(Boolean, default=False)
     intentos = Column(Integer, default=0)
-    tiempo_dedicado = Column(Integer, default=0)  # segundos
+    exitos = Column(Integer, default=0)  # intentos con resultado exitoso
+    tiempo_dedicado = Column(Integer, default=0)  # segundos, suma de todos los intentos
     puntos_obtenidos = Column(Integer, default=0)
     feedback = Column(Text, nullable=True)
     fecha_completada = Column(DateTime, nullable=True)
@@ -94,6 +128,9 @@ class SesionActividad(db.Model):
 class ProgresoTEA(db.Model):
     """Progreso del niño en diferentes habilidades"""
     __tablename__ = 'progreso_tea'
+    __table_args__ = (
+        Index('ix_progreso_tea_nino_habilidad', 'nino_id', 'habilidad'),
+    )
     
     id = Column(Integer, primary_key=True)
     nino_id = Column(Integer, ForeignKey('perfil_nino.id'), nullable=False)
@@ -124,6 +161,9 @@ class RecompensaTEA(db.Model):
 class LogroNino(db.Model):
     """Logros desbloqueados por el niño"""
     __tablename__ = 'logros_nino'
+    __table_args__ = (
+        UniqueConstraint('nino_id', 'recompensa_id', name='uq_logros_nino_nino_recompensa'),
+    )
     
     id = Column(Integer, primary_key=True)
     nino_id = Column(Integer, ForeignKey('perfil_nino.id'), nullable=False)
@@ -151,7 +191,7 @@ class UsuarioPadre(db.Model):
     ultimo_acceso = Column(DateTime)
     
     # Relaciones
-    # ninos = relationship("PerfilNino", back_populates="padre")  # Temporalmente comentado
+    ninos = relationship("PerfilNino", back_populates="padre")
     
     def set_password(self, password):
         """Establecer contraseña hasheada"""
@@ -215,6 +255,9 @@ class SesionUsuario(db.Model):
 class ProgresoUsuario(db.Model):
     """Progreso detallado del usuario por categoría"""
     __tablename__ = 'progreso_usuario'
+    __table_args__ = (
+        UniqueConstraint('nino_id', 'categoria', name='uq_progreso_usuario_nino_categoria'),
+    )
     
     id = Column(Integer, primary_key=True)
     nino_id = Column(Integer, ForeignKey('perfil_nino.id'), nullable=False)
@@ -238,6 +281,9 @@ class ProgresoUsuario(db.Model):
 class MedallaUsuario(db.Model):
     """Medallas e insignias desbloqueadas por el usuario"""
     __tablename__ = 'medalla_usuario'
+    __table_args__ = (
+        UniqueConstraint('nino_id', 'tipo_medalla', 'categoria', name='uq_medalla_usuario_nino_tipo_categoria'),
+    )
     
     id = Column(Integer, primary_key=True)
     nino_id = Column(Integer, ForeignKey('perfil_nino.id'), nullable=False)
@@ -256,6 +302,62 @@ class MedallaUsuario(db.Model):
     def __repr__(self):
         return f'<MedallaUsuario {self.nino_id} - {self.titulo}>'
 
+class ResumenDiario(db.Model):
+    """Totales diarios por niño y categoría, mantenidos al completar actividades"""
+    __tablename__ = 'resumen_diario'
+    __table_args__ = (
+        UniqueConstraint('nino_id', 'fecha', 'categoria', name='uq_resumen_diario_nino_fecha_categoria'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    nino_id = Column(Integer, ForeignKey('perfil_nino.id'), nullable=False)
+    fecha = Column(Date, nullable=False)
+    categoria = Column(String(50), nullable=False)
+    completadas = Column(Integer, default=0)
+    intentos = Column(Integer, default=0)
+    puntos = Column(Integer, default=0)
+    segundos = Column(Integer, default=0)
+    exitos = Column(Integer, default=0)
+    
+    # Relaciones
+    nino = relationship("PerfilNino")
+    
+    def __repr__(self):
+        return f'<ResumenDiario {self.nino_id} - {self.fecha} - {self.categoria}>'
+
+class PlanSesionPrecalculado(db.Model):
+    """Plan de sesión y recomendaciones de un niño calculados de antemano para un día"""
+    __tablename__ = 'plan_sesion_precalculado'
+    __table_args__ = (
+        UniqueConstraint('nino_id', 'fecha', name='uq_plan_sesion_precalculado_nino_fecha'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    nino_id = Column(Integer, ForeignKey('perfil_nino.id'), nullable=False)
+    fecha = Column(Date, nullable=False)  # día local para el que se calculó
+    duracion = Column(Integer, nullable=False)  # minutos del plan
+    plan = Column(JSON, nullable=False)  # misma forma que /api/plan-sesion
+    recomendaciones = Column(JSON, nullable=False)  # misma forma que /api/recomendaciones
+    version_catalogo = Column(Integer, nullable=False, default=0)
+    generado_en = Column(DateTime, default=datetime.utcnow)
+    
+    # Relaciones
+    nino = relationship("PerfilNino")
+    
+    def __repr__(self):
+        return f'<PlanSesionPrecalculado {self.nino_id} - {self.fecha}>'
+
+class VersionCache(db.Model):
+    """Contador de versión por caché compartida (p. ej. el catálogo de actividades)"""
+    __tablename__ = 'version_cache'
+    
+    nombre = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    actualizado_en = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<VersionCache {self.nombre}: {self.version}>'
+
 class ConfiguracionUsuario(db.Model):
     """Configuraciones personalizadas del usuario"""
     __tablename__ = 'configuracion_usuario'
@@ -7,7 +7,14 @@ from ..models.goals import Goal
 from ..models.plan_day import PlanDay, PlanItem
 
 api_ai_bp = Blueprint("api_ai", __name__, url_prefix="/api/ai/plan")
-planner = AIPlanner()
+_planner = None
+
+def get_planner():
+    """Crea el planner (y su proveedor) en la primera petición, no al importar."""
+    global _planner
+    if _planner is None:
+        _planner = AIPlanner()
+    return _planner
 
 @api_ai_bp.post("/suggest")
 def suggest():
@@ -16,7 +23,7 @@ def suggest():
     horizonte = data.get("horizonte", "90d")
     restricciones = data.get("restricciones", {})
     agenda = data.get("agenda", [])
-    draft = planner.suggest(goals_raw, horizonte, restricciones, agenda)
+    draft = get_planner().suggest(goals_raw, horizonte, restricciones, agenda)
     return jsonify({"ok": True, "draft": draft})
 
 @api_ai_bp.post("/refine")
@@ -24,7 +31,7 @@ def refine():
     data = request.get_json(force=True, silent=True) or {}
     draft = data.get("draft", {})
     feedback = data.get("feedback", "")
-    refined = planner.refine(draft, feedback)
+    refined = get_planner().refine(draft, feedback)
     return jsonify({"ok": True, "draft": refined})
 
 @api_ai_bp.post("/move_to_today")
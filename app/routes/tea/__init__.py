@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, jsonify
+from app.extensions import estadisticas_pool
+from .auth import api_padres_only
 
 tea_bp = Blueprint('tea', __name__, url_prefix='/tea')
 
@@ -13,6 +15,31 @@ def welcome():
     """Página de bienvenida de TEA Edition"""
     return render_template('tea/welcome.html')
 
+@tea_bp.route('/api/estado-pool')
+@api_padres_only
+def api_estado_pool():
+    """Estadísticas del pool de conexiones del proceso (monitoreo)"""
+    return jsonify(estadisticas_pool())
+
+@tea_bp.route('/api/metricas')
+@api_padres_only
+def api_metricas():
+    """Métricas por endpoint, pool y cachés del proceso (monitoreo)"""
+    from app.services.request_metrics import obtener_metricas
+    from app.services.learner_state import LearnerStateSystem
+    from app.services.page_cache import PageCacheSystem
+    from app.services.activity_catalog import ActivityCatalogSystem
+    
+    return jsonify({
+        **obtener_metricas(),
+        'pool': estadisticas_pool(),
+        'caches': {
+            'estado_aprendizaje': LearnerStateSystem.estadisticas_cache(),
+            'paginas': PageCacheSystem.estadisticas_cache(),
+            'catalogo_actividades': ActivityCatalogSystem.estadisticas()
+        }
+    })
+
 # Importar y registrar sub-blueprints
 from .simple import simple_bp
 from .padres import padres_bp
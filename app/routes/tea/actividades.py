@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from flask import Blueprint, render_template, request, jsonify, session
+from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for
 from app.extensions import db
 from app.models.tea_models import (
     PerfilNino, ActividadTEA, SesionTEA, SesionActividad, 
@@ -7,6 +7,7 @@ from app.models.tea_models import (
 )
 from datetime import datetime
 from .test_data import ensure_test_data
+from .auth import api_login_required
 from app.services.adaptive_learning import (
     AdaptiveLearningSystem, obtener_actividades_adaptativas, 
     generar_plan_sesion_adaptativo
@@ -16,10 +17,15 @@ from app.services.progressive_learning import (
     generar_plan_progresivo
 )
 from app.services.permanent_progression import (
-    evaluar_progreso_actividad, obtener_actividades_disponibles_nino,
-    obtener_estadisticas_progresion_nino
+    obtener_actividades_disponibles_nino, obtener_estadisticas_progresion_nino
+)
+from app.services.child_scope import obtener_nino_actual, obtener_contexto_nino
+from app.services.activity_completion import completar_actividad, obtener_sesion_hoy
+from app.services.activity_catalog import ActivityCatalogSystem, listar_actividades, obtener_actividad_o_404
+from app.services.page_cache import renderizar_pagina_nino
+from app.services.plan_precompute import (
+    formatear_plan, formatear_recomendaciones, obtener_plan_precalculado
 )
-from app.services.user_progress import actualizar_progreso_actividad
 
 actividades_bp = Blueprint('actividades', __name__, url_prefix='/actividades')
 
@@ -29,36 +35,26 @@ def lista_actividades():
     """Lista de actividades progresivas recomendadas"""
     ensure_test_data()
     
-    nino = PerfilNino.query.first()
+    contexto = obtener_contexto_nino()
+    nino = contexto.nino
     if not nino:
         return render_template('tea/error.html', 
                              mensaje="No hay perfil de niño configurado")
     
-    # Obtener avatar actual del niño
-    from app.models.tea_models import AvatarUsuario, Avatar
-    avatar_usuario = AvatarUsuario.query.filter_by(
-        usuario_id=nino.id,
-        tipo_usuario='nino',
-        activo=True
-    ).first()
-    
-    avatar_actual = None
-    if avatar_usuario:
-        avatar_actual = avatar_usuario.avatar
-    
-    # Si no hay avatar seleccionado, usar el avatar por defecto
-    if not avatar_actual:
-        avatar_actual = Avatar.query.filter_by(nombre='Spider-Man').first()
+    # Avatar actual del niño (o el avatar por defecto)
+    avatar_actual = contexto.avatar
     
     # Obtener actividades progresivas recomendadas
     sistema_progresivo = ProgressiveLearningSystem(nino.id)
-    recomendaciones = obtener_actividades_progresivas(nino.id, limite=8)
+    recomendaciones = obtener_actividades_progresivas(nino.id, limite=8, sistema=sistema_progresivo)
     
-    # Generar plan de sesión progresivo
-    plan_sesion = generar_plan_progresivo(nino.id, duracion=nino.tiempo_sesion_min)
+    # Generar plan de sesión progresivo (mismo historial y progresos ya cargados)
+    plan_sesion = generar_plan_progresivo(
+        nino.id, duracion=nino.tiempo_sesion_min, sistema=sistema_progresivo
+    )
     
     # Obtener actividades para mostrar en la lista
-    actividades = ActividadTEA.query.filter_by(activa=True).limit(6).all()
+    actividades = listar_actividades()[:6]
     
     return render_template('tea/actividades_lista.html',
                          nino=nino,
@@ -72,31 +68,15 @@ def realizar_actividad(actividad_id):
     """Realizar una actividad específica"""
     ensure_test_data()
     
-    nino = PerfilNino.query.first()
-    actividad = ActividadTEA.query.get_or_404(actividad_id)
-    
-    # Obtener avatar actual del niño
-    from app.models.tea_models import AvatarUsuario, Avatar
-    avatar_usuario = AvatarUsuario.query.filter_by(
-        usuario_id=nino.id,
-        tipo_usuario='nino',
-        activo=True
-    ).first()
-    
-    avatar_actual = None
-    if avatar_usuario:
-        avatar_actual = avatar_usuario.avatar
+    contexto = obtener_contexto_nino()
+    nino = contexto.nino
+    if not nino:
+        return redirect(url_for('tea.auth.login'))
     
-    # Si no hay avatar seleccionado, usar el avatar por defecto
-    if not avatar_actual:
-        avatar_actual = Avatar.query.filter_by(nombre='Spider-Man').first()
+    actividad = obtener_actividad_o_404(actividad_id)
     
     # Obtener o crear sesión de hoy
-    hoy = datetime.now().date()
-    sesion = SesionTEA.query.filter(
-        db.func.date(SesionTEA.fecha) == hoy,
-        SesionTEA.nino_id == nino.id
-    ).first()
+    sesion = obtener_sesion_hoy(nino.id)
     
     if not sesion:
         sesion = SesionTEA(
@@ -106,134 +86,42 @@ def realizar_actividad(actividad_id):
         db.session.add(sesion)
         db.session.commit()
     
-    return render_template('tea/actividad_detalle.html',
-                         nino=nino,
-                         actividad=actividad,
-                         sesion=sesion,
-                         avatar_actual=avatar_actual)
+    # La página solo depende de la actividad y del avatar: se sirve desde caché
+    return renderizar_pagina_nino(
+        'actividad', actividad.id, contexto,
+        lambda avatar_actual: render_template('tea/actividad_detalle.html',
+                                              nino=nino,
+                                              actividad=actividad,
+                                              sesion=sesion,
+                                              avatar_actual=avatar_actual)
+    )
 
 @actividades_bp.route('/api/completar/<int:actividad_id>', methods=['POST'])
+@api_login_required
 def api_completar_actividad(actividad_id):
     """API para completar una actividad"""
     try:
-        data = request.get_json()
-        nino = PerfilNino.query.first()
-        actividad = ActividadTEA.query.get_or_404(actividad_id)
+        data = request.get_json() or {}
+        nino = obtener_nino_actual()
+        actividad = obtener_actividad_o_404(actividad_id)
         
-        # Obtener o crear sesión de hoy
-        hoy = datetime.now().date()
-        sesion = SesionTEA.query.filter(
-            db.func.date(SesionTEA.fecha) == hoy,
-            SesionTEA.nino_id == nino.id
-        ).first()
+        exito = data.get('exito')
+        if exito is not None and not isinstance(exito, bool):
+            return jsonify({'error': "El campo 'exito' debe ser true o false"}), 400
         
-        if not sesion:
-            sesion = SesionTEA(
-                nino_id=nino.id,
-                estado='iniciada'
-            )
-            db.session.add(sesion)
-            db.session.commit()
-        
-        # Crear o actualizar sesión-actividad
-        sesion_actividad = SesionActividad.query.filter_by(
-            sesion_id=sesion.id,
-            actividad_id=actividad_id
-        ).first()
-        
-        if not sesion_actividad:
-            sesion_actividad = SesionActividad(
-                sesion_id=sesion.id,
-                actividad_id=actividad_id,
-                orden=1,
-                intentos=1,
-                tiempo_dedicado=data.get('tiempo_dedicado', 0),
-                puntos_obtenidos=actividad.puntos_recompensa,
-                fecha_completada=datetime.now()
-            )
-            db.session.add(sesion_actividad)
-        else:
-            sesion_actividad.intentos += 1
-            sesion_actividad.completada = True
-            sesion_actividad.puntos_obtenidos = actividad.puntos_recompensa
-            sesion_actividad.fecha_completada = datetime.now()
-        
-        # Actualizar sesión
-        sesion.actividades_completadas += 1
-        sesion.puntos_ganados += actividad.puntos_recompensa
-        sesion.duracion_minutos += data.get('tiempo_dedicado', 0) // 60
-        
-        # Actualizar progreso con sistema de progresión permanente
-        exito = data.get('exito', True)  # Por defecto considerar exitoso
-        evaluar_progreso_actividad(
-            nino.id, 
-            actividad_id, 
-            actividad.puntos_recompensa, 
-            exito
-        )
-        
-        # Actualizar progreso real del usuario
-        actualizar_progreso_actividad(
+        # Toda la finalización (sesión, progreso, medallas, recompensas)
+        # se registra en una única transacción
+        resultado = completar_actividad(
             nino.id,
-            actividad_id,
-            actividad.puntos_recompensa
+            actividad,
+            tiempo_dedicado=data.get('tiempo_dedicado', 0),
+            exito=exito  # Sin indicador decide el umbral de puntos
         )
         
-        # Mantener compatibilidad con sistema anterior
-        progreso = ProgresoTEA.query.filter_by(
-            nino_id=nino.id,
-            habilidad=actividad.categoria
-        ).first()
-        
-        if progreso:
-            progreso.puntos_totales += actividad.puntos_recompensa
-            progreso.sesiones_completadas += 1
-            progreso.racha_dias = 1  # Simplificado para demo
-            progreso.ultima_actualizacion = datetime.now()
-        else:
-            progreso = ProgresoTEA(
-                nino_id=nino.id,
-                habilidad=actividad.categoria,
-                nivel_actual=nino.nivel_dificultad,
-                puntos_totales=actividad.puntos_recompensa,
-                sesiones_completadas=1,
-                racha_dias=1,
-                ultima_actualizacion=datetime.now()
-            )
-            db.session.add(progreso)
-        
-        # Analizar si necesita ajustar el nivel de dificultad progresivo
-        sistema_progresivo = ProgressiveLearningSystem(nino.id)
-        nivel_actualizado = sistema_progresivo.actualizar_nivel_progresion(actividad.categoria)
-        
-        if nivel_actualizado:
+        if resultado['nivel_actualizado']:
             print(f"🎯 Nivel actualizado para {actividad.categoria}")
         
-        db.session.commit()
-        
-        # Verificar si desbloquea recompensa
-        recompensas_desbloqueadas = []
-        recompensas = RecompensaTEA.query.filter(
-            RecompensaTEA.puntos_requeridos <= progreso.puntos_totales
-        ).all()
-        
-        for recompensa in recompensas:
-            # Verificar si ya la tiene
-            logro_existente = LogroNino.query.filter_by(
-                nino_id=nino.id,
-                recompensa_id=recompensa.id
-            ).first()
-            
-            if not logro_existente:
-                logro = LogroNino(
-                    nino_id=nino.id,
-                    recompensa_id=recompensa.id,
-                    sesion_id=sesion.id
-                )
-                db.session.add(logro)
-                recompensas_desbloqueadas.append(recompensa)
-        
-        db.session.commit()
+        recompensas_desbloqueadas = resultado['recompensas_desbloqueadas']
         
         return jsonify({
             'success': True,
@@ -246,7 +134,7 @@ def api_completar_actividad(actividad_id):
                 } for r in recompensas_desbloqueadas
             ]
         })
-        
+    
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -255,169 +143,91 @@ def actividades_lenguaje():
     """Actividades de lenguaje"""
     ensure_test_data()
     
-    nino = PerfilNino.query.first()
-    actividades = ActividadTEA.query.filter_by(
-        categoria='lenguaje',
-        activa=True
-    ).all()
-    
-    # Obtener avatar actual del niño
-    from app.models.tea_models import AvatarUsuario, Avatar
-    avatar_usuario = AvatarUsuario.query.filter_by(
-        usuario_id=nino.id,
-        tipo_usuario='nino',
-        activo=True
-    ).first()
-    
-    avatar_actual = None
-    if avatar_usuario:
-        avatar_actual = avatar_usuario.avatar
-    
-    # Si no hay avatar seleccionado, usar el avatar por defecto
-    if not avatar_actual:
-        avatar_actual = Avatar.query.filter_by(nombre='Spider-Man').first()
-    
-    return render_template('tea/actividades_categoria.html',
-                         nino=nino,
-                         actividades=actividades,
-                         categoria='Lenguaje',
-                         icono='🗣️',
-                         avatar_actual=avatar_actual)
+    contexto = obtener_contexto_nino()
+    nino = contexto.nino
+    
+    return renderizar_pagina_nino(
+        'categoria', 'lenguaje', contexto,
+        lambda avatar_actual: render_template('tea/actividades_categoria.html',
+                                              nino=nino,
+                                              actividades=listar_actividades('lenguaje'),
+                                              categoria='Lenguaje',
+                                              icono='🗣️',
+                                              avatar_actual=avatar_actual)
+    )
 
 @actividades_bp.route('/numeros')
 def actividades_numeros():
     """Actividades de números"""
     ensure_test_data()
     
-    nino = PerfilNino.query.first()
-    actividades = ActividadTEA.query.filter_by(
-        categoria='numeros',
-        activa=True
-    ).all()
-    
-    # Obtener avatar actual del niño
-    from app.models.tea_models import AvatarUsuario, Avatar
-    avatar_usuario = AvatarUsuario.query.filter_by(
-        usuario_id=nino.id,
-        tipo_usuario='nino',
-        activo=True
-    ).first()
-    
-    avatar_actual = None
-    if avatar_usuario:
-        avatar_actual = avatar_usuario.avatar
-    
-    # Si no hay avatar seleccionado, usar el avatar por defecto
-    if not avatar_actual:
-        avatar_actual = Avatar.query.filter_by(nombre='Spider-Man').first()
-    
-    return render_template('tea/actividades_categoria.html',
-                         nino=nino,
-                         actividades=actividades,
-                         categoria='Números',
-                         icono='🔢',
-                         avatar_actual=avatar_actual)
+    contexto = obtener_contexto_nino()
+    nino = contexto.nino
+    
+    return renderizar_pagina_nino(
+        'categoria', 'numeros', contexto,
+        lambda avatar_actual: render_template('tea/actividades_categoria.html',
+                                              nino=nino,
+                                              actividades=listar_actividades('numeros'),
+                                              categoria='Números',
+                                              icono='🔢',
+                                              avatar_actual=avatar_actual)
+    )
 
 @actividades_bp.route('/colores')
 def actividades_colores():
     """Actividades de colores"""
     ensure_test_data()
     
-    nino = PerfilNino.query.first()
-    actividades = ActividadTEA.query.filter_by(
-        categoria='colores',
-        activa=True
-    ).all()
-    
-    # Obtener avatar actual del niño
-    from app.models.tea_models import AvatarUsuario, Avatar
-    avatar_usuario = AvatarUsuario.query.filter_by(
-        usuario_id=nino.id,
-        tipo_usuario='nino',
-        activo=True
-    ).first()
-    
-    avatar_actual = None
-    if avatar_usuario:
-        avatar_actual = avatar_usuario.avatar
-    
-    # Si no hay avatar seleccionado, usar el avatar por defecto
-    if not avatar_actual:
-        avatar_actual = Avatar.query.filter_by(nombre='Spider-Man').first()
-    
-    return render_template('tea/actividades_categoria.html',
-                         nino=nino,
-                         actividades=actividades,
-                         categoria='Colores',
-                         icono='🎨',
-                         avatar_actual=avatar_actual)
+    contexto = obtener_contexto_nino()
+    nino = contexto.nino
+    
+    return renderizar_pagina_nino(
+        'categoria', 'colores', contexto,
+        lambda avatar_actual: render_template('tea/actividades_categoria.html',
+                                              nino=nino,
+                                              actividades=listar_actividades('colores'),
+                                              categoria='Colores',
+                                              icono='🎨',
+                                              avatar_actual=avatar_actual)
+    )
 
 @actividades_bp.route('/animales')
 def actividades_animales():
     """Actividades de animales"""
     ensure_test_data()
     
-    nino = PerfilNino.query.first()
-    actividades = ActividadTEA.query.filter_by(
-        categoria='animales',
-        activa=True
-    ).all()
-    
-    # Obtener avatar actual del niño
-    from app.models.tea_models import AvatarUsuario, Avatar
-    avatar_usuario = AvatarUsuario.query.filter_by(
-        usuario_id=nino.id,
-        tipo_usuario='nino',
-        activo=True
-    ).first()
-    
-    avatar_actual = None
-    if avatar_usuario:
-        avatar_actual = avatar_usuario.avatar
-    
-    # Si no hay avatar seleccionado, usar el avatar por defecto
-    if not avatar_actual:
-        avatar_actual = Avatar.query.filter_by(nombre='Spider-Man').first()
-    
-    return render_template('tea/actividades_categoria.html',
-                         nino=nino,
-                         actividades=actividades,
-                         categoria='Animales',
-                         icono='🐶',
-                         avatar_actual=avatar_actual)
+    contexto = obtener_contexto_nino()
+    nino = contexto.nino
+    
+    return renderizar_pagina_nino(
+        'categoria', 'animales', contexto,
+        lambda avatar_actual: render_template('tea/actividades_categoria.html',
+                                              nino=nino,
+                                              actividades=listar_actividades('animales'),
+                                              categoria='Animales',
+                                              icono='🐶',
+                                              avatar_actual=avatar_actual)
+    )
 
 @actividades_bp.route('/api/recomendaciones')
+@api_login_required
 def api_recomendaciones():
     """API para obtener recomendaciones progresivas"""
     ensure_test_data()
     
-    nino = PerfilNino.query.first()
+    nino = obtener_nino_actual()
     if not nino:
         return jsonify({'error': 'No hay perfil de niño'}), 404
     
-    recomendaciones = obtener_actividades_progresivas(nino.id, limite=5)
-    
-    # Formatear recomendaciones para JSON
-    recomendaciones_json = []
-    for rec in recomendaciones:
-        actividad = rec['actividad']
-        recomendaciones_json.append({
-            'id': actividad.id,
-            'titulo': actividad.titulo,
-            'descripcion': actividad.descripcion,
-            'categoria': actividad.categoria,
-            'nivel_dificultad': actividad.nivel_dificultad,
-            'puntos_recompensa': actividad.puntos_recompensa,
-            'tiempo_estimado': actividad.tiempo_estimado,
-            'score_progresion': round(rec['score'], 2),
-            'nivel_objetivo': rec['nivel_objetivo'],
-            'motivo_progresion': rec['motivo_progresion'],
-            'evaluacion': {
-                'puede_avanzar': rec['evaluacion']['puede_avanzar'],
-                'tasa_exito': round(rec['evaluacion']['tasa_exito'], 2),
-                'puntos_totales': rec['evaluacion']['puntos_totales']
-            }
-        })
+    # Recomendaciones del proceso nocturno si siguen vigentes
+    precalculado = obtener_plan_precalculado(nino)
+    if precalculado is not None:
+        recomendaciones_json = precalculado.recomendaciones
+    else:
+        recomendaciones_json = formatear_recomendaciones(
+            obtener_actividades_progresivas(nino.id, limite=5)
+        )
     
     return jsonify({
         'recomendaciones': recomendaciones_json,
@@ -426,77 +236,47 @@ def api_recomendaciones():
             'nivel_dificultad': nino.nivel_dificultad,
             'tiempo_sesion_min': nino.tiempo_sesion_min
         },
-        'tipo': 'progresivo'
+        'tipo': 'progresivo',
+        'precalculado': precalculado is not None
     })
 
 @actividades_bp.route('/api/plan-sesion')
+@api_login_required
 def api_plan_sesion():
     """API para generar plan de sesión progresivo"""
     ensure_test_data()
     
-    nino = PerfilNino.query.first()
+    nino = obtener_nino_actual()
     if not nino:
         return jsonify({'error': 'No hay perfil de niño'}), 404
     
     duracion = request.args.get('duracion', nino.tiempo_sesion_min, type=int)
-    plan = generar_plan_progresivo(nino.id, duracion=duracion)
     
-    # Formatear plan para JSON
-    plan_json = []
-    for item in plan['plan']:
-        actividad = item['actividad']
-        plan_json.append({
-            'orden': item['orden'],
-            'actividad_id': actividad.id,
-            'titulo': actividad.titulo,
-            'categoria': actividad.categoria,
-            'nivel_dificultad': actividad.nivel_dificultad,
-            'tiempo_estimado': item['tiempo_estimado'],
-            'nivel_objetivo': item['nivel_objetivo'],
-            'motivo_progresion': item['motivo_progresion'],
-            'score_progresion': round(item['score_progresion'], 2)
-        })
+    # Plan del proceso nocturno si sigue vigente para esta duración
+    precalculado = obtener_plan_precalculado(nino, duracion)
+    if precalculado is not None:
+        return jsonify(dict(precalculado.plan, precalculado=True))
     
-    return jsonify({
-        'plan': plan_json,
-        'tiempo_total_estimado': plan['tiempo_total_estimado'],
-        'actividades_incluidas': plan['actividades_incluidas'],
-        'fecha_generacion': plan['fecha_generacion'].isoformat(),
-        'tipo': 'progresivo'
-    })
+    plan = generar_plan_progresivo(nino.id, duracion=duracion)
+    return jsonify(dict(formatear_plan(plan), precalculado=False))
 
 @actividades_bp.route('/categoria/<categoria>')
 def categoria_actividades(categoria):
     """Mostrar actividades de una categoría específica"""
     try:
         # Obtener actividades de la categoría
-        actividades = ActividadTEA.query.filter_by(
-            categoria=categoria, 
-            activa=True
-        ).all()
+        actividades = listar_actividades(categoria)
         
         # Obtener progreso del niño en esta categoría
-        nino = PerfilNino.query.first()
+        contexto = obtener_contexto_nino()
+        nino = contexto.nino
         progreso = None
         if nino:
-            from app.services.user_progress import UserProgressSystem
-            progreso = UserProgressSystem.obtener_progreso_categoria(nino.id, categoria)
-            
-            # Obtener avatar actual del niño
-            from app.models.tea_models import AvatarUsuario, Avatar
-            avatar_usuario = AvatarUsuario.query.filter_by(
-                usuario_id=nino.id,
-                tipo_usuario='nino',
-                activo=True
-            ).first()
-            
-            avatar_actual = None
-            if avatar_usuario:
-                avatar_actual = avatar_usuario.avatar
+            from app.services.learner_state import LearnerStateSystem
+            progreso = LearnerStateSystem.obtener_progreso_categoria(nino.id, categoria)
             
-            # Si no hay avatar seleccionado, usar el avatar por defecto
-            if not avatar_actual:
-                avatar_actual = Avatar.query.filter_by(nombre='Spider-Man').first()
+            # Avatar actual del niño (o el avatar por defecto)
+            avatar_actual = contexto.avatar
         
         # Configurar información de la categoría
         categoria_info = {
@@ -551,7 +331,7 @@ def categoria_actividades(categoria):
                              actividades_completadas=progreso['actividades_completadas'] if progreso else 0,
                              actividades_totales=progreso['actividades_totales'] if progreso else len(actividades),
                              avatar_actual=avatar_actual)
-        
+    
     except Exception as e:
         # Fallback a datos mock
         actividades_mock = [
@@ -589,21 +369,19 @@ def categoria_actividades(categoria):
                              avatar_actual=avatar_actual)
 
 @actividades_bp.route('/api/categoria/<categoria>')
+@api_login_required
 def api_categoria_actividades(categoria):
     """API para obtener actividades de una categoría específica"""
     try:
         # Obtener actividades de la categoría
-        actividades = ActividadTEA.query.filter_by(
-            categoria=categoria, 
-            activa=True
-        ).all()
+        actividades = listar_actividades(categoria)
         
         # Obtener progreso del niño
-        nino = PerfilNino.query.first()
+        nino = obtener_nino_actual()
         progreso = None
         if nino:
-            from app.services.user_progress import UserProgressSystem
-            progreso = UserProgressSystem.obtener_progreso_categoria(nino.id, categoria)
+            from app.services.learner_state import LearnerStateSystem
+            progreso = LearnerStateSystem.obtener_progreso_categoria(nino.id, categoria)
         
         # Preparar datos
         actividades_data = []
@@ -628,7 +406,7 @@ def api_categoria_actividades(categoria):
             'actividades': actividades_data,
             'progreso': progreso
         })
-        
+    
     except Exception as e:
         return jsonify({
             'success': False,
@@ -640,7 +418,7 @@ def api_categoria_actividades(categoria):
 def mapa_mundos():
     """Mostrar el mapa de mundos desbloqueables"""
     try:
-        nino = PerfilNino.query.first()
+        nino = obtener_nino_actual()
         if not nino:
             return render_template('tea/error.html', 
                                  mensaje="No hay perfil de niño configurado")
@@ -652,16 +430,17 @@ def mapa_mundos():
         return render_template('tea/mapa_mundos.html',
                              nino=nino,
                              estadisticas=estadisticas)
-        
+    
     except Exception as e:
         return render_template('tea/error.html', 
                              mensaje=f"Error cargando mapa: {str(e)}")
 
 @actividades_bp.route('/api/mapa-zonas')
+@api_login_required
 def api_mapa_zonas():
     """API para obtener datos del mapa de zonas"""
     try:
-        nino = PerfilNino.query.first()
+        nino = obtener_nino_actual()
         if not nino:
             return jsonify({
                 'success': False,
@@ -675,7 +454,7 @@ def api_mapa_zonas():
         
         # Calcular progreso general
         total_completadas = estadisticas.get('actividades_completadas', 0)
-        total_actividades = ActividadTEA.query.count()
+        total_actividades = ActivityCatalogSystem.total()
         porcentaje_general = (total_completadas / total_actividades * 100) if total_actividades > 0 else 0
         
         # Determinar estado de cada zona
@@ -716,7 +495,7 @@ def api_mapa_zonas():
                 'porcentaje': round(porcentaje_general, 1)
             }
         })
-        
+    
     except Exception as e:
         return jsonify({
             'success': False,
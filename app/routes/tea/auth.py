@@ -3,6 +3,7 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from datetime import datetime
 from app.models.tea_models import UsuarioPadre, UsuarioNino, PerfilNino, SesionUsuario
 from app import db
+from app.services.child_scope import ChildScopeSystem
 from functools import wraps
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
@@ -17,6 +18,26 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def api_login_required(f):
+    """Decorador para APIs: 401 en JSON si no hay sesión (salvo en modo kiosco)"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not ChildScopeSystem.acceso_permitido():
+            return jsonify({'success': False, 'message': 'Inicia sesión para usar esta API'}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+def api_padres_only(f):
+    """Decorador para APIs de padres/terapeutas: 401 sin sesión y 403 para otros usuarios"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not ChildScopeSystem.sesion_reconocida():
+            return jsonify({'success': False, 'message': 'Inicia sesión para usar esta API'}), 401
+        if session.get('user_type') != 'padre':
+            return jsonify({'success': False, 'message': 'Solo los padres pueden usar esta API'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
 def get_current_user():
     """Obtener el usuario actual desde la sesión"""
     if 'user_id' not in session or 'user_type' not in session:
@@ -2,6 +2,7 @@
 from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for, flash
 from app.models.tea_models import Avatar, AvatarUsuario, UsuarioNino, UsuarioPadre
 from app.extensions import db
+from app.services.child_scope import obtener_avatar_sesion
 import json
 
 avatars_bp = Blueprint('avatars', __name__, url_prefix='/avatars')
@@ -17,19 +18,7 @@ def avatares_lista():
     avatares = Avatar.query.filter_by(activo=True).all()
     
     # Obtener avatar actual del usuario
-    avatar_actual = None
-    if session.get('user_type') == 'nino':
-        avatar_actual = AvatarUsuario.query.filter_by(
-            usuario_id=session['user_id'],
-            tipo_usuario='nino',
-            activo=True
-        ).first()
-    else:
-        avatar_actual = AvatarUsuario.query.filter_by(
-            usuario_id=session['user_id'],
-            tipo_usuario='padre',
-            activo=True
-        ).first()
+    avatar_actual = obtener_avatar_sesion()
     
     return render_template('tea/avatars/lista_avatars.html', 
                          avatares=avatares, 
@@ -225,11 +214,7 @@ def avatar_actual():
         return jsonify({'success': False, 'message': 'No autorizado'})
     
     try:
-        avatar_usuario = AvatarUsuario.query.filter_by(
-            usuario_id=session['user_id'],
-            tipo_usuario=session['user_type'],
-            activo=True
-        ).first()
+        avatar_usuario = obtener_avatar_sesion()
         
         if not avatar_usuario:
             return jsonify({'success': False, 'message': 'No hay avatar seleccionado'})
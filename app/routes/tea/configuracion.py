@@ -2,6 +2,7 @@
 from flask import Blueprint, render_template, request, jsonify, session, flash, redirect, url_for
 from app.models.tea_models import ConfiguracionUsuario, PerfilNino, UsuarioNino
 from app import db
+from app.services.child_scope import obtener_contexto_nino
 from functools import wraps
 
 configuracion_bp = Blueprint('configuracion', __name__, url_prefix='/configuracion')
@@ -32,16 +33,16 @@ def padres_only(f):
     return decorated_function
 
 def get_current_nino_id():
-    """Obtener el ID del niño actual"""
-    if session.get('user_type') == 'nino':
-        return session.get('user_id')
-    elif session.get('user_type') == 'padre':
-        # Si es padre, obtener el primer niño asociado
-        usuario_padre = session.get('user_id')
-        nino = UsuarioNino.query.filter_by(activo=True).first()
+    """Obtener el ID del perfil del niño actual"""
+    if session.get('user_type') in ('nino', 'padre'):
+        nino = obtener_contexto_nino().nino
         return nino.id if nino else None
     return None
 
+def get_current_config():
+    """Configuración activa del niño actual (cargada junto con el niño)"""
+    return obtener_contexto_nino().configuracion
+
 @configuracion_bp.route('/')
 @padres_only
 def configuracion_principal():
@@ -52,7 +53,7 @@ def configuracion_principal():
         return redirect(url_for('tea.index'))
     
     # Obtener o crear configuración
-    config = ConfiguracionUsuario.query.filter_by(nino_id=nino_id, activa=True).first()
+    config = get_current_config()
     if not config:
         config = ConfiguracionUsuario(nino_id=nino_id)
         db.session.add(config)
@@ -76,7 +77,7 @@ def api_guardar_configuracion():
             return jsonify({'error': 'No se recibieron datos'}), 400
         
         # Obtener o crear configuración
-        config = ConfiguracionUsuario.query.filter_by(nino_id=nino_id, activa=True).first()
+        config = get_current_config()
         if not config:
             config = ConfiguracionUsuario(nino_id=nino_id)
             db.session.add(config)
@@ -142,7 +143,7 @@ def api_cargar_configuracion():
         if not nino_id:
             return jsonify({'error': 'No se pudo encontrar el perfil del niño'}), 400
         
-        config = ConfiguracionUsuario.query.filter_by(nino_id=nino_id, activa=True).first()
+        config = get_current_config()
         if not config:
             # Crear configuración por defecto
             config = ConfiguracionUsuario(nino_id=nino_id)
@@ -171,7 +172,7 @@ def api_guardar_configuracion_unificada():
             return jsonify({'error': 'No se recibieron datos'}), 400
         
         # Obtener o crear configuración
-        config = ConfiguracionUsuario.query.filter_by(nino_id=nino_id, activa=True).first()
+        config = get_current_config()
         if not config:
             config = ConfiguracionUsuario(nino_id=nino_id)
             db.session.add(config)
@@ -233,7 +234,7 @@ def api_reset_configuracion():
             return jsonify({'error': 'No se pudo encontrar el perfil del niño'}), 400
         
         # Eliminar configuración actual
-        config = ConfiguracionUsuario.query.filter_by(nino_id=nino_id, activa=True).first()
+        config = get_current_config()
         if config:
             config.activa = False
             db.session.commit()
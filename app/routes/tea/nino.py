@@ -3,8 +3,10 @@ from flask import Blueprint, render_template, request, jsonify, session
 from app.extensions import db
 from app.models.tea_models import PerfilNino, SesionTEA, ProgresoTEA, LogroNino
 from app.services.user_progress import obtener_estadisticas_dashboard, obtener_medallas_usuario
+from app.services.child_scope import obtener_nino_actual
 from datetime import datetime, timedelta
 from .test_data import ensure_test_data
+from .auth import api_login_required
 
 nino_bp = Blueprint('nino', __name__, url_prefix='/nino')
 
@@ -35,11 +37,12 @@ def dashboard():
                          logros_recientes=logros_recientes)
 
 @nino_bp.route('/api/estadisticas')
+@api_login_required
 def api_estadisticas():
     """API para obtener estadísticas del niño"""
     try:
         # Intentar obtener datos reales
-        nino = PerfilNino.query.first()
+        nino = obtener_nino_actual()
         if nino:
             # Usar el nuevo sistema de progreso real
             estadisticas = obtener_estadisticas_dashboard(nino.id)
@@ -89,30 +92,21 @@ def calcular_puntos_semana(nino_id):
     """Calcula los puntos ganados en la última semana"""
     try:
         from datetime import datetime, timedelta
-        from app.models.tea_models import SesionActividad, ActividadTEA
+        from app.services.daily_rollup import obtener_resumen_totales
+        from app.utils.day_window import hoy_local
         
-        # Fecha de hace 7 días
-        fecha_semana = datetime.utcnow() - timedelta(days=7)
-        
-        # Obtener actividades completadas en la última semana
-        actividades_semana = db.session.query(SesionActividad, ActividadTEA).join(
-            ActividadTEA, SesionActividad.actividad_id == ActividadTEA.id
-        ).filter(
-            SesionActividad.completada == True,
-            SesionActividad.fecha_completada >= fecha_semana
-        ).all()
-        
-        # Sumar puntos
-        puntos_semana = sum(actividad.puntos_obtenidos for _, actividad in actividades_semana)
-        return puntos_semana
+        # Últimos 7 días, incluido hoy
+        desde = hoy_local() - timedelta(days=6)
+        return obtener_resumen_totales(nino_id, desde=desde)['puntos']
     except Exception as e:
         return 0
 
 @nino_bp.route('/api/medallas')
+@api_login_required
 def api_medallas():
     """API para obtener las medallas del niño"""
     try:
-        nino = PerfilNino.query.first()
+        nino = obtener_nino_actual()
         if nino:
             medallas = obtener_medallas_usuario(nino.id)
             return jsonify({
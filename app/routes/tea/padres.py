@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from flask import Blueprint, render_template, request, jsonify, session
+from flask import Blueprint, render_template, request, jsonify, session, Response, stream_with_context
 from app.extensions import db
 from app.models.tea_models import (
     PerfilNino, SesionTEA, ProgresoTEA, ActividadTEA, 
@@ -9,6 +9,17 @@ from app.services.permanent_progression import (
     configurar_nivel_inicial_nino, obtener_estadisticas_progresion_nino,
     obtener_ranking_niveles
 )
+from app.services.learner_state import invalidar_estado_aprendizaje
+from app.services.progress_timeseries import obtener_serie_progreso
+from app.services.daily_rollup import obtener_resumen_totales
+from app.services.report_export import ReportExportSystem, exportar_reporte
+from app.services.child_scope import ChildScopeSystem, obtener_nino_actual
+from .auth import api_padres_only
+from app.services.caseload import obtener_resumen_casos
+from app.services.streak_tracking import StreakTrackingSystem
+from app.utils.day_window import hoy_local
+from app.services.progressive_learning import generar_planes_grupo
+from app.services.activity_catalog import ActivityCatalogSystem, listar_actividades
 from datetime import datetime, timedelta
 import json
 
@@ -47,35 +58,28 @@ def dashboard():
                          dias_activos=5)
 
 @padres_bp.route('/api/progreso-semanal')
+@api_padres_only
 def api_progreso_semanal():
-    """API para gráfico de progreso semanal"""
-    nino = PerfilNino.query.first()
+    """API para gráfico de progreso (últimos 7 días por defecto; admite ?dias= y ?granularidad=dia|semana|mes)"""
+    nino = obtener_nino_actual()
     if not nino:
         return jsonify({'error': 'No hay perfil de niño'}), 404
     
-    # Últimos 7 días
-    datos_semana = []
-    for i in range(7):
-        fecha = datetime.now().date() - timedelta(days=i)
-        sesion = SesionTEA.query.filter(
-            db.func.date(SesionTEA.fecha) == fecha,
-            SesionTEA.nino_id == nino.id
-        ).first()
-        
-        datos_semana.append({
-            'fecha': fecha.strftime('%Y-%m-%d'),
-            'dia': fecha.strftime('%A'),
-            'actividades': sesion.actividades_completadas if sesion else 0,
-            'puntos': sesion.puntos_ganados if sesion else 0,
-            'duracion': sesion.duracion_minutos if sesion else 0
-        })
+    dias = request.args.get('dias', 7, type=int)
+    granularidad = request.args.get('granularidad', 'dia')
+    
+    try:
+        serie = obtener_serie_progreso(nino.id, dias, granularidad)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify(datos_semana[::-1])  # Ordenar cronológicamente
+    return jsonify(serie)
 
 @padres_bp.route('/api/estadisticas-habilidades')
+@api_padres_only
 def api_estadisticas_habilidades():
     """API para estadísticas por habilidades"""
-    nino = PerfilNino.query.first()
+    nino = obtener_nino_actual()
     if not nino:
         return jsonify({'error': 'No hay perfil de niño'}), 404
     
@@ -100,24 +104,25 @@ def api_estadisticas_habilidades():
 @padres_bp.route('/configuracion')
 def configuracion():
     """Página de configuración del niño"""
-    nino = PerfilNino.query.first()
+    nino = obtener_nino_actual()
     if not nino:
         return render_template('tea/error.html', 
                              mensaje="No hay perfil de niño configurado")
     
     # Obtener todas las actividades disponibles
-    actividades = ActividadTEA.query.filter_by(activa=True).all()
+    actividades = listar_actividades()
     
     return render_template('tea/configuracion_padres.html',
                          nino=nino,
                          actividades=actividades)
 
 @padres_bp.route('/api/actualizar-configuracion', methods=['POST'])
+@api_padres_only
 def api_actualizar_configuracion():
     """API para actualizar configuración del niño"""
     data = request.get_json()
     
-    nino = PerfilNino.query.first()
+    nino = obtener_nino_actual()
     if not nino:
         return jsonify({'error': 'No hay perfil de niño'}), 404
     
@@ -130,77 +135,55 @@ def api_actualizar_configuracion():
         nino.avatar_preferido = data['avatar_preferido']
     
     db.session.commit()
+    invalidar_estado_aprendizaje(nino.id)
     
     return jsonify({'mensaje': 'Configuración actualizada exitosamente'})
 
 @padres_bp.route('/reportes')
 def reportes():
     """Página de reportes detallados"""
-    nino = PerfilNino.query.first()
+    nino = obtener_nino_actual()
     if not nino:
         return render_template('tea/error.html', 
                              mensaje="No hay perfil de niño configurado")
     
     # Obtener datos para reportes
-    sesiones_totales = SesionTEA.query.filter_by(nino_id=nino.id).all()
+    resumen = obtener_resumen_totales(nino.id)
+    ultima_sesion = SesionTEA.query.filter_by(nino_id=nino.id).order_by(SesionTEA.fecha.desc()).first()
     progreso_total = ProgresoTEA.query.filter_by(nino_id=nino.id).all()
     
     return render_template('tea/reportes_padres.html',
                          nino=nino,
-                         sesiones_totales=sesiones_totales,
+                         resumen=resumen,
+                         ultima_sesion=ultima_sesion,
                          progreso_total=progreso_total)
 
 @padres_bp.route('/api/exportar-reporte')
+@api_padres_only
 def api_exportar_reporte():
-    """API para exportar reporte en formato JSON"""
-    nino = PerfilNino.query.first()
+    """API para exportar reporte (?formato=json|jsonl|csv, ?desde= y ?hasta= en AAAA-MM-DD)"""
+    nino = obtener_nino_actual()
     if not nino:
         return jsonify({'error': 'No hay perfil de niño'}), 404
     
-    # Generar reporte completo
-    reporte = {
-        'nino': {
-            'nombre': nino.nombre,
-            'edad': nino.edad,
-            'nivel_dificultad': nino.nivel_dificultad
-        },
-        'sesiones': [],
-        'progreso': [],
-        'logros': [],
-        'fecha_generacion': datetime.now().isoformat()
-    }
-    
-    # Datos de sesiones
-    sesiones = SesionTEA.query.filter_by(nino_id=nino.id).all()
-    for sesion in sesiones:
-        reporte['sesiones'].append({
-            'fecha': sesion.fecha.isoformat(),
-            'duracion_minutos': sesion.duracion_minutos,
-            'actividades_completadas': sesion.actividades_completadas,
-            'puntos_ganados': sesion.puntos_ganados,
-            'estado': sesion.estado
-        })
-    
-    # Datos de progreso
-    progreso = ProgresoTEA.query.filter_by(nino_id=nino.id).all()
-    for prog in progreso:
-        reporte['progreso'].append({
-            'habilidad': prog.habilidad,
-            'nivel_actual': prog.nivel_actual,
-            'puntos_totales': prog.puntos_totales,
-            'sesiones_completadas': prog.sesiones_completadas,
-            'racha_dias': prog.racha_dias
-        })
+    formato = request.args.get('formato', 'json')
+    try:
+        desde = datetime.strptime(request.args['desde'], '%Y-%m-%d').date() if request.args.get('desde') else None
+        hasta = datetime.strptime(request.args['hasta'], '%Y-%m-%d').date() if request.args.get('hasta') else None
+        generador = exportar_reporte(nino, formato, desde, hasta)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Datos de logros
-    logros = LogroNino.query.filter_by(nino_id=nino.id).all()
-    for logro in logros:
-        reporte['logros'].append({
-            'recompensa': logro.recompensa.nombre,
-            'fecha_obtenido': logro.fecha_obtenido.isoformat()
-        })
+    headers = {}
+    if formato != 'json':
+        nombre_archivo = f"reporte_{nino.id}_{datetime.now().strftime('%Y%m%d')}.{formato}"
+        headers['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
     
-    return jsonify(reporte)
+    return Response(
+        stream_with_context(generador),
+        mimetype=ReportExportSystem.FORMATOS[formato],
+        headers=headers
+    )
 
 @padres_bp.route('/configuracion-progresion')
 def configuracion_progresion():
@@ -208,12 +191,14 @@ def configuracion_progresion():
     return render_template('tea/configuracion_progresion.html')
 
 @padres_bp.route('/api/ninos')
+@api_padres_only
 def api_ninos():
     """API para obtener lista de niños"""
     try:
-        ninos = PerfilNino.query.filter_by(activo=True).all()
+        ninos = ChildScopeSystem.consulta_ninos_visibles().order_by(PerfilNino.nombre, PerfilNino.id).all()
         return jsonify({
             'success': True,
+            'nino_actual_id': session.get('nino_id'),
             'ninos': [{
                 'id': nino.id,
                 'nombre': nino.nombre,
@@ -226,10 +211,11 @@ def api_ninos():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @padres_bp.route('/api/nino/<int:nino_id>/progresion')
+@api_padres_only
 def api_nino_progresion(nino_id):
     """API para obtener información de progresión de un niño"""
     try:
-        nino = PerfilNino.query.get(nino_id)
+        nino = obtener_nino_actual(nino_id)
         if not nino:
             return jsonify({'success': False, 'message': 'Niño no encontrado'}), 404
         
@@ -240,12 +226,14 @@ def api_nino_progresion(nino_id):
             'nivel_actual': getattr(nino, 'nivel_progresion_actual', 'inicial'),
             'puntos_totales': getattr(nino, 'puntos_totales_acumulados', 0),
             'actividades_completadas': getattr(nino, 'actividades_completadas_total', 0),
-            'dias_consecutivos': getattr(nino, 'dias_consecutivos', 0)
+            # Una racha interrumpida ya no cuenta aunque la columna conserve su valor
+            'dias_consecutivos': StreakTrackingSystem.dias_consecutivos(nino, hoy_local())
         })
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @padres_bp.route('/api/configurar-nivel-inicial', methods=['POST'])
+@api_padres_only
 def api_configurar_nivel_inicial():
     """API para configurar el nivel inicial de un niño"""
     try:
@@ -256,34 +244,37 @@ def api_configurar_nivel_inicial():
         if not nino_id or not nivel_inicial:
             return jsonify({'success': False, 'message': 'Datos incompletos'}), 400
         
-        success = configurar_nivel_inicial_nino(nino_id, nivel_inicial)
+        nino = obtener_nino_actual(nino_id)
+        if not nino or nino.id != int(nino_id):
+            return jsonify({'success': False, 'message': 'Niño no encontrado'}), 404
+        
+        success = configurar_nivel_inicial_nino(nino.id, nivel_inicial)
         
         if success:
+            invalidar_estado_aprendizaje(nino.id)
             return jsonify({'success': True, 'message': 'Nivel inicial configurado correctamente'})
         else:
             return jsonify({'success': False, 'message': 'Error al configurar el nivel inicial'}), 500
-            
+    
     except ValueError as e:
         return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @padres_bp.route('/api/estadisticas-progresion')
+@api_padres_only
 def api_estadisticas_progresion():
     """API para obtener estadísticas generales de progresión"""
     try:
-        # Estadísticas generales
-        total_ninos = PerfilNino.query.filter_by(activo=True).count()
-        ninos_activos = PerfilNino.query.filter(
-            PerfilNino.activo == True,
-            PerfilNino.actividades_completadas_total > 0
-        ).count()
+        # Estadísticas generales de los niños visibles para el padre/terapeuta
+        ninos_visibles = ChildScopeSystem.consulta_ninos_visibles()
+        total_ninos = ninos_visibles.count()
         
         # Calcular nivel promedio
-        ninos_con_progreso = PerfilNino.query.filter(
-            PerfilNino.activo == True,
+        ninos_con_progreso = ninos_visibles.filter(
             PerfilNino.actividades_completadas_total > 0
         ).all()
+        ninos_activos = len(ninos_con_progreso)
         
         if ninos_con_progreso:
             niveles = [getattr(nino, 'nivel_progresion_actual', 'inicial') for nino in ninos_con_progreso]
@@ -305,10 +296,11 @@ def api_estadisticas_progresion():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @padres_bp.route('/api/ranking-niveles')
+@api_padres_only
 def api_ranking_niveles():
-    """API para obtener ranking de niveles"""
+    """API para obtener ranking de niveles de los niños del padre/terapeuta"""
     try:
-        ranking = obtener_ranking_niveles()
+        ranking = obtener_ranking_niveles(ChildScopeSystem.consulta_ninos_visibles())
         return jsonify({
             'success': True,
             'ranking': ranking
@@ -316,11 +308,82 @@ def api_ranking_niveles():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@padres_bp.route('/api/seleccionar-nino', methods=['POST'])
+@api_padres_only
+def api_seleccionar_nino():
+    """API para elegir el niño con el que trabajan las demás pantallas"""
+    data = request.get_json() or {}
+    nino = obtener_nino_actual(data.get('nino_id'))
+    if not nino:
+        return jsonify({'success': False, 'message': 'Niño no encontrado'}), 404
+    
+    session['nino_id'] = nino.id
+    return jsonify({'success': True, 'nino_id': nino.id, 'nombre': nino.nombre})
+
+@padres_bp.route('/api/caseload')
+@api_padres_only
+def api_caseload():
+    """API con el resumen de todos los niños del padre/terapeuta (?dias= para la ventana reciente)"""
+    try:
+        dias = request.args.get('dias', 7, type=int)
+        if not 1 <= dias <= 366:
+            return jsonify({'success': False, 'message': 'El rango debe estar entre 1 y 366 días'}), 400
+        
+        ninos = ChildScopeSystem.consulta_ninos_visibles().order_by(PerfilNino.nombre, PerfilNino.id).all()
+        resumen = obtener_resumen_casos(ninos, dias)
+        
+        return jsonify({
+            'success': True,
+            'total_ninos': len(resumen),
+            'dias': dias,
+            'ninos': resumen
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@padres_bp.route('/api/planes-sesion')
+@api_padres_only
+def api_planes_sesion():
+    """API con el plan de sesión de todos los niños del padre/terapeuta (?duracion= minutos)"""
+    try:
+        duracion = request.args.get('duracion', type=int)
+        if duracion is not None and not 1 <= duracion <= 240:
+            return jsonify({'success': False, 'message': 'La duración debe estar entre 1 y 240 minutos'}), 400
+        
+        ninos = ChildScopeSystem.consulta_ninos_visibles().order_by(PerfilNino.nombre, PerfilNino.id).all()
+        planes = generar_planes_grupo(ninos, duracion)
+        
+        return jsonify({
+            'success': True,
+            'total_ninos': len(ninos),
+            'planes': [{
+                'nino_id': nino.id,
+                'nombre': nino.nombre,
+                'tiempo_sesion_min': nino.tiempo_sesion_min,
+                'tiempo_total_estimado': planes[nino.id]['tiempo_total_estimado'],
+                'score_total': round(planes[nino.id]['score_total'], 2),
+                'actividades': [{
+                    'orden': item['orden'],
+                    'actividad_id': item['actividad'].id,
+                    'titulo': item['actividad'].titulo,
+                    'categoria': item['actividad'].categoria,
+                    'nivel_dificultad': item['actividad'].nivel_dificultad,
+                    'tiempo_estimado': item['tiempo_estimado'],
+                    'nivel_objetivo': item['nivel_objetivo'],
+                    'motivo_progresion': item['motivo_progresion'],
+                    'score_progresion': round(item['score_progresion'], 2)
+                } for item in planes[nino.id]['plan']]
+            } for nino in ninos]
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 @padres_bp.route('/api/estadisticas')
+@api_padres_only
 def api_estadisticas():
     """API para obtener estadísticas completas del dashboard"""
     try:
-        nino = PerfilNino.query.first()
+        nino = obtener_nino_actual()
         if not nino:
             return jsonify({
                 'success': False,
@@ -331,16 +394,16 @@ def api_estadisticas():
         from app.services.user_progress import UserProgressSystem
         estadisticas = UserProgressSystem.obtener_estadisticas_dashboard(nino.id)
         
-        # Calcular estadísticas adicionales
-        sesiones = SesionTEA.query.filter_by(nino_id=nino.id).all()
-        actividades_completadas = SesionActividad.query.filter_by(completada=True).count()
+        # Calcular estadísticas adicionales desde el resumen diario
+        resumen = obtener_resumen_totales(nino.id)
+        actividades_completadas = resumen['completadas']
         
-        # Calcular tiempo promedio de sesión
-        tiempo_total = sum(s.duracion_minutos for s in sesiones)
-        tiempo_promedio = tiempo_total / len(sesiones) if sesiones else 0
+        # Calcular tiempo promedio de sesión (una sesión por día activo)
+        tiempo_total = resumen['segundos'] / 60
+        tiempo_promedio = tiempo_total / resumen['dias_activos'] if resumen['dias_activos'] else 0
         
         # Calcular tasa de completación
-        total_actividades = ActividadTEA.query.count()
+        total_actividades = ActivityCatalogSystem.total()
         tasa_completacion = (actividades_completadas / total_actividades * 100) if total_actividades > 0 else 0
         
         return jsonify({
@@ -365,25 +428,28 @@ def api_estadisticas():
         })
 
 @padres_bp.route('/api/actividades')
+@api_padres_only
 def api_actividades():
     """API para obtener historial de actividades"""
     try:
-        nino = PerfilNino.query.first()
+        nino = obtener_nino_actual()
         if not nino:
             return jsonify({
                 'success': False,
                 'error': 'No hay perfil de niño configurado'
             })
         
-        # Obtener actividades completadas
-        actividades = db.session.query(SesionActividad, ActividadTEA).join(
-            ActividadTEA, SesionActividad.actividad_id == ActividadTEA.id
-        ).filter(
+        # Obtener actividades completadas del niño (títulos desde el catálogo)
+        sesiones_actividades = SesionActividad.query.join(SesionTEA).filter(
+            SesionTEA.nino_id == nino.id,
             SesionActividad.completada == True
         ).order_by(SesionActividad.fecha_completada.desc()).limit(50).all()
         
         actividades_data = []
-        for sesion_actividad, actividad in actividades:
+        for sesion_actividad in sesiones_actividades:
+            actividad = ActivityCatalogSystem.obtener(sesion_actividad.actividad_id)
+            if not actividad:
+                continue
             actividades_data.append({
                 'titulo': actividad.titulo,
                 'categoria': actividad.categoria,
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Catálogo de Actividades para TEA Edition
+Copia en memoria de ActividadTEA (por id, categoría y nivel) con el JSON de
+`contenido` ya decodificado. Se carga una vez por proceso y se recarga
+cuando cambia el contador de versión `actividades` en version_cache, que
+se incrementa automáticamente al guardar cambios en actividades.
+"""
+
+import threading
+import time
+from flask import abort, current_app
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session
+import config
+from app.extensions import db
+from app.models.tea_models import ActividadTEA, VersionCache
+from app.models.activity_content import decodificar_contenido
+
+class ActividadCatalogo:
+    """Copia de solo lectura de una actividad, desligada de la sesión"""
+    
+    COLUMNAS = (
+        'id', 'titulo', 'descripcion', 'tipo', 'nivel_dificultad', 'categoria',
+        'contenido', 'imagen_url', 'audio_url', 'puntos_recompensa',
+        'tiempo_estimado', 'activa', 'creado_en'
+    )
+    
+    def __init__(self, fila):
+        for columna in self.COLUMNAS:
+            setattr(self, columna, getattr(fila, columna))
+        # Contenido tipado (ContenidoActividad); None si no cumple su esquema
+        self.datos = None
+        self.error_contenido = None
+        try:
+            self.datos = decodificar_contenido(fila.tipo, fila.contenido)
+        except ValueError as e:
+            self.error_contenido = str(e)
+    
+    def __repr__(self):
+        return f'<ActividadCatalogo {self.id}: {self.titulo}>'
+
+class ActivityCatalogSystem:
+    """Catálogo de actividades en memoria con invalidación por versión"""
+    
+    NOMBRE_VERSION = 'actividades'
+    
+    _lock = threading.Lock()
+    _actividades = None
+    _por_categoria = {}
+    _version = None
+    _verificado_en = 0.0
+    _cargas = 0
+    _invalidas = []
+    # Índices derivados: {nombre: (diccionario de actividades del que salen, índice)}
+    _derivados = {}
+    
+    @classmethod
+    def obtener(cls, actividad_id):
+        """Actividad por id (activa o no) o None"""
+        return cls._vigentes().get(actividad_id)
+    
+    @classmethod
+    def listar(cls, categoria=None, nivel_dificultad=None, solo_activas=True):
+        """Actividades ordenadas por id, filtradas por categoría y nivel"""
+        actividades = cls._vigentes()
+        if categoria is not None:
+            actividades = cls._por_categoria.get(categoria, [])
+        else:
+            actividades = list(actividades.values())
+        
+        return [
+            actividad for actividad in actividades
+            if (not solo_activas or actividad.activa)
+            and (nivel_dificultad is None or actividad.nivel_dificultad == nivel_dificultad)
+        ]
+    
+    @classmethod
+    def categorias(cls):
+        """Categorías presentes en el catálogo"""
+        cls._vigentes()
+        return sorted(cls._por_categoria)
+    
+    @classmethod
+    def total(cls, solo_activas=False):
+        """Cantidad de actividades del catálogo"""
+        if solo_activas:
+            return len(cls.listar())
+        return len(cls._vigentes())
+    
+    @classmethod
+    def derivado(cls, nombre, construir):
+        """
+        Índice derivado del catálogo vigente: `construir(actividades)` se
+        llama una vez por carga del catálogo y el resultado se comparte entre
+        peticiones hasta que el catálogo cambie de versión
+        """
+        actividades = cls._vigentes()
+        guardado = cls._derivados.get(nombre)
+        if guardado is None or guardado[0] is not actividades:
+            guardado = (actividades, construir(list(actividades.values())))
+            cls._derivados[nombre] = guardado
+        return guardado[1]
+    
+    @classmethod
+    def version_vigente(cls):
+        """Versión del catálogo cargado en este proceso (verificándola si toca)"""
+        cls._vigentes()
+        return cls._version
+    
+    @classmethod
+    def version_actual(cls):
+        """Versión del catálogo guardada en la base"""
+        version = db.session.query(VersionCache.version).filter_by(
+            nombre=cls.NOMBRE_VERSION
+        ).scalar()
+        return version or 0
+    
+    @classmethod
+    def incrementar_version(cls, conexion=None):
+        """
+        Marca el catálogo como modificado para todos los procesos. Se llama
+        sola al guardar actividades; los scripts que usen actualizaciones
+        masivas (query.update) deben llamarla explícitamente.
+        """
+        conexion = conexion or db.session.connection()
+        resultado = conexion.execute(
+            update(VersionCache).where(
+                VersionCache.nombre == cls.NOMBRE_VERSION
+            ).values(version=VersionCache.version + 1)
+        )
+        if not resultado.rowcount:
+            conexion.execute(insert(VersionCache).values(nombre=cls.NOMBRE_VERSION, version=1))
+    
+    @classmethod
+    def invalidar(cls):
+        """Descarta la copia local; la próxima lectura recarga el catálogo"""
+        cls._actividades = None
+    
+    @classmethod
+    def estadisticas(cls):
+        """Estado del catálogo en este proceso"""
+        return {
+            'version': cls._version,
+            'actividades': len(cls._actividades or {}),
+            'categorias': len(cls._por_categoria),
+            'cargas': cls._cargas,
+            'indices_derivados': sorted(cls._derivados),
+            'contenido_invalido': list(cls._invalidas)
+        }
+    
+    @classmethod
+    def _vigentes(cls):
+        """Diccionario {id: actividad}, recargado si cambió la versión"""
+        if cls._actividades is not None and not cls._toca_verificar():
+            return cls._actividades
+        
+        with cls._lock:
+            if cls._actividades is None or cls._toca_verificar():
+                version = cls.version_actual()
+                if cls._actividades is None or version != cls._version:
+                    cls._cargar(version)
+                cls._verificado_en = time.monotonic()
+            return cls._actividades
+    
+    @classmethod
+    def _toca_verificar(cls):
+        return time.monotonic() - cls._verificado_en >= config.ACTIVITY_CATALOG_CHECK_SECONDS
+    
+    @classmethod
+    def _cargar(cls, version):
+        """Lee todas las actividades en una consulta y arma los índices"""
+        # Columnas en lugar de entidades: no depende del identity map de la sesión
+        filas = db.session.query(
+            *[getattr(ActividadTEA, columna) for columna in ActividadCatalogo.COLUMNAS]
+        ).order_by(ActividadTEA.id).all()
+        actividades = {fila.id: ActividadCatalogo(fila) for fila in filas}
+        
+        # Filas guardadas antes de validar el contenido: se sirven sin `datos` y se reportan
+        invalidas = [actividad.id for actividad in actividades.values() if actividad.error_contenido]
+        for actividad_id in invalidas:
+            current_app.logger.warning(
+                f"Actividad {actividad_id} con contenido inválido: {actividades[actividad_id].error_contenido}"
+            )
+        
+        por_categoria = {}
+        for actividad in actividades.values():
+            por_categoria.setdefault(actividad.categoria, []).append(actividad)
+        
+        cls._por_categoria = por_categoria
+        cls._actividades = actividades
+        cls._version = version
+        cls._invalidas = invalidas
+        cls._derivados = {}
+        cls._cargas += 1
+
+@event.listens_for(Session, 'after_flush')
+def _registrar_cambios_catalogo(session, contexto):
+    """Incrementa la versión en la misma transacción que modifica actividades"""
+    modificadas = any(
+        isinstance(objeto, ActividadTEA)
+        for objeto in list(session.new) + list(session.deleted)
+    ) or any(
+        isinstance(objeto, ActividadTEA) and session.is_modified(objeto)
+        for objeto in session.dirty
+    )
+    
+    if modificadas and not session.info.get('catalogo_modificado'):
+        ActivityCatalogSystem.incrementar_version(session.connection())
+        session.info['catalogo_modificado'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_tras_commit(session):
+    if session.info.pop('catalogo_modificado', False):
+        ActivityCatalogSystem.invalidar()
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_tras_rollback(session):
+    session.info.pop('catalogo_modificado', None)
+
+# Funciones de utilidad para las rutas
+def obtener_actividad(actividad_id):
+    """Obtiene una actividad del catálogo"""
+    return ActivityCatalogSystem.obtener(actividad_id)
+
+def obtener_actividad_o_404(actividad_id):
+    """Obtiene una actividad del catálogo o responde 404"""
+    actividad = ActivityCatalogSystem.obtener(actividad_id)
+    if actividad is None:
+        abort(404)
+    return actividad
+
+def listar_actividades(categoria=None, nivel_dificultad=None, solo_activas=True):
+    """Lista actividades del catálogo"""
+    return ActivityCatalogSystem.listar(categoria, nivel_dificultad, solo_activas)
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Sistema de Finalización de Actividades para TEA Edition
+Registra todo lo que ocurre cuando un niño termina una actividad
+en una única transacción y con un número acotado de consultas
+"""
+
+from datetime import datetime
+from app.extensions import db
+from app.models.tea_models import (
+    PerfilNino, SesionTEA, SesionActividad,
+    ProgresoTEA
+)
+from app.services.permanent_progression import PermanentProgressionSystem
+from app.services.user_progress import UserProgressSystem
+from app.services.progressive_learning import ProgressiveLearningSystem
+from app.services.reward_unlocking import RewardUnlockingSystem
+from app.services.daily_rollup import DailyRollupSystem
+from app.services.learner_state import LearnerStateSystem
+from app.services.streak_tracking import StreakTrackingSystem
+from app.utils.day_window import en_dia, dia_local, hoy_local
+
+class ActivityCompletionSystem:
+    """Unidad de trabajo "el niño terminó una actividad" """
+    
+    @classmethod
+    def completar_actividad(cls, nino_id, actividad, tiempo_dedicado=0, exito=None):
+        """
+        Registra la actividad completada: sesión del día, sesión-actividad,
+        contadores del perfil, ProgresoUsuario, ProgresoTEA, medallas y
+        recompensas. Todo se confirma con un solo commit; ante cualquier
+        error se revierte completo. `exito` (True/False) decide si cuenta
+        como exitosa; con None decide el umbral de puntos.
+        """
+        try:
+            # Bloquear el perfil serializa las finalizaciones del mismo niño
+            perfil = PerfilNino.query.filter_by(id=nino_id).with_for_update().first()
+            if not perfil:
+                raise ValueError("Perfil de niño no encontrado")
+            
+            puntos = actividad.puntos_recompensa
+            ahora = datetime.utcnow()
+            
+            exitosa = PermanentProgressionSystem.es_exitosa(puntos, actividad.puntos_recompensa, exito)
+            
+            sesion = cls._obtener_o_crear_sesion_hoy(perfil.id)
+            cls._registrar_sesion_actividad(sesion, actividad, puntos, tiempo_dedicado, exitosa, ahora)
+            
+            # Actualizar sesión
+            sesion.actividades_completadas += 1
+            sesion.puntos_ganados += puntos
+            sesion.duracion_minutos += tiempo_dedicado // 60
+            
+            # Progresión permanente del perfil
+            PermanentProgressionSystem.registrar_actividad(
+                perfil, puntos, exitosa, actividad.puntos_recompensa
+            )
+            
+            # Progreso real por categoría y medallas (precargados en dos consultas)
+            progresos = {
+                progreso.categoria: progreso
+                for progreso in UserProgressSystem.consulta_progresos(perfil.id).all()
+            }
+            medallas = UserProgressSystem.obtener_medallas_existentes(perfil.id)
+            medallas_previas = len(medallas)
+            UserProgressSystem.registrar_actividad(perfil.id, actividad, puntos, progresos, medallas)
+            
+            # Resumen diario para reportes
+            DailyRollupSystem.registrar_actividad(
+                perfil.id, actividad.categoria, puntos, tiempo_dedicado, exitosa, dia_local(ahora)
+            )
+            
+            # Mantener compatibilidad con sistema anterior
+            progreso = cls._actualizar_progreso_tea(perfil, actividad, puntos, ahora)
+            
+            # Analizar si necesita ajustar el nivel de dificultad progresivo
+            sistema_progresivo = ProgressiveLearningSystem(perfil.id)
+            nivel_actualizado = sistema_progresivo.aplicar_nivel_progresion(
+                actividad.categoria, progreso
+            )
+            
+            recompensas = RewardUnlockingSystem.desbloquear_recompensas(
+                perfil.id, progreso.puntos_totales, sesion.id
+            )
+            
+            # La instantánea se arma antes del commit, con los objetos aún cargados
+            version, estado = LearnerStateSystem.construir_tras_actividad(
+                perfil.id, progresos, len(medallas) - medallas_previas,
+                StreakTrackingSystem.dias_consecutivos(perfil)
+            )
+            
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        LearnerStateSystem.guardar(nino_id, estado, version)
+        
+        return {
+            'sesion': sesion,
+            'puntos_ganados': puntos,
+            'nivel_actualizado': nivel_actualizado,
+            'recompensas_desbloqueadas': recompensas
+        }
+    
+    @classmethod
+    def obtener_sesion_hoy(cls, nino_id):
+        """
+        Sesión del día local del niño. Filtra por un rango de marcas de tiempo
+        para usar el índice (nino_id, fecha) de sesiones_tea.
+        """
+        return SesionTEA.query.filter(
+            SesionTEA.nino_id == nino_id,
+            en_dia(SesionTEA.fecha, hoy_local())
+        ).order_by(SesionTEA.fecha).first()
+    
+    @classmethod
+    def _obtener_o_crear_sesion_hoy(cls, nino_id):
+        """Obtiene la sesión de hoy o la crea dentro de la transacción actual"""
+        sesion = cls.obtener_sesion_hoy(nino_id)
+        
+        if not sesion:
+            sesion = SesionTEA(
+                nino_id=nino_id,
+                estado='iniciada',
+                duracion_minutos=0,
+                actividades_completadas=0,
+                puntos_ganados=0
+            )
+            db.session.add(sesion)
+            db.session.flush()
+        
+        return sesion
+    
+    @classmethod
+    def consulta_sesion_actividad(cls, sesion_id, actividad_id):
+        """Consulta (sin ejecutar) de la SesionActividad de una actividad en una sesión"""
+        return SesionActividad.query.filter_by(
+            sesion_id=sesion_id,
+            actividad_id=actividad_id
+        )
+    
+    @classmethod
+    def _registrar_sesion_actividad(cls, sesion, actividad, puntos, tiempo_dedicado, exitosa, ahora):
+        """Crea o actualiza la SesionActividad de esta actividad en la sesión.
+        
+        El resultado de cada intento se guarda en ``exitos`` para que los
+        agregados (tasas de éxito, reconstrucción del resumen diario) lean
+        el mismo valor que usaron los contadores en vivo.
+        """
+        sesion_actividad = cls.consulta_sesion_actividad(sesion.id, actividad.id).first()
+        
+        if not sesion_actividad:
+            sesion_actividad = SesionActividad(
+                sesion_id=sesion.id,
+                actividad_id=actividad.id,
+                orden=1,
+                completada=True,
+                intentos=1,
+                exitos=1 if exitosa else 0,
+                tiempo_dedicado=tiempo_dedicado,
+                puntos_obtenidos=puntos,
+                fecha_completada=ahora
+            )
+            db.session.add(sesion_actividad)
+        else:
+            sesion_actividad.intentos += 1
+            if exitosa:
+                sesion_actividad.exitos = (sesion_actividad.exitos or 0) + 1
+            sesion_actividad.tiempo_dedicado = (sesion_actividad.tiempo_dedicado or 0) + (tiempo_dedicado or 0)
+            sesion_actividad.completada = True
+            sesion_actividad.puntos_obtenidos = puntos
+            sesion_actividad.fecha_completada = ahora
+        
+        return sesion_actividad
+    
+    @classmethod
+    def _actualizar_progreso_tea(cls, perfil, actividad, puntos, ahora):
+        """Actualiza (o crea) el ProgresoTEA de la habilidad de la actividad"""
+        progreso = ProgresoTEA.query.filter_by(
+            nino_id=perfil.id,
+            habilidad=actividad.categoria
+        ).first()
+        
+        if progreso:
+            progreso.puntos_totales += puntos
+            progreso.sesiones_completadas += 1
+            progreso.racha_dias = 1  # Simplificado para demo
+            progreso.ultima_actualizacion = ahora
+        else:
+            progreso = ProgresoTEA(
+                nino_id=perfil.id,
+                habilidad=actividad.categoria,
+                nivel_actual=perfil.nivel_dificultad,
+                puntos_totales=puntos,
+                sesiones_completadas=1,
+                racha_dias=1,
+                ultima_actualizacion=ahora
+            )
+            db.session.add(progreso)
+        
+        return progreso
+
+# Funciones de utilidad para las rutas
+def obtener_sesion_hoy(nino_id):
+    """Obtiene la sesión del día local de un niño, si existe"""
+    return ActivityCompletionSystem.obtener_sesion_hoy(nino_id)
+
+def completar_actividad(nino_id, actividad, tiempo_dedicado=0, exito=None):
+    """Registra una actividad completada en una única transacción"""
+    return ActivityCompletionSystem.completar_actividad(
+        nino_id, actividad, tiempo_dedicado, exito
+    )
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Historial Agregado de Actividades para TEA Edition
+Carga con una sola consulta agrupada los intentos, éxitos, tiempo, puntos
+y última vez de cada actividad de un niño, para que los motores de
+recomendación puntúen todas las actividades sin consultar una por una
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import Float, and_, case, cast, func
+from app.extensions import db
+from app.models.tea_models import SesionActividad, SesionTEA
+
+class ActivityHistory:
+    """Agregados por actividad del historial de un niño"""
+    
+    VENTANA_VACIA = {
+        'intentos': 0,
+        'exitos': 0,
+        'tiempo_total': 0,
+        'puntos_totales': 0,
+        'primera_fecha': None,
+        'ultima_fecha': None
+    }
+    
+    def __init__(self, nino_id, ventanas=(7, 14), cargar=True):
+        self.nino_id = nino_id
+        self.ahora = datetime.utcnow()
+        self.ventanas = tuple(sorted(set(ventanas)))
+        self.ultimas_veces = {}
+        self.agregados = {dias: {} for dias in self.ventanas}
+        if cargar:
+            self._cargar()
+    
+    @classmethod
+    def cargar_grupo(cls, nino_ids, ventanas=(7, 14)):
+        """
+        Historiales de varios niños con una sola consulta agrupada por niño
+        y actividad. Devuelve {nino_id: ActivityHistory}.
+        """
+        historiales = {nino_id: cls(nino_id, ventanas, cargar=False) for nino_id in nino_ids}
+        if not historiales:
+            return historiales
+        
+        # Misma referencia temporal para todas las ventanas del grupo
+        referencia = next(iter(historiales.values()))
+        for historial in historiales.values():
+            historial.ahora = referencia.ahora
+        
+        filas = db.session.query(SesionTEA.nino_id, *referencia._columnas()).join(
+            SesionTEA, SesionActividad.sesion_id == SesionTEA.id
+        ).filter(
+            SesionTEA.nino_id.in_(list(historiales))
+        ).group_by(SesionTEA.nino_id, SesionActividad.actividad_id).all()
+        
+        for fila in filas:
+            historiales[fila[0]]._agregar(fila[1:])
+        return historiales
+    
+    def _columnas(self):
+        """Columnas agregadas: actividad, última vez y seis por cada ventana"""
+        columnas = [
+            SesionActividad.actividad_id,
+            func.max(SesionActividad.fecha_completada)
+        ]
+        # tiempo_dedicado y exitos suman todos los intentos del renglón: se usa el promedio por intento
+        intentos_renglon = func.coalesce(func.nullif(SesionActividad.intentos, 0), 1)
+        tiempo_por_intento = cast(SesionActividad.tiempo_dedicado, Float) / intentos_renglon
+        exito_por_intento = cast(func.coalesce(SesionActividad.exitos, 0), Float) / intentos_renglon
+        for dias in self.ventanas:
+            en_ventana = SesionTEA.fecha >= self.ahora - timedelta(days=dias)
+            columnas.extend([
+                func.sum(case((en_ventana, 1), else_=0)),
+                func.sum(case((and_(en_ventana, SesionActividad.completada == True), exito_por_intento), else_=0)),
+                func.sum(case((en_ventana, tiempo_por_intento), else_=0)),
+                func.sum(case((en_ventana, SesionActividad.puntos_obtenidos), else_=0)),
+                func.min(case((en_ventana, SesionTEA.fecha))),
+                func.max(case((en_ventana, SesionTEA.fecha)))
+            ])
+        return columnas
+        
+    def _cargar(self):
+        """Ejecuta la única consulta agrupada por actividad"""
+        filas = db.session.query(*self._columnas()).join(
+            SesionTEA, SesionActividad.sesion_id == SesionTEA.id
+        ).filter(
+            SesionTEA.nino_id == self.nino_id
+        ).group_by(SesionActividad.actividad_id).all()
+        
+        for fila in filas:
+            self._agregar(fila)
+    
+    def _agregar(self, fila):
+        """Incorpora la fila agregada de una actividad"""
+        actividad_id, ultima_vez = fila[0], fila[1]
+        self.ultimas_veces[actividad_id] = ultima_vez
+        
+        for indice, dias in enumerate(self.ventanas):
+            intentos, exitos, tiempo, puntos, primera, ultima = fila[2 + indice * 6:8 + indice * 6]
+            if intentos:
+                self.agregados[dias][actividad_id] = {
+                    'intentos': intentos,
+                    'exitos': exitos or 0,
+                    'tiempo_total': tiempo or 0,
+                    'puntos_totales': puntos or 0,
+                    'primera_fecha': primera,
+                    'ultima_fecha': ultima
+                }
+    
+    def ventana(self, actividad_id, dias):
+        """Agregados de una actividad dentro de la ventana de `dias` días"""
+        return self.agregados[dias].get(actividad_id, self.VENTANA_VACIA)
+    
+    def ultima_vez(self, actividad_id):
+        """Última fecha en que el niño completó la actividad (sin límite de ventana)"""
+        return self.ultimas_veces.get(actividad_id)
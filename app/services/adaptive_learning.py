@@ -7,20 +7,45 @@ from app.extensions import db
 from app.models.tea_models import (
     PerfilNino, ActividadTEA, SesionActividad, ProgresoTEA, SesionTEA
 )
+from app.services.activity_history import ActivityHistory
+from app.services.activity_catalog import ActivityCatalogSystem
+from app.services.session_planner import SessionPlannerSystem
+from app.services.trend_analysis import TrendAnalysisSystem
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from functools import partial
 import json
 import math
+import multiprocessing
+import config
+
+# Progreso de una habilidad sin objetos ORM, para puntuar en otros procesos
+ProgresoHabilidad = namedtuple('ProgresoHabilidad', 'nivel_actual puntos_totales')
+
+# Catálogo de cada proceso del pool (se recibe una vez en el inicializador)
+_actividades_proceso = None
 
 class AdaptiveLearningSystem:
     """Sistema de aprendizaje adaptativo que ajusta la dificultad según el progreso"""
     
-    def __init__(self, nino_id):
+    # Mapear niveles de dificultad
+    NIVELES_DIFICULTAD = {'basico': 1, 'intermedio': 2, 'avanzado': 3}
+    
+    def __init__(self, nino_id, nino=None):
         self.nino_id = nino_id
-        self.nino = PerfilNino.query.get(nino_id)
+        self._nino = nino
+    
+    @property
+    def nino(self):
+        """Perfil del niño, cargado solo si se usa"""
+        if self._nino is None:
+            self._nino = PerfilNino.query.get(self.nino_id)
+        return self._nino
     
     def analizar_rendimiento_actividad(self, actividad_id, ultimos_dias=7):
         """Analiza el rendimiento del niño en una actividad específica"""
-        fecha_limite = datetime.now() - timedelta(days=ultimos_dias)
+        fecha_limite = datetime.utcnow() - timedelta(days=ultimos_dias)
         
         # Obtener intentos recientes de esta actividad
         intentos = SesionActividad.query.join(SesionTEA).filter(
@@ -29,7 +54,16 @@ class AdaptiveLearningSystem:
             SesionTEA.fecha >= fecha_limite
         ).all()
         
-        if not intentos:
+        intentos_totales = len(intentos)
+        return self._calcular_rendimiento(
+            intentos_totales,
+            sum((i.exitos or 0) / (i.intentos or 1) for i in intentos),
+            sum((i.tiempo_dedicado or 0) / (i.intentos or 1) for i in intentos)
+        )
+    
+    def _calcular_rendimiento(self, intentos_totales, intentos_exitosos, tiempo_total):
+        """Calcula el rendimiento a partir de los agregados de intentos"""
+        if not intentos_totales:
             return {
                 'rendimiento': 0.5,  # Neutral si no hay datos
                 'intentos_totales': 0,
@@ -38,9 +72,7 @@ class AdaptiveLearningSystem:
             }
         
         # Calcular métricas
-        intentos_totales = len(intentos)
-        intentos_exitosos = sum(1 for i in intentos if i.completada)
-        tiempo_promedio = sum(i.tiempo_dedicado for i in intentos) / intentos_totales
+        tiempo_promedio = tiempo_total / intentos_totales
         tasa_exito = intentos_exitosos / intentos_totales
         
         # Calcular rendimiento general (0-1, donde 1 es excelente)
@@ -55,14 +87,26 @@ class AdaptiveLearningSystem:
     
     def analizar_progreso_habilidad(self, categoria, ultimos_dias=14):
         """Analiza el progreso general en una habilidad específica"""
-        fecha_limite = datetime.now() - timedelta(days=ultimos_dias)
-        
         # Obtener progreso de la habilidad
         progreso = ProgresoTEA.query.filter_by(
             nino_id=self.nino_id,
             habilidad=categoria
         ).first()
         
+        if not progreso:
+            return self._resumir_progreso(None)
+        
+        tendencia = TrendAnalysisSystem.analizar_nino(self.nino_id).get(
+            categoria, TrendAnalysisSystem.SIN_DATOS
+        )
+        return self._resumir_progreso(progreso, tendencia['tendencia'])
+        
+    def _resumir_progreso(self, progreso, tendencia='estable'):
+        """
+        Resume el progreso de una habilidad. La tendencia viene de
+        TrendAnalysisSystem (pendiente del rendimiento reciente), la misma
+        que usa el motor progresivo.
+        """
         if not progreso:
             return {
                 'nivel_actual': 'basico',
@@ -71,30 +115,6 @@ class AdaptiveLearningSystem:
                 'confianza': 0.3
             }
         
-        # Obtener actividades recientes de esta categoría
-        actividades_recientes = SesionActividad.query.join(SesionTEA).join(ActividadTEA).filter(
-            SesionActividad.sesion.has(nino_id=self.nino_id),
-            ActividadTEA.categoria == categoria,
-            SesionTEA.fecha >= fecha_limite
-        ).all()
-        
-        # Calcular tendencia
-        if len(actividades_recientes) >= 3:
-            rendimientos = []
-            for actividad in actividades_recientes:
-                rendimiento = self.analizar_rendimiento_actividad(actividad.actividad_id, ultimos_dias)
-                rendimientos.append(rendimiento['rendimiento'])
-            
-            # Calcular tendencia
-            if len(rendimientos) >= 2:
-                tendencia = 'mejorando' if rendimientos[-1] > rendimientos[0] else 'estable'
-                if rendimientos[-1] < rendimientos[0] * 0.8:
-                    tendencia = 'dificultad'
-            else:
-                tendencia = 'estable'
-        else:
-            tendencia = 'estable'
-        
         # Calcular nivel de confianza
         confianza = min(progreso.puntos_totales / 100, 1.0)
         
@@ -107,13 +127,12 @@ class AdaptiveLearningSystem:
     
     def calcular_dificultad_optima(self, categoria):
         """Calcula la dificultad óptima para una categoría basada en el progreso"""
-        progreso = self.analizar_progreso_habilidad(categoria)
-        
-        # Mapear niveles de dificultad
-        niveles = {'basico': 1, 'intermedio': 2, 'avanzado': 3}
-        
+        return self._dificultad_para_progreso(self.analizar_progreso_habilidad(categoria))
+    
+    def _dificultad_para_progreso(self, progreso):
+        """Calcula la dificultad óptima a partir del resumen de progreso"""
         # Ajustar dificultad basada en tendencia y confianza
-        nivel_base = niveles.get(progreso['nivel_actual'], 1)
+        nivel_base = self.NIVELES_DIFICULTAD.get(progreso['nivel_actual'], 1)
         
         if progreso['tendencia'] == 'mejorando' and progreso['confianza'] > 0.7:
             # Si está mejorando y tiene confianza, puede subir de nivel
@@ -128,44 +147,68 @@ class AdaptiveLearningSystem:
         return nivel_optimo
     
     def recomendar_actividades(self, limite=5, incluir_refuerzo=True):
-        """Recomienda actividades basadas en el análisis adaptativo"""
+        """
+        Recomienda actividades basadas en el análisis adaptativo.
+        Puntúa todas las actividades en una sola pasada a partir del
+        historial agregado del niño (número fijo de consultas).
+        """
+        historial = ActivityHistory(self.nino_id, ventanas=(7, 14))
+        actividades = ActivityCatalogSystem.listar(solo_activas=False)
+        progresos = {
+            progreso.habilidad: progreso
+            for progreso in ProgresoTEA.query.filter_by(nino_id=self.nino_id).all()
+        }
+        
+        tendencias = TrendAnalysisSystem.analizar_nino(self.nino_id, historial.ahora)
+    
+        return self.puntuar_actividades(
+            actividades, historial, progresos, tendencias, limite, incluir_refuerzo
+        )
+    
+    def puntuar_actividades(self, actividades, historial, progresos, tendencias,
+                            limite=5, incluir_refuerzo=True):
+        """
+        Puntuación de recomendaciones sin consultas: recibe el catálogo, el
+        ActivityHistory del niño (ventanas de 7 y 14 días), sus progresos y
+        sus tendencias por categoría, así que puede ejecutarse en otro proceso
+        """
         recomendaciones = []
         
-        # Obtener todas las categorías disponibles
-        categorias = db.session.query(ActividadTEA.categoria).distinct().all()
-        categorias = [cat[0] for cat in categorias]
+        # Agrupar el catálogo por categoría
+        por_categoria = {}
+        for actividad in actividades:
+            por_categoria.setdefault(actividad.categoria, []).append(actividad)
         
-        for categoria in categorias:
+        for categoria, actividades_categoria in por_categoria.items():
             # Analizar progreso en esta categoría
-            progreso = self.analizar_progreso_habilidad(categoria)
-            dificultad_optima = self.calcular_dificultad_optima(categoria)
-            
-            # Obtener actividades de la dificultad óptima
-            actividades = ActividadTEA.query.filter_by(
-                categoria=categoria,
-                activa=True
-            ).all()
+            progreso = self._resumir_progreso(
+                progresos.get(categoria),
+                tendencias.get(categoria, TrendAnalysisSystem.SIN_DATOS)['tendencia']
+            )
+            dificultad_optima = self._dificultad_para_progreso(progreso)
             
             # Filtrar por dificultad óptima
-            actividades_optimas = []
-            for actividad in actividades:
-                nivel_actividad = {'basico': 1, 'intermedio': 2, 'avanzado': 3}.get(
-                    actividad.nivel_dificultad, 1
-                )
-                if nivel_actividad == dificultad_optima:
-                    actividades_optimas.append(actividad)
+            activas = [a for a in actividades_categoria if a.activa]
+            actividades_optimas = [
+                a for a in activas
+                if self.NIVELES_DIFICULTAD.get(a.nivel_dificultad, 1) == dificultad_optima
+            ]
             
             # Si no hay actividades de la dificultad óptima, usar las más cercanas
             if not actividades_optimas:
-                actividades_optimas = actividades
+                actividades_optimas = activas
             
             # Analizar rendimiento de cada actividad
             for actividad in actividades_optimas:
-                rendimiento = self.analizar_rendimiento_actividad(actividad.id)
+                ventana = historial.ventana(actividad.id, 7)
+                rendimiento = self._calcular_rendimiento(
+                    ventana['intentos'], ventana['exitos'], ventana['tiempo_total']
+                )
                 
                 # Calcular score de recomendación
                 score = self._calcular_score_recomendacion(
-                    actividad, progreso, rendimiento, incluir_refuerzo
+                    actividad, progreso, rendimiento, incluir_refuerzo,
+                    historial=historial, nivel_optimo=dificultad_optima
                 )
                 
                 recomendaciones.append({
@@ -181,23 +224,82 @@ class AdaptiveLearningSystem:
         recomendaciones.sort(key=lambda x: x['score'], reverse=True)
         return recomendaciones[:limite]
     
-    def _calcular_score_recomendacion(self, actividad, progreso, rendimiento, incluir_refuerzo):
+    @classmethod
+    def recomendar_grupo(cls, nino_ids, limite=5, incluir_refuerzo=True, procesos=None, tamano_lote=None):
+        """
+        Recomendaciones de muchos niños (analítica de cohortes, procesos
+        nocturnos). El historial, los progresos y las tendencias de todos se
+        leen con una consulta cada uno y la puntuación, Python puro, se reparte por lotes
+        entre procesos. Devuelve {nino_id: recomendaciones}.
+        """
+        procesos = procesos or config.ADAPTIVE_BULK_PROCESOS
+        tamano_lote = tamano_lote or config.ADAPTIVE_BULK_LOTE
+        nino_ids = list(dict.fromkeys(nino_ids))
+        if not nino_ids:
+            return {}
+        
+        historiales = ActivityHistory.cargar_grupo(nino_ids, ventanas=(7, 14))
+        progresos = {}
+        for progreso in ProgresoTEA.query.filter(ProgresoTEA.nino_id.in_(nino_ids)).order_by(ProgresoTEA.id):
+            progresos.setdefault(progreso.nino_id, {})[progreso.habilidad] = ProgresoHabilidad(
+                progreso.nivel_actual, progreso.puntos_totales
+            )
+        tendencias = TrendAnalysisSystem.analizar_grupo(
+            nino_ids, next(iter(historiales.values())).ahora
+        )
+        actividades = ActivityCatalogSystem.listar(solo_activas=False)
+        
+        lotes = [
+            [
+                (nino_id, historiales[nino_id], progresos.get(nino_id, {}), tendencias.get(nino_id, {}))
+                for nino_id in nino_ids[i:i + tamano_lote]
+            ]
+            for i in range(0, len(nino_ids), tamano_lote)
+        ]
+        puntuar = partial(_puntuar_lote, limite=limite, incluir_refuerzo=incluir_refuerzo)
+        
+        resultados = {}
+        if procesos <= 1 or len(lotes) <= 1:
+            for lote in lotes:
+                resultados.update(puntuar(lote, actividades=actividades))
+        else:
+            # El catálogo viaja una vez por proceso; los lotes solo llevan historial y progresos
+            with ProcessPoolExecutor(
+                max_workers=min(procesos, len(lotes)),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_iniciar_proceso,
+                initargs=(actividades,)
+            ) as pool:
+                for parcial in pool.map(puntuar, lotes):
+                    resultados.update(parcial)
+        
+        # Los procesos devuelven ids de actividad: se vuelven a enlazar con el catálogo
+        por_id = {actividad.id: actividad for actividad in actividades}
+        for recomendaciones in resultados.values():
+            for recomendacion in recomendaciones:
+                recomendacion['actividad'] = por_id[recomendacion['actividad']]
+        return resultados
+    
+    def _calcular_score_recomendacion(self, actividad, progreso, rendimiento, incluir_refuerzo,
+                                      historial=None, nivel_optimo=None):
         """Calcula un score para la recomendación de una actividad"""
         score = 0
         
         # Factor 1: Diversidad (evitar repetir la misma actividad muy seguido)
-        ultima_vez = self._obtener_ultima_vez_actividad(actividad.id)
+        if historial is not None:
+            ultima_vez = historial.ultima_vez(actividad.id)
+        else:
+            ultima_vez = self._obtener_ultima_vez_actividad(actividad.id)
         if ultima_vez:
-            dias_desde_ultima = (datetime.now() - ultima_vez).days
+            dias_desde_ultima = (datetime.utcnow() - ultima_vez).days
             score += min(dias_desde_ultima / 3, 1) * 0.3  # Bonus por diversidad
         else:
             score += 0.3  # Bonus por actividad nueva
         
         # Factor 2: Balance de dificultad
-        nivel_actividad = {'basico': 1, 'intermedio': 2, 'avanzado': 3}.get(
-            actividad.nivel_dificultad, 1
-        )
-        nivel_optimo = self.calcular_dificultad_optima(actividad.categoria)
+        nivel_actividad = self.NIVELES_DIFICULTAD.get(actividad.nivel_dificultad, 1)
+        if nivel_optimo is None:
+            nivel_optimo = self.calcular_dificultad_optima(actividad.categoria)
         diferencia_dificultad = abs(nivel_actividad - nivel_optimo)
         score += (1 - diferencia_dificultad / 2) * 0.4
         
@@ -231,31 +333,30 @@ class AdaptiveLearningSystem:
         
         return ultima_sesion.fecha_completada if ultima_sesion else None
     
-    def generar_plan_sesion(self, duracion_objetivo=15):
-        """Genera un plan de sesión adaptativo basado en el tiempo objetivo"""
-        recomendaciones = self.recomendar_actividades(limite=10, incluir_refuerzo=True)
+    def generar_plan_sesion(self, duracion_objetivo=None):
+        """
+        Genera un plan de sesión adaptativo: las recomendaciones de mayor
+        score que caben en `duracion_objetivo` minutos (por defecto, el
+        tiempo de sesión del niño)
+        """
+        if duracion_objetivo is None:
+            duracion_objetivo = (self.nino.tiempo_sesion_min if self.nino else None) or 15
         
-        plan = []
-        tiempo_total = 0
+        recomendaciones = self.recomendar_actividades(limite=None, incluir_refuerzo=True)
         
-        for rec in recomendaciones:
+        plan = []
+        for rec in SessionPlannerSystem.optimizar(recomendaciones, duracion_objetivo):
             actividad = rec['actividad']
-            tiempo_estimado = actividad.tiempo_estimado
-            
-            if tiempo_total + tiempo_estimado <= duracion_objetivo:
-                plan.append({
-                    'actividad': actividad,
-                    'orden': len(plan) + 1,
-                    'tiempo_estimado': tiempo_estimado,
-                    'motivo': self._generar_motivo_recomendacion(rec)
-                })
-                tiempo_total += tiempo_estimado
-            else:
-                break
+            plan.append({
+                'actividad': actividad,
+                'orden': len(plan) + 1,
+                'tiempo_estimado': actividad.tiempo_estimado,
+                'motivo': self._generar_motivo_recomendacion(rec)
+            })
         
         return {
             'plan': plan,
-            'tiempo_total_estimado': tiempo_total,
+            'tiempo_total_estimado': sum(item['tiempo_estimado'] or 0 for item in plan),
             'actividades_incluidas': len(plan),
             'fecha_generacion': datetime.now()
         }
@@ -274,12 +375,35 @@ class AdaptiveLearningSystem:
         else:
             return "Actividad perfecta para tu nivel actual"
 
+def _iniciar_proceso(actividades):
+    """Inicializador del pool: guarda el catálogo en el proceso"""
+    global _actividades_proceso
+    _actividades_proceso = actividades
+
+def _puntuar_lote(lote, limite, incluir_refuerzo, actividades=None):
+    """Recomendaciones de un lote de (nino_id, historial, progresos, tendencias), con ids de actividad"""
+    actividades = actividades if actividades is not None else _actividades_proceso
+    
+    resultados = {}
+    for nino_id, historial, progresos, tendencias in lote:
+        recomendaciones = AdaptiveLearningSystem(nino_id).puntuar_actividades(
+            actividades, historial, progresos, tendencias, limite, incluir_refuerzo
+        )
+        for recomendacion in recomendaciones:
+            recomendacion['actividad'] = recomendacion['actividad'].id
+        resultados[nino_id] = recomendaciones
+    return resultados
+
 def obtener_actividades_adaptativas(nino_id, limite=5):
     """Función helper para obtener actividades adaptativas"""
     sistema = AdaptiveLearningSystem(nino_id)
     return sistema.recomendar_actividades(limite=limite)
 
-def generar_plan_sesion_adaptativo(nino_id, duracion=15):
+def generar_plan_sesion_adaptativo(nino_id, duracion=None):
     """Función helper para generar plan de sesión adaptativo"""
     sistema = AdaptiveLearningSystem(nino_id)
     return sistema.generar_plan_sesion(duracion)
+
+def obtener_recomendaciones_grupo(nino_ids, limite=5):
+    """Función helper para obtener recomendaciones adaptativas de muchos niños"""
+    return AdaptiveLearningSystem.recomendar_grupo(nino_ids, limite=limite)
\ No newline at end of file
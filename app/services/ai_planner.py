@@ -12,7 +12,14 @@ LOCAL_TZ = os.environ.get("LOCAL_TZ", "America/Panama")
 
 class AIPlanner:
     def __init__(self):
-        self.provider = get_provider()
+        self._provider = None
+
+    @property
+    def provider(self):
+        """Proveedor de IA, creado en el primer uso y no al construir el planner."""
+        if self._provider is None:
+            self._provider = get_provider()
+        return self._provider
 
     def suggest(self, goals_raw: str, horizonte: str, restricciones: dict, agenda: list):
         """
@@ -6,12 +6,15 @@ Maneja las interacciones del avatar virtual con el niño
 
 from datetime import datetime
 from app.extensions import db
-from app.models.tea_models import PerfilNino
+from app.models.tea_models import PerfilNino, Avatar
 from app.services.user_progress import UserProgressSystem
 
 class AvatarSystem:
     """Sistema de Avatar IA para guiar al niño"""
     
+    # Avatar que se muestra cuando el niño no eligió ninguno
+    AVATAR_POR_DEFECTO = 'Spider-Man'
+    
     # Frases contextuales del avatar
     FRASES_CONTEXTUALES = {
         'saludo': [
@@ -258,6 +261,11 @@ class AvatarSystem:
         
         return animaciones.get(estado_emocional, animaciones['motivador'])
 
+    @classmethod
+    def obtener_avatar_por_defecto(cls):
+        """Avatar que se muestra cuando el niño no eligió ninguno"""
+        return Avatar.query.filter_by(nombre=cls.AVATAR_POR_DEFECTO).first()
+
 # Funciones de utilidad para las rutas
 def obtener_frase_avatar(contexto, nino_id=None):
     """Obtiene una frase del avatar para un contexto específico"""
@@ -271,6 +279,9 @@ def obtener_recomendacion_actividad(nino_id):
     """Obtiene una recomendación de actividad del avatar"""
     return AvatarSystem.obtener_recomendacion_actividad(nino_id)
 
+def obtener_avatar_por_defecto():
+    """Obtiene el avatar por defecto"""
+    return AvatarSystem.obtener_avatar_por_defecto()
 
 
 
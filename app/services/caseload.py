@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Carga de Casos para TEA Edition
+Resumen de todos los niños de un padre/terapeuta con un número fijo de
+consultas: una para los perfiles y una agrupada por niño para cada métrica,
+sin importar cuántos niños haya
+"""
+
+from datetime import timedelta
+from sqlalchemy import func
+from app.extensions import db
+from app.models.tea_models import ResumenDiario, MedallaUsuario, LogroNino
+from app.services.permanent_progression import PermanentProgressionSystem
+from app.services.streak_tracking import StreakTrackingSystem
+from app.utils.day_window import hoy_local
+
+class CaseloadSystem:
+    """Estadísticas resumidas de un grupo de niños"""
+    
+    @classmethod
+    def obtener_resumen(cls, ninos, dias=7):
+        """
+        Devuelve una fila por niño con su progreso permanente, racha, tasa de
+        éxito, actividad de los últimos `dias` días, medallas y logros.
+        `ninos` son perfiles ya cargados.
+        """
+        ids = [nino.id for nino in ninos]
+        if not ids:
+            return []
+        
+        hoy = hoy_local()
+        recientes = cls._actividad_reciente(ids, hoy - timedelta(days=dias - 1))
+        medallas = cls._contar_por_nino(MedallaUsuario, ids)
+        logros = cls._contar_por_nino(LogroNino, ids)
+        
+        resumen = []
+        for nino in ninos:
+            reciente = recientes.get(nino.id, {})
+            resumen.append({
+                'nino_id': nino.id,
+                'nombre': nino.nombre,
+                'edad': nino.edad,
+                'nivel_actual': nino.nivel_progresion_actual,
+                'puntos_totales': nino.puntos_totales_acumulados or 0,
+                'actividades_completadas': nino.actividades_completadas_total or 0,
+                'tasa_exito': round(PermanentProgressionSystem.tasa_exito_perfil(nino), 1),
+                'dias_consecutivos': StreakTrackingSystem.dias_consecutivos(nino, hoy),
+                'fecha_ultima_actividad': nino.fecha_ultima_actividad.isoformat() if nino.fecha_ultima_actividad else None,
+                'actividades_recientes': reciente.get('completadas', 0),
+                'puntos_recientes': reciente.get('puntos', 0),
+                'minutos_recientes': reciente.get('segundos', 0) // 60,
+                'dias_activos_recientes': reciente.get('dias_activos', 0),
+                'medallas': medallas.get(nino.id, 0),
+                'logros': logros.get(nino.id, 0)
+            })
+        
+        return resumen
+    
+    @classmethod
+    def _actividad_reciente(cls, ids, desde):
+        """Totales del resumen diario desde `desde`, agrupados por niño"""
+        filas = db.session.query(
+            ResumenDiario.nino_id,
+            func.sum(ResumenDiario.completadas),
+            func.sum(ResumenDiario.puntos),
+            func.sum(ResumenDiario.segundos),
+            func.count(func.distinct(ResumenDiario.fecha))
+        ).filter(
+            ResumenDiario.nino_id.in_(ids),
+            ResumenDiario.fecha >= desde
+        ).group_by(ResumenDiario.nino_id).all()
+        
+        return {
+            nino_id: {
+                'completadas': completadas or 0,
+                'puntos': puntos or 0,
+                'segundos': segundos or 0,
+                'dias_activos': dias_activos
+            }
+            for nino_id, completadas, puntos, segundos, dias_activos in filas
+        }
+    
+    @classmethod
+    def _contar_por_nino(cls, modelo, ids):
+        """Cantidad de filas de `modelo` por niño con una consulta agrupada"""
+        filas = db.session.query(
+            modelo.nino_id,
+            func.count(modelo.id)
+        ).filter(modelo.nino_id.in_(ids)).group_by(modelo.nino_id).all()
+        
+        return dict(filas)
+
+# Funciones de utilidad para las rutas
+def obtener_resumen_casos(ninos, dias=7):
+    """Obtiene el resumen de carga de casos de un grupo de niños"""
+    return CaseloadSystem.obtener_resumen(ninos, dias)
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Alcance de Niños para TEA Edition
+Resuelve qué perfil de niño atiende cada petición según la sesión
+(niño, padre/terapeuta) en lugar de tomar siempre el primer perfil, y
+carga una vez por petición su avatar y su configuración activa
+"""
+
+from flask import g, request, session
+from sqlalchemy import and_, false
+from sqlalchemy.orm import joinedload
+import config
+from app.models.tea_models import PerfilNino, UsuarioNino, Avatar, AvatarUsuario, ConfiguracionUsuario
+from app.services.avatar_system import AvatarSystem
+
+class ContextoNino:
+    """Niño de la petición con su avatar y su configuración activa"""
+    
+    def __init__(self, nino=None, avatar_usuario=None, avatar=None, configuracion=None):
+        self.nino = nino
+        self.avatar_usuario = avatar_usuario
+        self.avatar_seleccionado = avatar
+        self.configuracion = configuracion
+        self._avatar_por_defecto = None
+    
+    @property
+    def avatar(self):
+        """Avatar elegido por el niño o, si no eligió ninguno, el avatar por defecto"""
+        if self.avatar_seleccionado is not None:
+            return self.avatar_seleccionado
+        
+        if self._avatar_por_defecto is None:
+            self._avatar_por_defecto = AvatarSystem.obtener_avatar_por_defecto()
+        return self._avatar_por_defecto
+    
+    @property
+    def version_configuracion(self):
+        """Identifica la configuración activa: id y fecha de su última modificación"""
+        if self.configuracion is None:
+            return None
+        
+        actualizada = self.configuracion.fecha_actualizacion
+        return f'{self.configuracion.id}:{actualizada.isoformat() if actualizada else ""}'
+
+class ChildScopeSystem:
+    """Resolución del niño actual y de los niños de un padre/terapeuta"""
+    
+    @classmethod
+    def ninos_del_padre(cls, padre_id):
+        """Perfiles activos asignados a un padre/terapeuta"""
+        return PerfilNino.query.filter_by(
+            padre_id=padre_id,
+            activo=True
+        ).order_by(PerfilNino.nombre, PerfilNino.id).all()
+    
+    @classmethod
+    def sesion_reconocida(cls):
+        """Hay un padre/terapeuta o un niño en sesión"""
+        return session.get('user_id') is not None and session.get('user_type') in ('padre', 'nino')
+    
+    @classmethod
+    def acceso_permitido(cls):
+        """La petición puede resolver niños: hay sesión o la instalación es un kiosco (KIOSK_MODE)"""
+        return cls.sesion_reconocida() or config.KIOSK_MODE
+    
+    @classmethod
+    def consulta_ninos_visibles(cls):
+        """
+        Consulta de los perfiles que la sesión actual puede ver: los niños
+        asignados a un padre/terapeuta (aunque no tenga ninguno) o el propio
+        perfil de un niño. Sin sesión no se ve ninguno, salvo en una
+        instalación de kiosco (KIOSK_MODE), que ve todos los perfiles.
+        """
+        consulta = PerfilNino.query.filter_by(activo=True)
+        
+        if cls.sesion_reconocida():
+            if session['user_type'] == 'padre':
+                return consulta.filter_by(padre_id=session['user_id'])
+            return consulta.join(
+                UsuarioNino, UsuarioNino.perfil_nino_id == PerfilNino.id
+            ).filter(UsuarioNino.id == session['user_id'])
+        
+        if config.KIOSK_MODE:
+            return consulta
+        return consulta.filter(false())
+    
+    @classmethod
+    def consulta_nino(cls, nino_id=None):
+        """
+        Consulta (sin ejecutar) del PerfilNino de la petición:
+        - sesión de niño: su propio perfil (con `nino_id`, solo si es el suyo)
+        - `nino_id` explícito: ese perfil si es visible para la sesión
+        - en otro caso: el primer perfil visible
+        """
+        if session.get('user_type') == 'nino':
+            consulta = PerfilNino.query.join(
+                UsuarioNino, UsuarioNino.perfil_nino_id == PerfilNino.id
+            ).filter(UsuarioNino.id == session.get('user_id'))
+            if nino_id is not None:
+                consulta = consulta.filter(PerfilNino.id == nino_id)
+            return consulta
+        
+        consulta = cls.consulta_ninos_visibles()
+        if nino_id is not None:
+            return consulta.filter(PerfilNino.id == nino_id)
+        
+        return consulta.order_by(PerfilNino.id)
+    
+    @classmethod
+    def contexto_actual(cls, nino_id=None):
+        """
+        Contexto (niño, avatar y configuración) de la petición. Se carga con
+        una sola consulta la primera vez que se pide y queda en flask.g para
+        el resto de la petición. Sin `nino_id` se usa ?nino_id= o el niño
+        elegido en sesión.
+        """
+        if nino_id is None and session.get('user_type') != 'nino':
+            nino_id = request.args.get('nino_id', type=int) or session.get('nino_id')
+        
+        contextos = g.setdefault('contextos_nino', {})
+        if nino_id not in contextos:
+            contextos[nino_id] = cls._cargar_contexto(nino_id)
+        return contextos[nino_id]
+    
+    @classmethod
+    def resolver_nino(cls, nino_id=None):
+        """Devuelve el PerfilNino de la petición (ver consulta_nino)"""
+        return cls.contexto_actual(nino_id).nino
+    
+    @classmethod
+    def avatar_de_sesion(cls):
+        """AvatarUsuario activo del usuario en sesión (niño o padre), con su Avatar"""
+        if 'avatar_sesion' not in g:
+            g.avatar_sesion = AvatarUsuario.query.options(
+                joinedload(AvatarUsuario.avatar)
+            ).filter_by(
+                usuario_id=session.get('user_id'),
+                tipo_usuario='nino' if session.get('user_type') == 'nino' else 'padre',
+                activo=True
+            ).first()
+        return g.avatar_sesion
+    
+    @classmethod
+    def _cargar_contexto(cls, nino_id):
+        """Niño, avatar activo y configuración activa en una consulta con outer joins"""
+        fila = cls.consulta_nino(nino_id).outerjoin(
+            AvatarUsuario, and_(
+                AvatarUsuario.usuario_id == PerfilNino.id,
+                AvatarUsuario.tipo_usuario == 'nino',
+                AvatarUsuario.activo == True
+            )
+        ).outerjoin(
+            Avatar, Avatar.id == AvatarUsuario.avatar_id
+        ).outerjoin(
+            ConfiguracionUsuario, and_(
+                ConfiguracionUsuario.nino_id == PerfilNino.id,
+                ConfiguracionUsuario.activa == True
+            )
+        ).add_entity(AvatarUsuario).add_entity(Avatar).add_entity(ConfiguracionUsuario).first()
+        
+        if fila is None:
+            return ContextoNino()
+        return ContextoNino(*fila)
+
+# Funciones de utilidad para las rutas
+def obtener_nino_actual(nino_id=None):
+    """Obtiene el perfil del niño de la petición actual"""
+    return ChildScopeSystem.resolver_nino(nino_id)
+
+def obtener_contexto_nino(nino_id=None):
+    """Obtiene el niño de la petición con su avatar y configuración"""
+    return ChildScopeSystem.contexto_actual(nino_id)
+
+def obtener_avatar_sesion():
+    """Obtiene el AvatarUsuario activo del usuario en sesión"""
+    return ChildScopeSystem.avatar_de_sesion()
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Resumen Diario para TEA Edition
+Totales por niño, día y categoría (completadas, intentos, puntos, segundos
+y éxitos) mantenidos por el camino de finalización de actividades, para que
+los reportes lean una tabla pequeña en lugar de recorrer todo el historial
+"""
+
+from datetime import date
+from sqlalchemy import case, func, insert
+from app.extensions import db
+from app.models.tea_models import ActividadTEA, SesionTEA, SesionActividad, ResumenDiario
+from app.utils.day_window import dia_local_sql, hoy_local
+
+class DailyRollupSystem:
+    """Mantenimiento y lectura de la tabla resumen_diario"""
+    
+    METRICAS = ('completadas', 'intentos', 'puntos', 'segundos', 'exitos')
+    
+    @classmethod
+    def registrar_actividad(cls, nino_id, categoria, puntos, segundos, exito, fecha=None):
+        """Suma una actividad completada al resumen del día sin confirmar la transacción"""
+        fecha = fecha or hoy_local()
+        
+        resumen = ResumenDiario.query.filter_by(
+            nino_id=nino_id,
+            fecha=fecha,
+            categoria=categoria
+        ).first()
+        
+        if not resumen:
+            resumen = ResumenDiario(
+                nino_id=nino_id,
+                fecha=fecha,
+                categoria=categoria,
+                completadas=0,
+                intentos=0,
+                puntos=0,
+                segundos=0,
+                exitos=0
+            )
+            db.session.add(resumen)
+        
+        resumen.completadas += 1
+        resumen.intentos += 1
+        resumen.puntos += puntos
+        resumen.segundos += segundos or 0
+        if exito:
+            resumen.exitos += 1
+        
+        return resumen
+    
+    @classmethod
+    def obtener_totales(cls, nino_id, desde=None, hasta=None):
+        """Totales del niño en el rango [desde, hasta] más el número de días activos"""
+        fila = cls._filtrar(db.session.query(
+            func.coalesce(func.sum(ResumenDiario.completadas), 0),
+            func.coalesce(func.sum(ResumenDiario.intentos), 0),
+            func.coalesce(func.sum(ResumenDiario.puntos), 0),
+            func.coalesce(func.sum(ResumenDiario.segundos), 0),
+            func.coalesce(func.sum(ResumenDiario.exitos), 0),
+            func.count(func.distinct(ResumenDiario.fecha))
+        ), nino_id, desde, hasta).one()
+        
+        totales = dict(zip(cls.METRICAS, fila[:5]))
+        totales['dias_activos'] = fila[5]
+        return totales
+    
+    @classmethod
+    def totales_por_dia(cls, nino_id, desde=None, hasta=None):
+        """Totales por día (todas las categorías sumadas): {fecha: {metrica: valor}}"""
+        filas = cls._filtrar(db.session.query(
+            ResumenDiario.fecha,
+            *[func.sum(getattr(ResumenDiario, metrica)) for metrica in cls.METRICAS]
+        ), nino_id, desde, hasta).group_by(ResumenDiario.fecha).all()
+        
+        return {
+            cls._como_fecha(fila[0]): {
+                metrica: valor or 0 for metrica, valor in zip(cls.METRICAS, fila[1:])
+            }
+            for fila in filas
+        }
+    
+    @classmethod
+    def totales_por_categoria(cls, nino_id, desde=None, hasta=None):
+        """Totales por categoría en el rango: {categoria: {metrica: valor}}"""
+        filas = cls._filtrar(db.session.query(
+            ResumenDiario.categoria,
+            *[func.sum(getattr(ResumenDiario, metrica)) for metrica in cls.METRICAS]
+        ), nino_id, desde, hasta).group_by(ResumenDiario.categoria).all()
+        
+        return {
+            fila[0]: {metrica: valor or 0 for metrica, valor in zip(cls.METRICAS, fila[1:])}
+            for fila in filas
+        }
+    
+    @classmethod
+    def reconstruir(cls, nino_id=None):
+        """
+        Recalcula el resumen desde sesion_actividades (de un niño o de todos)
+        con un INSERT ... SELECT agrupado. El historial guarda un renglón por
+        sesión y actividad, así que las repeticiones del mismo día se cuentan
+        con `intentos`, los puntos del último intento y el tiempo acumulado.
+        Los éxitos salen de `exitos`, el resultado guardado de cada intento.
+        """
+        borrado = ResumenDiario.query
+        if nino_id is not None:
+            borrado = borrado.filter_by(nino_id=nino_id)
+        
+        borrado.delete(synchronize_session=False)
+        resultado = db.session.execute(
+            insert(ResumenDiario).from_select(
+                ['nino_id', 'fecha', 'categoria', *cls.METRICAS],
+                cls._consulta_historial(nino_id).subquery().select()
+            )
+        )
+        return resultado.rowcount
+    
+    @classmethod
+    def verificar(cls, nino_id=None):
+        """
+        Compara resumen_diario con lo que daría reconstruir() sin modificar
+        nada. Devuelve las diferencias como tuplas (nino_id, fecha,
+        categoria, metrica, valor_resumen, valor_historial).
+        """
+        def indexar(filas):
+            return {
+                (fila[0], cls._como_fecha(fila[1]), fila[2]): [valor or 0 for valor in fila[3:]]
+                for fila in filas
+            }
+        
+        resumen = db.session.query(
+            ResumenDiario.nino_id, ResumenDiario.fecha, ResumenDiario.categoria,
+            *[getattr(ResumenDiario, metrica) for metrica in cls.METRICAS]
+        )
+        if nino_id is not None:
+            resumen = resumen.filter(ResumenDiario.nino_id == nino_id)
+        
+        actuales = indexar(resumen.all())
+        esperados = indexar(cls._consulta_historial(nino_id).all())
+        
+        diferencias = []
+        vacio = [0] * len(cls.METRICAS)
+        for clave in sorted(set(actuales) | set(esperados), key=str):
+            for metrica, actual, esperado in zip(
+                cls.METRICAS, actuales.get(clave, vacio), esperados.get(clave, vacio)
+            ):
+                if actual != esperado:
+                    diferencias.append((*clave, metrica, actual, esperado))
+        return diferencias
+    
+    @classmethod
+    def _consulta_historial(cls, nino_id=None):
+        """Totales por niño, día y categoría calculados desde sesion_actividades"""
+        fecha = dia_local_sql(
+            func.coalesce(SesionActividad.fecha_completada, SesionTEA.fecha),
+            db.engine.dialect.name
+        )
+        completada = SesionActividad.completada == True
+        
+        consulta = db.session.query(
+            SesionTEA.nino_id,
+            fecha,
+            ActividadTEA.categoria,
+            func.sum(case((completada, SesionActividad.intentos), else_=0)),
+            func.sum(SesionActividad.intentos),
+            func.sum(case((completada, SesionActividad.puntos_obtenidos * SesionActividad.intentos), else_=0)),
+            func.sum(SesionActividad.tiempo_dedicado),
+            func.sum(case((completada, func.coalesce(SesionActividad.exitos, 0)), else_=0))
+        ).join(
+            SesionTEA, SesionActividad.sesion_id == SesionTEA.id
+        ).join(
+            ActividadTEA, SesionActividad.actividad_id == ActividadTEA.id
+        )
+        
+        if nino_id is not None:
+            consulta = consulta.filter(SesionTEA.nino_id == nino_id)
+        
+        return consulta.group_by(SesionTEA.nino_id, fecha, ActividadTEA.categoria)
+    
+    @classmethod
+    def _filtrar(cls, consulta, nino_id, desde, hasta):
+        """Aplica el niño y el rango de fechas a una consulta sobre resumen_diario"""
+        consulta = consulta.filter(ResumenDiario.nino_id == nino_id)
+        if desde:
+            consulta = consulta.filter(ResumenDiario.fecha >= desde)
+        if hasta:
+            consulta = consulta.filter(ResumenDiario.fecha <= hasta)
+        return consulta
+    
+    @classmethod
+    def _como_fecha(cls, valor):
+        """Normaliza las fechas que algunos motores devuelven como texto"""
+        if isinstance(valor, str):
+            return date.fromisoformat(valor)
+        return valor
+
+# Funciones de utilidad para las rutas
+def obtener_resumen_totales(nino_id, desde=None, hasta=None):
+    """Obtiene los totales del resumen diario de un niño"""
+    return DailyRollupSystem.obtener_totales(nino_id, desde, hasta)
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Estado de Aprendizaje del Niño para TEA Edition
+Instantánea por niño (progreso por categoría, puntos, nivel, medallas y
+días consecutivos) servida desde una caché en memoria. El camino de
+finalización de actividades la actualiza (write-through) y los cambios
+de configuración la invalidan. Cada niño tiene un contador en version_cache
+que se incrementa en esas escrituras: un proceso descarta su copia cuando
+el contador ya no coincide, aunque la escritura la haya hecho otro worker.
+"""
+
+from sqlalchemy import insert, update
+import config
+from app.extensions import db
+from app.models.tea_models import VersionCache
+from app.utils.cache import TTLCache
+from app.services.user_progress import UserProgressSystem
+
+class LearnerStateSystem:
+    """Caché de instantáneas del estado de aprendizaje por niño"""
+    
+    # Entradas (versión, instantánea)
+    _cache = TTLCache(
+        capacidad=config.LEARNER_STATE_CACHE_SIZE,
+        ttl_segundos=config.LEARNER_STATE_TTL
+    )
+    
+    @classmethod
+    def obtener_estado(cls, nino_id):
+        """
+        Devuelve la instantánea del niño, calculándola si no está en caché o
+        si otro proceso la modificó (una consulta por clave primaria)
+        """
+        # La versión se lee antes de calcular: si cambia entre medias, la
+        # próxima lectura detecta la diferencia y vuelve a calcular
+        version = cls.version_actual(nino_id)
+        entrada = cls._cache.obtener(nino_id)
+        if entrada is None or entrada[0] != version:
+            entrada = (version, UserProgressSystem.calcular_estadisticas_dashboard(nino_id))
+            cls._cache.guardar(nino_id, entrada)
+        return entrada[1]
+    
+    @classmethod
+    def version_actual(cls, nino_id):
+        """Versión del estado del niño guardada en la base"""
+        version = db.session.query(VersionCache.version).filter_by(
+            nombre=cls._nombre_version(nino_id)
+        ).scalar()
+        return version or 0
+    
+    @classmethod
+    def incrementar_version(cls, nino_id):
+        """
+        Marca el estado del niño como modificado para todos los procesos, en
+        la transacción en curso. Devuelve la nueva versión.
+        """
+        nombre = cls._nombre_version(nino_id)
+        conexion = db.session.connection()
+        resultado = conexion.execute(
+            update(VersionCache).where(
+                VersionCache.nombre == nombre
+            ).values(version=VersionCache.version + 1)
+        )
+        if not resultado.rowcount:
+            conexion.execute(insert(VersionCache).values(nombre=nombre, version=1))
+        return cls.version_actual(nino_id)
+    
+    @classmethod
+    def obtener_progreso_categoria(cls, nino_id, categoria):
+        """Progreso de una categoría tomado de la instantánea"""
+        progreso = cls.obtener_estado(nino_id)['progreso_por_categoria'].get(categoria)
+        if progreso is None:
+            # Categorías fuera del catálogo estándar no forman parte de la instantánea
+            progreso = UserProgressSystem.obtener_progreso_categoria(nino_id, categoria)
+        return progreso
+    
+    @classmethod
+    def construir_tras_actividad(cls, nino_id, progresos, medallas_nuevas, dias_consecutivos):
+        """
+        Construye la nueva instantánea a partir de los ProgresoUsuario ya
+        modificados en memoria e incrementa la versión del niño en la misma
+        transacción. Debe llamarse antes del commit (después los objetos
+        quedan expirados). Devuelve (versión, instantánea); la instantánea es
+        None si no había una previa vigente en este proceso: en ese caso la
+        próxima lectura la calcula desde la base.
+        """
+        anterior = cls._cache.obtener(nino_id)
+        vigente = anterior is not None and anterior[0] == cls.version_actual(nino_id)
+        version = cls.incrementar_version(nino_id)
+        if not vigente:
+            return version, None
+        
+        # Sin todas las categorías estándar en memoria no se puede construir
+        if any(categoria not in progresos for categoria in UserProgressSystem.ACTIVIDADES_POR_CATEGORIA):
+            return version, None
+        
+        progreso_completo = UserProgressSystem._construir_progreso_completo(progresos)
+        return version, UserProgressSystem._construir_estadisticas(
+            progreso_completo,
+            anterior[1]['medallas_obtenidas'] + medallas_nuevas,
+            dias_consecutivos
+        )
+    
+    @classmethod
+    def guardar(cls, nino_id, estado, version):
+        """Guarda la instantánea ya confirmada; sin instantánea invalida la entrada"""
+        if estado is None:
+            cls._cache.invalidar(nino_id)
+        else:
+            cls._cache.guardar(nino_id, (version, estado))
+    
+    @classmethod
+    def invalidar(cls, nino_id):
+        """
+        Descarta la instantánea de un niño en todos los procesos (por ejemplo,
+        al cambiar su configuración). Se llama después de confirmar el cambio
+        y confirma el incremento de versión.
+        """
+        cls._cache.invalidar(nino_id)
+        cls.incrementar_version(nino_id)
+        db.session.commit()
+    
+    @classmethod
+    def _nombre_version(cls, nino_id):
+        return f'estado_nino:{nino_id}'
+    
+    @classmethod
+    def estadisticas_cache(cls):
+        """Tamaño y tasa de aciertos de la caché"""
+        return cls._cache.estadisticas()
+
+# Funciones de utilidad para las rutas
+def obtener_estado_aprendizaje(nino_id):
+    """Obtiene la instantánea del estado de aprendizaje de un niño"""
+    return LearnerStateSystem.obtener_estado(nino_id)
+
+def invalidar_estado_aprendizaje(nino_id):
+    """Invalida la instantánea del estado de aprendizaje de un niño"""
+    LearnerStateSystem.invalidar(nino_id)
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Caché de Páginas del Niño para TEA Edition
+HTML ya renderizado de las páginas de actividad y de categoría. La clave
+es (página, actividad o categoría, avatar, versión de configuración,
+versión del catálogo), tomada del contexto de la petición: elegir otro
+avatar, guardar la configuración o editar actividades produce una clave
+nueva en todos los procesos, sin invalidación explícita.
+"""
+
+import config
+from app.utils.cache import TTLCache
+from app.services.activity_catalog import ActivityCatalogSystem
+
+class PageCacheSystem:
+    """Caché del HTML de las páginas de actividades por avatar y configuración"""
+    
+    _paginas = TTLCache(
+        capacidad=config.PAGE_CACHE_SIZE,
+        ttl_segundos=config.PAGE_CACHE_TTL
+    )
+    
+    @classmethod
+    def renderizar(cls, pagina, clave, contexto, generar):
+        """
+        Devuelve el HTML de la página para el ContextoNino de la petición.
+        `generar(avatar_actual)` solo se llama si la combinación (página,
+        clave, avatar, configuración, catálogo) no está en caché.
+        """
+        if not config.PAGE_CACHE_ENABLED:
+            return generar(contexto.avatar)
+        
+        avatar = contexto.avatar_seleccionado
+        llave = (
+            pagina, clave, avatar.id if avatar else None,
+            contexto.version_configuracion,
+            ActivityCatalogSystem.version_vigente()
+        )
+        
+        html = cls._paginas.obtener(llave)
+        if html is None:
+            html = generar(contexto.avatar)
+            cls._paginas.guardar(llave, html)
+        return html
+    
+    @classmethod
+    def limpiar(cls):
+        """Descarta todas las páginas"""
+        cls._paginas.limpiar()
+    
+    @classmethod
+    def estadisticas_cache(cls):
+        """Tamaño y tasa de aciertos de la caché"""
+        return cls._paginas.estadisticas()
+
+# Funciones de utilidad para las rutas
+def renderizar_pagina_nino(pagina, clave, contexto, generar):
+    """Obtiene el HTML de una página de actividades desde la caché"""
+    return PageCacheSystem.renderizar(pagina, clave, contexto, generar)
@@ -5,12 +5,14 @@ Como un videojuego, nunca retrocede, siempre avanza
 """
 
 from datetime import datetime, timedelta
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, desc, func
 from app.extensions import db
 from app.models.tea_models import (
     PerfilNino, ActividadTEA, SesionTEA, SesionActividad, 
     ProgresoTEA, RecompensaTEA, LogroNino
 )
+from app.services.streak_tracking import StreakTrackingSystem
+from app.services.activity_catalog import ActivityCatalogSystem
 
 class PermanentProgressionSystem:
     """Sistema de progresión permanente - nunca retrocede"""
@@ -39,6 +41,9 @@ class PermanentProgressionSystem:
         'experto': {'puntos_min': 1200, 'actividades_min': 120, 'exito_min': 98}
     }
     
+    # Una actividad es exitosa si obtuvo al menos este porcentaje de los puntos máximos
+    UMBRAL_EXITO = 0.7
+    
     @classmethod
     def obtener_nivel_siguiente(cls, nivel_actual):
         """Obtiene el siguiente nivel en la progresión"""
@@ -88,13 +93,30 @@ class PermanentProgressionSystem:
         if not perfil:
             return False
         
+        actividad = ActivityCatalogSystem.obtener(actividad_id)
+        puntos_maximos = actividad.puntos_recompensa if actividad else None
+        
+        cls.registrar_actividad(perfil, puntos_obtenidos, exito, puntos_maximos)
+        
+        db.session.commit()
+        return True
+    
+    @classmethod
+    def registrar_actividad(cls, perfil, puntos_obtenidos, exito, puntos_maximos=None):
+        """
+        Aplica una actividad completada al perfil sin confirmar la transacción.
+        El éxito lo decide el indicador `exito` si se envió (True/False); con
+        `exito=None` se usa el umbral de puntos sobre `puntos_maximos`.
+        """
         # Actualizar estadísticas permanentes
         perfil.puntos_totales_acumulados += puntos_obtenidos
         perfil.actividades_completadas_total += 1
-        perfil.fecha_ultima_actividad = datetime.utcnow()
+        if cls.es_exitosa(puntos_obtenidos, puntos_maximos, exito):
+            perfil.actividades_exitosas_total = (perfil.actividades_exitosas_total or 0) + 1
         
-        # Actualizar días consecutivos
+        # Actualizar días consecutivos (antes de mover la fecha de última actividad)
         cls._actualizar_dias_consecutivos(perfil)
+        perfil.fecha_ultima_actividad = datetime.utcnow()
         
         # Evaluar si puede avanzar de nivel
         nuevo_nivel = cls._evaluar_avance_nivel(perfil)
@@ -105,25 +127,12 @@ class PermanentProgressionSystem:
             # Crear logro de nivel desbloqueado
             cls._crear_logro_nivel(perfil, nuevo_nivel)
         
-        db.session.commit()
-        return True
+        return nuevo_nivel
     
     @classmethod
     def _actualizar_dias_consecutivos(cls, perfil):
         """Actualiza los días consecutivos de uso"""
-        hoy = datetime.utcnow().date()
-        
-        if perfil.fecha_ultima_actividad:
-            ultima_fecha = perfil.fecha_ultima_actividad.date()
-            diferencia = (hoy - ultima_fecha).days
-            
-            if diferencia == 1:  # Día consecutivo
-                perfil.dias_consecutivos += 1
-            elif diferencia > 1:  # Se rompió la racha
-                perfil.dias_consecutivos = 1
-            # Si diferencia == 0, es el mismo día, no cambiar
-        else:
-            perfil.dias_consecutivos = 1
+        return StreakTrackingSystem.registrar_dia(perfil)
     
     @classmethod
     def _evaluar_avance_nivel(cls, perfil):
@@ -140,40 +149,55 @@ class PermanentProgressionSystem:
         if (perfil.puntos_totales_acumulados >= criterios['puntos_min'] and
             perfil.actividades_completadas_total >= criterios['actividades_min']):
             
-            # Calcular tasa de éxito promedio
-            tasa_exito = cls._calcular_tasa_exito(perfil.id)
+            # Tasa de éxito desde los contadores del perfil (O(1))
+            tasa_exito = cls.tasa_exito_perfil(perfil)
             if tasa_exito >= criterios['exito_min']:
                 return siguiente_nivel
         
         return None
     
+    @classmethod
+    def es_exitosa(cls, puntos_obtenidos, puntos_maximos, exito=None):
+        """
+        Indica si una actividad completada cuenta como exitosa: manda el
+        indicador `exito` si se envió; si no, el umbral de puntos (o éxito
+        cuando no hay puntos máximos). Solo se aceptan booleanos reales como
+        indicador: la cadena "false" no debe contar como éxito.
+        """
+        if exito is not None:
+            if not isinstance(exito, bool):
+                raise ValueError("El indicador 'exito' debe ser true o false")
+            return exito
+        if puntos_maximos is None:
+            return True
+        return puntos_obtenidos >= puntos_maximos * cls.UMBRAL_EXITO
+    
+    @classmethod
+    def tasa_exito_perfil(cls, perfil):
+        """Tasa de éxito a partir de los contadores incrementales del perfil"""
+        if not perfil.actividades_completadas_total:
+            return 0
+        
+        return ((perfil.actividades_exitosas_total or 0) / perfil.actividades_completadas_total) * 100
+    
     @classmethod
     def _calcular_tasa_exito(cls, nino_id):
-        """Calcula la tasa de éxito promedio del niño"""
-        # Obtener todas las actividades completadas
-        actividades_completadas = db.session.query(SesionActividad).join(
+        """Calcula la tasa de éxito del niño desde el historial con una sola consulta"""
+        # Cada intento cuenta una vez, como en los contadores incrementales
+        total_actividades, actividades_exitosas = db.session.query(
+            func.sum(SesionActividad.intentos),
+            func.sum(func.coalesce(SesionActividad.exitos, 0))
+        ).join(
             SesionTEA, SesionActividad.sesion_id == SesionTEA.id
         ).filter(
             SesionTEA.nino_id == nino_id,
             SesionActividad.completada == True
-        ).all()
+        ).one()
         
-        if not actividades_completadas:
+        if not total_actividades:
             return 0
         
-        # Calcular tasa de éxito basada en puntos obtenidos vs puntos máximos
-        total_actividades = len(actividades_completadas)
-        actividades_exitosas = 0
-        
-        for sa in actividades_completadas:
-            actividad = ActividadTEA.query.get(sa.actividad_id)
-            if actividad:
-                # Considerar exitosa si obtuvo al menos el 70% de los puntos máximos
-                puntos_maximos = actividad.puntos_recompensa
-                if sa.puntos_obtenidos >= (puntos_maximos * 0.7):
-                    actividades_exitosas += 1
-        
-        return (actividades_exitosas / total_actividades) * 100
+        return ((actividades_exitosas or 0) / total_actividades) * 100
     
     @classmethod
     def _crear_logro_nivel(cls, perfil, nuevo_nivel):
@@ -195,6 +219,14 @@ class PermanentProgressionSystem:
             db.session.add(recompensa)
             db.session.flush()
         
+        # La insignia tiene 0 puntos requeridos: puede haberse desbloqueado antes
+        ya_obtenido = LogroNino.query.filter_by(
+            nino_id=perfil.id,
+            recompensa_id=recompensa.id
+        ).first()
+        if ya_obtenido:
+            return
+        
         # Crear logro para el niño
         logro = LogroNino(
             nino_id=perfil.id,
@@ -213,10 +245,7 @@ class PermanentProgressionSystem:
         nivel_actual = perfil.nivel_progresion_actual
         
         # Obtener actividades del nivel actual y anteriores (para reforzar)
-        actividades = ActividadTEA.query.filter(
-            ActividadTEA.nivel_dificultad == nivel_actual,
-            ActividadTEA.activa == True
-        ).all()
+        actividades = ActivityCatalogSystem.listar(nivel_dificultad=nivel_actual)
         
         return actividades
     
@@ -242,17 +271,23 @@ class PermanentProgressionSystem:
             'nivel_maximo': perfil.nivel_maximo_alcanzado,
             'puntos_totales': perfil.puntos_totales_acumulados,
             'actividades_completadas': perfil.actividades_completadas_total,
-            'dias_consecutivos': perfil.dias_consecutivos,
+            'dias_consecutivos': StreakTrackingSystem.dias_consecutivos(perfil),
             'siguiente_nivel': siguiente_nivel,
             'progreso_siguiente': round(progreso_siguiente, 1),
-            'tasa_exito': round(cls._calcular_tasa_exito(nino_id), 1),
+            'tasa_exito': round(cls.tasa_exito_perfil(perfil), 1),
             'fecha_ultima_actividad': perfil.fecha_ultima_actividad
         }
     
     @classmethod
-    def obtener_ranking_niveles(cls):
-        """Obtiene ranking de niños por nivel alcanzado"""
-        perfiles = PerfilNino.query.filter(
+    def obtener_ranking_niveles(cls, consulta=None):
+        """
+        Obtiene ranking de niños por nivel alcanzado. `consulta` limita los
+        perfiles (p. ej. a los niños visibles para la sesión).
+        """
+        if consulta is None:
+            consulta = PerfilNino.query
+        
+        perfiles = consulta.filter(
             PerfilNino.activo == True,
             PerfilNino.actividades_completadas_total > 0
         ).order_by(
@@ -290,9 +325,9 @@ def obtener_estadisticas_progresion_nino(nino_id):
     """Obtiene estadísticas de progresión de un niño"""
     return PermanentProgressionSystem.obtener_estadisticas_progresion(nino_id)
 
-def obtener_ranking_niveles():
+def obtener_ranking_niveles(consulta=None):
     """Obtiene ranking de niveles"""
-    return PermanentProgressionSystem.obtener_ranking_niveles()
+    return PermanentProgressionSystem.obtener_ranking_niveles(consulta)
 
 
 
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Planes de Sesión Precalculados para TEA Edition
+Un proceso por lotes (precalcular_planes.py, pensado para cron) calcula de
+noche el plan de sesión y las recomendaciones progresivas de cada niño
+activo y los guarda en plan_sesion_precalculado. Los lotes de niños se
+reparten entre procesos (ProcessPoolExecutor) y cada lote lee historial y
+progresos con una consulta por tabla. Las APIs sirven el plan guardado y
+vuelven al cálculo en vivo si está vencido.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from sqlalchemy import delete, insert
+import config
+from app.extensions import db
+from app.models.tea_models import PerfilNino, PlanSesionPrecalculado
+from app.services.activity_catalog import ActivityCatalogSystem
+from app.services.progressive_learning import (
+    ProgressiveLearningSystem, obtener_actividades_progresivas
+)
+from app.utils.day_window import hoy_local
+
+# Aplicación de cada proceso del pool (se crea en el inicializador)
+_app_proceso = None
+
+class PlanPrecomputeSystem:
+    """Cálculo nocturno y lectura de los planes de sesión precalculados"""
+    
+    RECOMENDACIONES = 5
+    
+    @classmethod
+    def precalcular(cls, fecha=None, procesos=None, tamano_lote=None):
+        """
+        Calcula y guarda los planes de todos los niños activos para `fecha`
+        (por defecto hoy). Devuelve la cantidad de planes guardados.
+        """
+        fecha = fecha or hoy_local()
+        procesos = procesos or config.PLAN_PRECALCULADO_PROCESOS
+        tamano_lote = tamano_lote or config.PLAN_PRECALCULADO_LOTE
+        
+        ids = [
+            nino_id for (nino_id,) in db.session.query(PerfilNino.id).filter(
+                PerfilNino.activo == True
+            ).order_by(PerfilNino.id)
+        ]
+        lotes = [ids[i:i + tamano_lote] for i in range(0, len(ids), tamano_lote)]
+        
+        guardados = 0
+        if procesos <= 1 or len(lotes) <= 1:
+            for lote in lotes:
+                guardados += cls._guardar(fecha, cls.calcular_lote(lote))
+        else:
+            # spawn: cada proceso abre su propio engine en lugar de heredar conexiones
+            with ProcessPoolExecutor(
+                max_workers=min(procesos, len(lotes)),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_iniciar_proceso
+            ) as pool:
+                for filas in pool.map(_calcular_lote_en_proceso, lotes):
+                    guardados += cls._guardar(fecha, filas)
+        
+        # Los planes de días anteriores ya no se sirven
+        db.session.execute(delete(PlanSesionPrecalculado).where(
+            PlanSesionPrecalculado.fecha < min(fecha, hoy_local())
+        ))
+        db.session.commit()
+        return guardados
+    
+    @classmethod
+    def calcular_lote(cls, nino_ids):
+        """Plan y recomendaciones (ya en formato JSON) de un lote de niños"""
+        ninos = PerfilNino.query.filter(PerfilNino.id.in_(nino_ids)).order_by(PerfilNino.id).all()
+        version = ActivityCatalogSystem.version_vigente()
+        
+        filas = []
+        for nino_id, sistema in ProgressiveLearningSystem.sistemas_grupo(ninos).items():
+            plan = sistema.generar_plan_progresivo()
+            recomendaciones = obtener_actividades_progresivas(
+                nino_id, limite=cls.RECOMENDACIONES, sistema=sistema
+            )
+            filas.append({
+                'nino_id': nino_id,
+                'duracion': sistema.nino.tiempo_sesion_min or 15,
+                'plan': formatear_plan(plan),
+                'recomendaciones': formatear_recomendaciones(recomendaciones),
+                'version_catalogo': version or 0,
+                'generado_en': datetime.utcnow()
+            })
+        return filas
+    
+    @classmethod
+    def _guardar(cls, fecha, filas):
+        """Reemplaza los planes del día de los niños del lote"""
+        if not filas:
+            return 0
+        
+        db.session.execute(delete(PlanSesionPrecalculado).where(
+            PlanSesionPrecalculado.fecha == fecha,
+            PlanSesionPrecalculado.nino_id.in_([fila['nino_id'] for fila in filas])
+        ))
+        db.session.execute(
+            insert(PlanSesionPrecalculado),
+            [dict(fila, fecha=fecha) for fila in filas]
+        )
+        db.session.commit()
+        return len(filas)
+    
+    @classmethod
+    def obtener_vigente(cls, nino, duracion=None):
+        """
+        Plan guardado para hoy si sigue vigente; None si hay que calcularlo.
+        Vence si cambió el catálogo, si el niño completó actividades después
+        de calcularlo o si se pide otra duración.
+        """
+        if not config.PLAN_PRECALCULADO_ENABLED:
+            return None
+        
+        precalculado = PlanSesionPrecalculado.query.filter_by(
+            nino_id=nino.id,
+            fecha=hoy_local()
+        ).first()
+        
+        if precalculado is None:
+            return None
+        if duracion is not None and duracion != precalculado.duracion:
+            return None
+        if precalculado.version_catalogo != (ActivityCatalogSystem.version_vigente() or 0):
+            return None
+        if nino.fecha_ultima_actividad and nino.fecha_ultima_actividad > precalculado.generado_en:
+            return None
+        return precalculado
+
+def _iniciar_proceso():
+    """Inicializador del pool: una aplicación (y un engine) por proceso"""
+    global _app_proceso
+    from app import create_app
+    _app_proceso = create_app()
+
+def _calcular_lote_en_proceso(nino_ids):
+    with _app_proceso.app_context():
+        try:
+            return PlanPrecomputeSystem.calcular_lote(nino_ids)
+        finally:
+            db.session.remove()
+
+# Funciones de utilidad para las rutas
+def formatear_plan(plan):
+    """Plan progresivo en el formato JSON de /api/plan-sesion"""
+    plan_json = []
+    for item in plan['plan']:
+        actividad = item['actividad']
+        plan_json.append({
+            'orden': item['orden'],
+            'actividad_id': actividad.id,
+            'titulo': actividad.titulo,
+            'categoria': actividad.categoria,
+            'nivel_dificultad': actividad.nivel_dificultad,
+            'tiempo_estimado': item['tiempo_estimado'],
+            'nivel_objetivo': item['nivel_objetivo'],
+            'motivo_progresion': item['motivo_progresion'],
+            'score_progresion': round(item['score_progresion'], 2)
+        })
+    
+    return {
+        'plan': plan_json,
+        'tiempo_total_estimado': plan['tiempo_total_estimado'],
+        'actividades_incluidas': plan['actividades_incluidas'],
+        'fecha_generacion': plan['fecha_generacion'].isoformat(),
+        'tipo': 'progresivo'
+    }
+
+def formatear_recomendaciones(recomendaciones):
+    """Recomendaciones progresivas en el formato JSON de /api/recomendaciones"""
+    recomendaciones_json = []
+    for rec in recomendaciones:
+        actividad = rec['actividad']
+        recomendaciones_json.append({
+            'id': actividad.id,
+            'titulo': actividad.titulo,
+            'descripcion': actividad.descripcion,
+            'categoria': actividad.categoria,
+            'nivel_dificultad': actividad.nivel_dificultad,
+            'puntos_recompensa': actividad.puntos_recompensa,
+            'tiempo_estimado': actividad.tiempo_estimado,
+            'score_progresion': round(rec['score'], 2),
+            'nivel_objetivo': rec['nivel_objetivo'],
+            'motivo_progresion': rec['motivo_progresion'],
+            'evaluacion': {
+                'puede_avanzar': rec['evaluacion']['puede_avanzar'],
+                'tasa_exito': round(rec['evaluacion']['tasa_exito'], 2),
+                'puntos_totales': rec['evaluacion']['puntos_totales']
+            }
+        })
+    return recomendaciones_json
+
+def obtener_plan_precalculado(nino, duracion=None):
+    """Obtiene el plan precalculado vigente del niño o None"""
+    return PlanPrecomputeSystem.obtener_vigente(nino, duracion)
+
+def precalcular_planes(fecha=None, procesos=None):
+    """Calcula y guarda los planes de todos los niños activos"""
+    return PlanPrecomputeSystem.precalcular(fecha, procesos)
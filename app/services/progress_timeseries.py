@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Series de Tiempo de Progreso para TEA Edition
+Actividades, puntos y minutos por día, semana o mes para cualquier rango,
+con una sola consulta acotada por fecha sobre el resumen diario y
+relleno de huecos en Python
+"""
+
+from datetime import timedelta
+from app.services.daily_rollup import DailyRollupSystem
+from app.utils.day_window import hoy_local
+
+class ProgressTimeSeriesSystem:
+    """Series de tiempo del progreso de un niño"""
+    
+    GRANULARIDADES = ('dia', 'semana', 'mes')
+    MAX_DIAS = 366
+    
+    @classmethod
+    def obtener_serie(cls, nino_id, dias=7, granularidad='dia', hasta=None):
+        """
+        Devuelve la serie cronológica de los últimos `dias` días hasta `hasta`
+        (hoy por defecto), agrupada por `granularidad`. Los periodos sin
+        sesiones aparecen con valores en cero.
+        """
+        if granularidad not in cls.GRANULARIDADES:
+            raise ValueError(f"Granularidad {granularidad} no válida")
+        if not 1 <= dias <= cls.MAX_DIAS:
+            raise ValueError(f"El rango debe estar entre 1 y {cls.MAX_DIAS} días")
+        
+        hasta = hasta or hoy_local()
+        desde = hasta - timedelta(days=dias - 1)
+        
+        totales_por_dia = cls._totales_por_dia(nino_id, desde, hasta)
+        
+        # Agrupar los días (incluidos los vacíos) en su periodo
+        periodos = {}
+        for i in range(dias):
+            fecha = desde + timedelta(days=i)
+            inicio_periodo = cls._inicio_periodo(fecha, granularidad)
+            punto = periodos.setdefault(inicio_periodo, cls._punto_vacio(inicio_periodo, granularidad))
+            
+            totales = totales_por_dia.get(fecha)
+            if totales:
+                punto['actividades'] += totales['actividades']
+                punto['puntos'] += totales['puntos']
+                punto['duracion'] += totales['duracion']
+        
+        return [periodos[inicio] for inicio in sorted(periodos)]
+    
+    @classmethod
+    def _totales_por_dia(cls, nino_id, desde, hasta):
+        """Totales por día calendario leídos del resumen diario (una consulta agrupada)"""
+        return {
+            fecha: {
+                'actividades': totales['completadas'],
+                'puntos': totales['puntos'],
+                'duracion': totales['segundos'] // 60
+            }
+            for fecha, totales in DailyRollupSystem.totales_por_dia(nino_id, desde, hasta).items()
+        }
+    
+    @classmethod
+    def _inicio_periodo(cls, fecha, granularidad):
+        """Primer día del periodo (día, semana que empieza en lunes, o mes)"""
+        if granularidad == 'semana':
+            return fecha - timedelta(days=fecha.weekday())
+        if granularidad == 'mes':
+            return fecha.replace(day=1)
+        return fecha
+    
+    @classmethod
+    def _punto_vacio(cls, inicio_periodo, granularidad):
+        """Punto de la serie sin actividad"""
+        punto = {
+            'fecha': inicio_periodo.strftime('%Y-%m-%d'),
+            'actividades': 0,
+            'puntos': 0,
+            'duracion': 0
+        }
+        
+        if granularidad == 'dia':
+            punto['dia'] = inicio_periodo.strftime('%A')
+        elif granularidad == 'semana':
+            punto['semana'] = inicio_periodo.strftime('%G-W%V')
+        else:
+            punto['mes'] = inicio_periodo.strftime('%Y-%m')
+        
+        return punto
+
+# Funciones de utilidad para las rutas
+def obtener_serie_progreso(nino_id, dias=7, granularidad='dia'):
+    """Obtiene la serie de tiempo del progreso de un niño"""
+    return ProgressTimeSeriesSystem.obtener_serie(nino_id, dias, granularidad)
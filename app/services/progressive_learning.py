@@ -7,31 +7,98 @@ from app.extensions import db
 from app.models.tea_models import (
     PerfilNino, ActividadTEA, SesionActividad, ProgresoTEA, SesionTEA
 )
+from app.services.activity_history import ActivityHistory
+from app.services.activity_catalog import ActivityCatalogSystem
+from app.services.session_planner import SessionPlannerSystem
+from app.services.trend_analysis import TrendAnalysisSystem
 from datetime import datetime, timedelta
 import json
 import math
+import config
+
+class EscaleraNiveles:
+    """
+    Escalera de progresión precalculada a partir del catálogo: categoría →
+    niveles en orden de dificultad → actividades activas del peldaño
+    (ordenadas por id, con sus puntos y tiempo estimado). Se construye una
+    vez por versión del catálogo y se comparte entre peticiones, así que
+    las consultas de progresión son recorridos de diccionarios.
+    """
+    
+    def __init__(self, actividades, niveles):
+        self.niveles = niveles
+        self.peldanos = {}
+        
+        por_categoria = {}
+        for actividad in actividades:
+            if actividad.activa:
+                por_categoria.setdefault(actividad.categoria, {}).setdefault(
+                    actividad.nivel_dificultad, []
+                ).append(actividad)
+        
+        # Niveles fuera de la progresión (p. ej. 'basico' de datos antiguos) al final
+        for categoria in sorted(por_categoria):
+            peldanos = por_categoria[categoria]
+            self.peldanos[categoria] = {
+                nivel: sorted(peldanos[nivel], key=lambda actividad: actividad.id)
+                for nivel in sorted(peldanos, key=lambda nivel: niveles.get(nivel, len(niveles)))
+            }
+    
+    def categorias(self):
+        """Categorías con actividades activas"""
+        return list(self.peldanos)
+    
+    def actividades(self, categoria, nivel):
+        """Actividades activas de un peldaño (lista vacía si no hay)"""
+        return self.peldanos.get(categoria, {}).get(nivel, [])
+    
+    def niveles_categoria(self, categoria):
+        """Niveles con actividades de una categoría, en orden de dificultad"""
+        return list(self.peldanos.get(categoria, {}))
+    
+    def siguiente_nivel(self, nivel_actual):
+        """Nivel siguiente en la progresión (el máximo se mantiene)"""
+        nivel_num = self.niveles.get(nivel_actual, 0)
+        siguiente_num = min(nivel_num + 1, max(self.niveles.values()))
+        
+        for nombre, num in self.niveles.items():
+            if num == siguiente_num:
+                return nombre
+        
+        return nivel_actual
 
 class ProgressiveLearningSystem:
     """Sistema de aprendizaje progresivo que incrementa la dificultad gradualmente"""
     
-    def __init__(self, nino_id):
+    # Definir niveles de dificultad progresivos
+    NIVELES_DIFICULTAD = {
+        'inicial': 0,      # Primeras actividades
+        'basico_1': 1,     # Básico nivel 1
+        'basico_2': 2,     # Básico nivel 2
+        'basico_3': 3,     # Básico nivel 3
+        'intermedio_1': 4, # Intermedio nivel 1
+        'intermedio_2': 5, # Intermedio nivel 2
+        'intermedio_3': 6, # Intermedio nivel 3
+        'avanzado_1': 7,   # Avanzado nivel 1
+        'avanzado_2': 8,   # Avanzado nivel 2
+        'avanzado_3': 9,   # Avanzado nivel 3
+        'experto': 10      # Nivel experto
+    }
+    
+    def __init__(self, nino_id, nino=None, historial=None, progresos=None, tendencias=None):
+        """
+        `nino`, `historial` (ActivityHistory), `progresos` (lista de
+        ProgresoTEA) y `tendencias` (de TrendAnalysisSystem) permiten
+        reutilizar datos ya cargados para un grupo
+        """
         self.nino_id = nino_id
-        self.nino = PerfilNino.query.get(nino_id)
-        
-        # Definir niveles de dificultad progresivos
-        self.niveles_dificultad = {
-            'inicial': 0,      # Primeras actividades
-            'basico_1': 1,     # Básico nivel 1
-            'basico_2': 2,     # Básico nivel 2
-            'basico_3': 3,     # Básico nivel 3
-            'intermedio_1': 4, # Intermedio nivel 1
-            'intermedio_2': 5, # Intermedio nivel 2
-            'intermedio_3': 6, # Intermedio nivel 3
-            'avanzado_1': 7,   # Avanzado nivel 1
-            'avanzado_2': 8,   # Avanzado nivel 2
-            'avanzado_3': 9,   # Avanzado nivel 3
-            'experto': 10      # Nivel experto
-        }
+        self._nino = nino
+        self._historial = historial
+        self._tendencias = tendencias
+        self._progresos = None
+        if progresos is not None:
+            self._indexar_progresos(progresos)
+        self.niveles_dificultad = self.NIVELES_DIFICULTAD
         
         # Criterios para avanzar de nivel
         self.criterios_progresion = {
@@ -41,18 +108,67 @@ class ProgressiveLearningSystem:
             'tiempo_maximo': 300       # Máximo 5 minutos por actividad
         }
     
+    @classmethod
+    def escalera(cls):
+        """Escalera de niveles del catálogo vigente, compartida por el proceso"""
+        return ActivityCatalogSystem.derivado(
+            'escalera_niveles',
+            lambda actividades: EscaleraNiveles(actividades, cls.NIVELES_DIFICULTAD)
+        )
+    
+    @property
+    def nino(self):
+        """Perfil del niño, cargado solo si se usa"""
+        if self._nino is None:
+            self._nino = PerfilNino.query.get(self.nino_id)
+        return self._nino
+    
+    def obtener_progreso(self, categoria):
+        """ProgresoTEA de una categoría; los de todas se cargan en una sola consulta"""
+        if self._progresos is None:
+            self._indexar_progresos(
+                ProgresoTEA.query.filter_by(nino_id=self.nino_id).order_by(ProgresoTEA.id)
+            )
+        return self._progresos.get(categoria)
+    
+    def _indexar_progresos(self, progresos):
+        """Primer ProgresoTEA de cada habilidad (por id)"""
+        self._progresos = {}
+        for progreso in progresos:
+            self._progresos.setdefault(progreso.habilidad, progreso)
+    
+    def obtener_tendencia(self, categoria):
+        """Tendencia del rendimiento reciente en una categoría (la misma del motor adaptativo)"""
+        if self._tendencias is None:
+            self._tendencias = TrendAnalysisSystem.analizar_nino(self.nino_id)
+        return self._tendencias.get(categoria, TrendAnalysisSystem.SIN_DATOS)
+    
     def evaluar_progreso_actividad(self, actividad_id, ultimos_dias=7):
         """Evalúa el progreso en una actividad específica para determinar si puede avanzar"""
-        fecha_limite = datetime.now() - timedelta(days=ultimos_dias)
-        
-        # Obtener intentos recientes
-        intentos = SesionActividad.query.join(SesionTEA).filter(
-            SesionActividad.actividad_id == actividad_id,
-            SesionActividad.sesion.has(nino_id=self.nino_id),
-            SesionTEA.fecha >= fecha_limite
-        ).all()
-        
-        if not intentos:
+        return self.evaluar_progreso_actividades([actividad_id], ultimos_dias)[actividad_id]
+    
+    def evaluar_progreso_actividades(self, actividad_ids, ultimos_dias=7):
+        """Evalúa varias actividades a partir del historial agregado del niño"""
+        historial = self.obtener_historial(ultimos_dias)
+        
+        evaluaciones = {}
+        for actividad_id in actividad_ids:
+            ventana = historial.ventana(actividad_id, ultimos_dias)
+            evaluaciones[actividad_id] = self._construir_evaluacion(
+                ventana['intentos'], ventana['exitos'],
+                ventana['puntos_totales'], ventana['tiempo_total']
+            )
+        return evaluaciones
+    
+    def obtener_historial(self, ultimos_dias=7):
+        """Historial agregado del niño, cargado una sola vez por instancia y ventana"""
+        if self._historial is None or ultimos_dias not in self._historial.ventanas:
+            self._historial = ActivityHistory(self.nino_id, ventanas=(ultimos_dias,))
+        return self._historial
+    
+    def _construir_evaluacion(self, intentos_totales, intentos_exitosos, puntos_totales, tiempo_total):
+        """Construye la evaluación de una actividad a partir de sus agregados"""
+        if not intentos_totales:
             return {
                 'puede_avanzar': False,
                 'razon': 'No hay suficientes intentos recientes',
@@ -63,11 +179,9 @@ class ProgressiveLearningSystem:
             }
         
         # Calcular métricas
-        intentos_totales = len(intentos)
-        intentos_exitosos = sum(1 for i in intentos if i.completada)
-        puntos_totales = sum(i.puntos_obtenidos for i in intentos if i.puntos_obtenidos)
-        tiempo_promedio = sum(i.tiempo_dedicado for i in intentos) / intentos_totales
-        tasa_exito = intentos_exitosos / intentos_totales
+        puntos_totales = puntos_totales or 0
+        tiempo_promedio = (tiempo_total or 0) / intentos_totales
+        tasa_exito = (intentos_exitosos or 0) / intentos_totales
         
         # Evaluar si puede avanzar
         puede_avanzar = (
@@ -88,12 +202,10 @@ class ProgressiveLearningSystem:
             'intentos_totales': intentos_totales
         }
     
-    def determinar_siguiente_nivel(self, categoria):
+    def determinar_siguiente_nivel(self, categoria, progreso=None):
         """Determina el siguiente nivel de dificultad para una categoría"""
-        progreso = ProgresoTEA.query.filter_by(
-            nino_id=self.nino_id,
-            habilidad=categoria
-        ).first()
+        if progreso is None:
+            progreso = self.obtener_progreso(categoria)
         
         if not progreso:
             return 'inicial'
@@ -101,11 +213,7 @@ class ProgressiveLearningSystem:
         nivel_actual = progreso.nivel_actual
         
         # Obtener actividades del nivel actual para evaluar progreso
-        actividades_actuales = ActividadTEA.query.filter_by(
-            categoria=categoria,
-            nivel_dificultad=nivel_actual,
-            activa=True
-        ).all()
+        actividades_actuales = self.escalera().actividades(categoria, nivel_actual)
         
         if not actividades_actuales:
             return nivel_actual
@@ -114,8 +222,8 @@ class ProgressiveLearningSystem:
         actividades_completadas = 0
         actividades_que_pueden_avanzar = 0
         
-        for actividad in actividades_actuales:
-            evaluacion = self.evaluar_progreso_actividad(actividad.id)
+        evaluaciones = self.evaluar_progreso_actividades(a.id for a in actividades_actuales)
+        for evaluacion in evaluaciones.values():
             if evaluacion['intentos_totales'] > 0:
                 actividades_completadas += 1
                 if evaluacion['puede_avanzar']:
@@ -128,51 +236,37 @@ class ProgressiveLearningSystem:
         # Si más del 70% de las actividades pueden avanzar, subir nivel
         porcentaje_avance = actividades_que_pueden_avanzar / actividades_completadas
         if porcentaje_avance >= 0.7:
+            # Con el rendimiento en baja se consolida el nivel antes de subir
+            if self.obtener_tendencia(categoria)['tendencia'] == 'dificultad':
+                return nivel_actual
             return self._obtener_siguiente_nivel(nivel_actual)
         
         return nivel_actual
     
     def _obtener_siguiente_nivel(self, nivel_actual):
         """Obtiene el siguiente nivel en la progresión"""
-        nivel_num = self.niveles_dificultad.get(nivel_actual, 0)
-        siguiente_num = min(nivel_num + 1, 10)  # Máximo nivel experto
-        
-        # Encontrar el nombre del nivel
-        for nombre, num in self.niveles_dificultad.items():
-            if num == siguiente_num:
-                return nombre
-        
-        return nivel_actual
+        return self.escalera().siguiente_nivel(nivel_actual)
     
     def obtener_actividades_progresivas(self, categoria, limite=5):
         """Obtiene actividades que siguen la progresión natural del niño"""
+        escalera = self.escalera()
         nivel_objetivo = self.determinar_siguiente_nivel(categoria)
         
         # Obtener actividades del nivel objetivo
-        actividades = ActividadTEA.query.filter_by(
-            categoria=categoria,
-            nivel_dificultad=nivel_objetivo,
-            activa=True
-        ).all()
+        actividades = escalera.actividades(categoria, nivel_objetivo)
         
         # Si no hay actividades del nivel objetivo, obtener del nivel actual
         if not actividades:
-            progreso = ProgresoTEA.query.filter_by(
-                nino_id=self.nino_id,
-                habilidad=categoria
-            ).first()
+            progreso = self.obtener_progreso(categoria)
             
             nivel_actual = progreso.nivel_actual if progreso else 'inicial'
-            actividades = ActividadTEA.query.filter_by(
-                categoria=categoria,
-                nivel_dificultad=nivel_actual,
-                activa=True
-            ).all()
+            actividades = escalera.actividades(categoria, nivel_actual)
         
         # Evaluar cada actividad y calcular score de progresión
+        evaluaciones = self.evaluar_progreso_actividades(actividad.id for actividad in actividades)
         actividades_con_score = []
         for actividad in actividades:
-            evaluacion = self.evaluar_progreso_actividad(actividad.id)
+            evaluacion = evaluaciones[actividad.id]
             
             # Calcular score basado en progresión
             score = self._calcular_score_progresion(actividad, evaluacion, nivel_objetivo)
@@ -218,7 +312,7 @@ class ProgressiveLearningSystem:
         # Factor 3: Diversidad temporal (20%)
         ultima_vez = self._obtener_ultima_vez_actividad(actividad.id)
         if ultima_vez:
-            dias_desde_ultima = (datetime.now() - ultima_vez).days
+            dias_desde_ultima = (datetime.utcnow() - ultima_vez).days
             score += min(dias_desde_ultima / 3, 1) * 0.2
         else:
             score += 0.2  # Actividad nueva
@@ -247,76 +341,107 @@ class ProgressiveLearningSystem:
     
     def _obtener_ultima_vez_actividad(self, actividad_id):
         """Obtiene la última vez que el niño hizo esta actividad"""
-        ultima_sesion = SesionActividad.query.join(SesionTEA).filter(
-            SesionActividad.actividad_id == actividad_id,
-            SesionActividad.sesion.has(nino_id=self.nino_id)
-        ).order_by(SesionActividad.fecha_completada.desc()).first()
-        
-        return ultima_sesion.fecha_completada if ultima_sesion else None
+        return self.obtener_historial().ultima_vez(actividad_id)
     
-    def generar_plan_progresivo(self, duracion_objetivo=15):
-        """Genera un plan de sesión con progresión incremental"""
-        categorias = db.session.query(ActividadTEA.categoria).distinct().all()
-        categorias = [cat[0] for cat in categorias]
+    def generar_plan_progresivo(self, duracion_objetivo=None):
+        """
+        Genera un plan de sesión con progresión incremental: las actividades
+        progresivas de todas las categorías de mayor score que caben en
+        `duracion_objetivo` minutos (por defecto, el tiempo de sesión del niño)
+        """
+        if duracion_objetivo is None:
+            duracion_objetivo = (self.nino.tiempo_sesion_min if self.nino else None) or 15
+        
+        # Candidatos de cada categoría, elegidos luego por el planificador
+        candidatos = []
+        for categoria in self.escalera().categorias():
+            candidatos.extend(self.obtener_actividades_progresivas(
+                categoria, limite=config.PLAN_CANDIDATOS_POR_CATEGORIA
+            ))
         
         plan = []
-        tiempo_total = 0
-        
-        # Obtener actividades progresivas de cada categoría
-        for categoria in categorias:
-            actividades_progresivas = self.obtener_actividades_progresivas(categoria, limite=2)
-            
-            for act_prog in actividades_progresivas:
-                actividad = act_prog['actividad']
-                tiempo_estimado = actividad.tiempo_estimado
-                
-                if tiempo_total + tiempo_estimado <= duracion_objetivo:
-                    plan.append({
-                        'actividad': actividad,
-                        'orden': len(plan) + 1,
-                        'tiempo_estimado': tiempo_estimado,
-                        'nivel_objetivo': act_prog['nivel_objetivo'],
-                        'motivo_progresion': act_prog['motivo_progresion'],
-                        'score_progresion': act_prog['score']
-                    })
-                    tiempo_total += tiempo_estimado
-                else:
-                    break
-            
-            if tiempo_total >= duracion_objetivo:
-                break
+        for act_prog in SessionPlannerSystem.optimizar(candidatos, duracion_objetivo):
+            actividad = act_prog['actividad']
+            plan.append({
+                'actividad': actividad,
+                'orden': len(plan) + 1,
+                'tiempo_estimado': actividad.tiempo_estimado,
+                'nivel_objetivo': act_prog['nivel_objetivo'],
+                'motivo_progresion': act_prog['motivo_progresion'],
+                'score_progresion': act_prog['score']
+            })
         
         return {
             'plan': plan,
-            'tiempo_total_estimado': tiempo_total,
+            'tiempo_total_estimado': sum(item['tiempo_estimado'] or 0 for item in plan),
             'actividades_incluidas': len(plan),
+            'score_total': sum(item['score_progresion'] for item in plan),
             'fecha_generacion': datetime.now(),
             'tipo': 'progresivo'
         }
     
+    @classmethod
+    def sistemas_grupo(cls, ninos):
+        """
+        Un sistema por niño (perfiles ya cargados) con el historial, los
+        progresos y las tendencias de todo el grupo leídos en una consulta
+        cada uno.
+        Devuelve {nino_id: ProgressiveLearningSystem}.
+        """
+        ids = [nino.id for nino in ninos]
+        if not ids:
+            return {}
+        
+        historiales = ActivityHistory.cargar_grupo(ids, ventanas=(7,))
+        progresos = {}
+        for progreso in ProgresoTEA.query.filter(ProgresoTEA.nino_id.in_(ids)).order_by(ProgresoTEA.id):
+            progresos.setdefault(progreso.nino_id, []).append(progreso)
+        tendencias = TrendAnalysisSystem.analizar_grupo(ids)
+        
+        return {
+            nino.id: cls(
+                nino.id, nino=nino, historial=historiales[nino.id],
+                progresos=progresos.get(nino.id, []),
+                tendencias=tendencias.get(nino.id, {})
+            )
+            for nino in ninos
+        }
+    
+    @classmethod
+    def generar_planes_grupo(cls, ninos, duracion_objetivo=None):
+        """Planes progresivos de un grupo de niños. Devuelve {nino_id: plan}."""
+        return {
+            nino_id: sistema.generar_plan_progresivo(duracion_objetivo)
+            for nino_id, sistema in cls.sistemas_grupo(ninos).items()
+        }
+    
     def actualizar_nivel_progresion(self, categoria):
         """Actualiza el nivel de progresión para una categoría específica"""
-        nuevo_nivel = self.determinar_siguiente_nivel(categoria)
+        progreso = self.obtener_progreso(categoria)
+        
+        if self.aplicar_nivel_progresion(categoria, progreso):
+            db.session.commit()
+            return True
         
-        progreso = ProgresoTEA.query.filter_by(
-            nino_id=self.nino_id,
-            habilidad=categoria
-        ).first()
+        return False
+    
+    def aplicar_nivel_progresion(self, categoria, progreso):
+        """Ajusta el nivel de un ProgresoTEA ya cargado sin confirmar la transacción"""
+        if not progreso:
+            return False
         
-        if progreso:
-            if progreso.nivel_actual != nuevo_nivel:
-                progreso.nivel_actual = nuevo_nivel
-                progreso.ultima_actualizacion = datetime.now()
-                db.session.commit()
-                return True
+        nuevo_nivel = self.determinar_siguiente_nivel(categoria, progreso)
+        if progreso.nivel_actual != nuevo_nivel:
+            progreso.nivel_actual = nuevo_nivel
+            progreso.ultima_actualizacion = datetime.utcnow()
+            return True
         
         return False
 
-def obtener_actividades_progresivas(nino_id, limite=5):
+def obtener_actividades_progresivas(nino_id, limite=5, sistema=None):
     """Función helper para obtener actividades progresivas"""
-    sistema = ProgressiveLearningSystem(nino_id)
-    categorias = db.session.query(ActividadTEA.categoria).distinct().all()
-    categorias = [cat[0] for cat in categorias]
+    sistema = sistema or ProgressiveLearningSystem(nino_id)
+    categorias = sistema.escalera().categorias()
     
     todas_actividades = []
     for categoria in categorias:
@@ -327,11 +452,15 @@ def obtener_actividades_progresivas(nino_id, limite=5):
     todas_actividades.sort(key=lambda x: x['score'], reverse=True)
     return todas_actividades[:limite]
 
-def generar_plan_progresivo(nino_id, duracion=15):
+def generar_plan_progresivo(nino_id, duracion=None, sistema=None):
     """Función helper para generar plan progresivo"""
-    sistema = ProgressiveLearningSystem(nino_id)
+    sistema = sistema or ProgressiveLearningSystem(nino_id)
     return sistema.generar_plan_progresivo(duracion)
 
+def generar_planes_grupo(ninos, duracion=None):
+    """Función helper para generar los planes progresivos de un grupo de niños"""
+    return ProgressiveLearningSystem.generar_planes_grupo(ninos, duracion)
+
 
 
 
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Exportación de Reportes para TEA Edition
+Genera el reporte de un niño por partes (JSON, JSON Lines o CSV) leyendo
+las sesiones y logros con cursores del lado del servidor, para exportar
+historiales de años sin cargarlos completos en memoria
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from sqlalchemy.orm import joinedload
+from app.models.tea_models import SesionTEA, ProgresoTEA, LogroNino
+from app.utils.day_window import filtrar_dias
+
+class ReportExportSystem:
+    """Exportación en streaming del reporte de un niño"""
+    
+    FORMATOS = {
+        'json': 'application/json',
+        'jsonl': 'application/x-ndjson',
+        'csv': 'text/csv'
+    }
+    
+    # Filas leídas por viaje a la base de datos
+    TAMANO_LOTE = 500
+    
+    COLUMNAS_CSV = [
+        'tipo', 'fecha', 'duracion_minutos', 'actividades_completadas',
+        'puntos', 'estado', 'habilidad', 'nivel_actual',
+        'sesiones_completadas', 'racha_dias', 'recompensa'
+    ]
+    
+    @classmethod
+    def exportar(cls, nino, formato='json', desde=None, hasta=None):
+        """Devuelve un generador con el reporte en el formato pedido"""
+        if formato not in cls.FORMATOS:
+            raise ValueError(f"Formato {formato} no válido")
+        
+        generador = {
+            'json': cls._generar_json,
+            'jsonl': cls._generar_jsonl,
+            'csv': cls._generar_csv
+        }[formato]
+        return generador(nino, desde, hasta)
+    
+    @classmethod
+    def sesiones(cls, nino_id, desde=None, hasta=None):
+        """Sesiones del niño en el rango, en lotes"""
+        consulta = SesionTEA.query.filter(SesionTEA.nino_id == nino_id)
+        consulta = filtrar_dias(consulta, SesionTEA.fecha, desde, hasta)
+        
+        for sesion in consulta.order_by(SesionTEA.fecha, SesionTEA.id).yield_per(cls.TAMANO_LOTE):
+            yield {
+                'fecha': sesion.fecha.isoformat(),
+                'duracion_minutos': sesion.duracion_minutos,
+                'actividades_completadas': sesion.actividades_completadas,
+                'puntos_ganados': sesion.puntos_ganados,
+                'estado': sesion.estado
+            }
+    
+    @classmethod
+    def progreso(cls, nino_id):
+        """Progreso actual por habilidad (una fila por habilidad)"""
+        for prog in ProgresoTEA.query.filter_by(nino_id=nino_id).all():
+            yield {
+                'habilidad': prog.habilidad,
+                'nivel_actual': prog.nivel_actual,
+                'puntos_totales': prog.puntos_totales,
+                'sesiones_completadas': prog.sesiones_completadas,
+                'racha_dias': prog.racha_dias
+            }
+    
+    @classmethod
+    def logros(cls, nino_id, desde=None, hasta=None):
+        """Logros del niño en el rango, con su recompensa cargada en la misma consulta"""
+        consulta = LogroNino.query.options(
+            joinedload(LogroNino.recompensa)
+        ).filter(LogroNino.nino_id == nino_id)
+        consulta = filtrar_dias(consulta, LogroNino.fecha_obtenido, desde, hasta)
+        
+        for logro in consulta.order_by(LogroNino.fecha_obtenido, LogroNino.id).yield_per(cls.TAMANO_LOTE):
+            yield {
+                'recompensa': logro.recompensa.nombre if logro.recompensa else None,
+                'fecha_obtenido': logro.fecha_obtenido.isoformat() if logro.fecha_obtenido else None
+            }
+    
+    @classmethod
+    def _datos_nino(cls, nino):
+        """Encabezado del reporte"""
+        return {
+            'nombre': nino.nombre,
+            'edad': nino.edad,
+            'nivel_dificultad': nino.nivel_dificultad
+        }
+    
+    @classmethod
+    def _generar_json(cls, nino, desde, hasta):
+        """Mismo documento JSON que el reporte original, emitido por partes"""
+        yield '{"nino": ' + json.dumps(cls._datos_nino(nino))
+        yield ', "fecha_generacion": ' + json.dumps(datetime.now().isoformat())
+        
+        secciones = [
+            ('sesiones', cls.sesiones(nino.id, desde, hasta)),
+            ('progreso', cls.progreso(nino.id)),
+            ('logros', cls.logros(nino.id, desde, hasta))
+        ]
+        for nombre, registros in secciones:
+            yield f', "{nombre}": ['
+            for indice, registro in enumerate(registros):
+                yield (', ' if indice else '') + json.dumps(registro)
+            yield ']'
+        
+        yield '}\n'
+    
+    @classmethod
+    def _generar_jsonl(cls, nino, desde, hasta):
+        """Un objeto JSON por línea, con el campo `tipo` indicando la sección"""
+        encabezado = dict(cls._datos_nino(nino), tipo='nino', fecha_generacion=datetime.now().isoformat())
+        yield json.dumps(encabezado) + '\n'
+        
+        for tipo, registros in cls._secciones(nino, desde, hasta):
+            for registro in registros:
+                yield json.dumps(dict(registro, tipo=tipo)) + '\n'
+    
+    @classmethod
+    def _generar_csv(cls, nino, desde, hasta):
+        """Una fila por registro con columnas comunes para todas las secciones"""
+        buffer = io.StringIO()
+        escritor = csv.DictWriter(buffer, fieldnames=cls.COLUMNAS_CSV, extrasaction='ignore')
+        
+        def vaciar():
+            contenido = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            return contenido
+        
+        escritor.writeheader()
+        yield vaciar()
+        
+        for tipo, registros in cls._secciones(nino, desde, hasta):
+            for registro in registros:
+                escritor.writerow(cls._fila_csv(tipo, registro))
+                yield vaciar()
+    
+    @classmethod
+    def _secciones(cls, nino, desde, hasta):
+        """Secciones del reporte en orden"""
+        return [
+            ('sesion', cls.sesiones(nino.id, desde, hasta)),
+            ('progreso', cls.progreso(nino.id)),
+            ('logro', cls.logros(nino.id, desde, hasta))
+        ]
+    
+    @classmethod
+    def _fila_csv(cls, tipo, registro):
+        """Aplana un registro a las columnas del CSV"""
+        fila = dict(registro, tipo=tipo)
+        fila['fecha'] = registro.get('fecha') or registro.get('fecha_obtenido')
+        fila['puntos'] = registro.get('puntos_ganados', registro.get('puntos_totales'))
+        return fila
+
+# Funciones de utilidad para las rutas
+def exportar_reporte(nino, formato='json', desde=None, hasta=None):
+    """Genera por partes el reporte de un niño"""
+    return ReportExportSystem.exportar(nino, formato, desde, hasta)
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Métricas por Endpoint para TEA Edition
+Cuenta las sentencias SQL y mide el tiempo en base de datos y la latencia
+de cada petición. Se engancha a los eventos del engine único del proceso
+(app.extensions.engine), así que cubre tanto la sesión de Flask-SQLAlchemy
+como SessionLocal. Detecta patrones N+1 (la misma forma de sentencia
+repetida en una petición), guarda las sentencias más lentas y escribe un
+log estructurado (JSON) de las peticiones lentas o con N+1.
+"""
+
+import heapq
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from flask import g, has_request_context, request
+from sqlalchemy import event
+import config
+from app.extensions import engine
+
+logger = logging.getLogger('app.metricas')
+
+@lru_cache(maxsize=1024)
+def forma_sentencia(sentencia):
+    """Forma normalizada de una sentencia: sin literales ni listas de parámetros"""
+    forma = re.sub(r'\s+', ' ', sentencia).strip()
+    forma = re.sub(r"'(?:[^']|'')*'", '?', forma)
+    forma = re.sub(r'\b\d+(?:\.\d+)?\b', '?', forma)
+    forma = re.sub(r'%\(\w+\)s|:\w+|\$\d+', '?', forma)
+    return re.sub(r'\(\s*\?(?:\s*,\s*\?)+\s*\)', '(?...)', forma)
+
+class RequestMetricsSystem:
+    """Acumula por endpoint consultas, tiempo en base de datos y latencia"""
+    
+    _lock = threading.Lock()
+    _endpoints = {}
+    # Montículo de (duración, forma, endpoint) con las sentencias más lentas
+    _lentas = []
+    _desde = time.time()
+    
+    @classmethod
+    def iniciar_peticion(cls):
+        """Prepara el registro de la petición actual"""
+        g.metricas = {
+            'inicio': time.perf_counter(),
+            'consultas': 0,
+            'tiempo_db': 0.0,
+            'formas': Counter(),
+            'mas_lenta': (0.0, None)
+        }
+    
+    @classmethod
+    def registrar_sentencia(cls, sentencia, duracion):
+        """Suma una sentencia a la petición en curso (fuera de peticiones no registra)"""
+        if not has_request_context():
+            return
+        metricas = g.get('metricas')
+        if metricas is None:
+            return
+        
+        forma = forma_sentencia(sentencia)
+        metricas['consultas'] += 1
+        metricas['tiempo_db'] += duracion
+        metricas['formas'][forma] += 1
+        if duracion > metricas['mas_lenta'][0]:
+            metricas['mas_lenta'] = (duracion, forma)
+    
+    @classmethod
+    def finalizar_peticion(cls, error=None):
+        """Agrega la petición a su endpoint y escribe el log estructurado si corresponde"""
+        metricas = g.pop('metricas', None)
+        if metricas is None:
+            return
+        
+        status_code = 500 if error is not None else metricas.get('status', 200)
+        
+        latencia = time.perf_counter() - metricas['inicio']
+        endpoint = request.endpoint or 'sin_endpoint'
+        repetidas = [
+            (forma, veces) for forma, veces in metricas['formas'].most_common(3)
+            if veces >= config.METRICS_N_PLUS_ONE
+        ]
+        
+        with cls._lock:
+            datos = cls._endpoints.get(endpoint)
+            if datos is None:
+                datos = cls._endpoints[endpoint] = {
+                    'peticiones': 0,
+                    'consultas': 0,
+                    'consultas_max': 0,
+                    'tiempo_db': 0.0,
+                    'latencia': 0.0,
+                    'latencia_max': 0.0,
+                    'errores': 0,
+                    'con_n_mas_1': 0,
+                    'n_mas_1': None
+                }
+            datos['peticiones'] += 1
+            datos['consultas'] += metricas['consultas']
+            datos['consultas_max'] = max(datos['consultas_max'], metricas['consultas'])
+            datos['tiempo_db'] += metricas['tiempo_db']
+            datos['latencia'] += latencia
+            datos['latencia_max'] = max(datos['latencia_max'], latencia)
+            if status_code >= 500:
+                datos['errores'] += 1
+            if repetidas:
+                datos['con_n_mas_1'] += 1
+                datos['n_mas_1'] = {'forma': repetidas[0][0], 'veces': repetidas[0][1]}
+            
+            duracion, forma = metricas['mas_lenta']
+            if forma is not None:
+                entrada = (duracion, forma, endpoint)
+                if len(cls._lentas) < config.METRICS_SLOW_STATEMENTS:
+                    heapq.heappush(cls._lentas, entrada)
+                elif duracion > cls._lentas[0][0]:
+                    heapq.heapreplace(cls._lentas, entrada)
+        
+        lenta = latencia * 1000 >= config.METRICS_SLOW_REQUEST_MS
+        if lenta or repetidas or config.METRICS_LOG_REQUESTS:
+            registro = {
+                'endpoint': endpoint,
+                'metodo': request.method,
+                'ruta': request.path,
+                'status': status_code,
+                'latencia_ms': round(latencia * 1000, 1),
+                'consultas': metricas['consultas'],
+                'tiempo_db_ms': round(metricas['tiempo_db'] * 1000, 1),
+                'n_mas_1': [{'forma': forma, 'veces': veces} for forma, veces in repetidas]
+            }
+            nivel = logging.WARNING if lenta or repetidas else logging.INFO
+            logger.log(nivel, json.dumps(registro, ensure_ascii=False))
+    
+    @classmethod
+    def estadisticas(cls):
+        """Resumen por endpoint (promedios en ms) y sentencias más lentas"""
+        with cls._lock:
+            endpoints = {}
+            for endpoint, datos in cls._endpoints.items():
+                peticiones = datos['peticiones']
+                endpoints[endpoint] = {
+                    'peticiones': peticiones,
+                    'errores': datos['errores'],
+                    'consultas_promedio': round(datos['consultas'] / peticiones, 2),
+                    'consultas_max': datos['consultas_max'],
+                    'tiempo_db_promedio_ms': round(datos['tiempo_db'] * 1000 / peticiones, 2),
+                    'latencia_promedio_ms': round(datos['latencia'] * 1000 / peticiones, 2),
+                    'latencia_max_ms': round(datos['latencia_max'] * 1000, 2),
+                    'peticiones_con_n_mas_1': datos['con_n_mas_1'],
+                    'ultimo_n_mas_1': datos['n_mas_1']
+                }
+            
+            lentas = [
+                {'duracion_ms': round(duracion * 1000, 2), 'forma': forma, 'endpoint': endpoint}
+                for duracion, forma, endpoint in sorted(cls._lentas, reverse=True)
+            ]
+        
+        return {
+            'desde': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(cls._desde)),
+            'endpoints': dict(sorted(endpoints.items())),
+            'sentencias_lentas': lentas
+        }
+    
+    @classmethod
+    def reiniciar(cls):
+        """Descarta lo acumulado"""
+        with cls._lock:
+            cls._endpoints = {}
+            cls._lentas = []
+            cls._desde = time.time()
+
+def _antes_de_ejecutar(conexion, cursor, sentencia, parametros, contexto, executemany):
+    conexion.info.setdefault('inicio_sentencias', []).append(time.perf_counter())
+
+def _despues_de_ejecutar(conexion, cursor, sentencia, parametros, contexto, executemany):
+    inicios = conexion.info.get('inicio_sentencias')
+    if inicios:
+        RequestMetricsSystem.registrar_sentencia(sentencia, time.perf_counter() - inicios.pop())
+
+def _al_fallar(contexto_excepcion):
+    # La sentencia falló: descartar su marca de inicio
+    conexion = contexto_excepcion.connection
+    inicios = conexion.info.get('inicio_sentencias') if conexion is not None else None
+    if inicios:
+        inicios.pop()
+
+def init_metricas(app):
+    """Registra los eventos del engine y de las peticiones (si METRICS_ENABLED)"""
+    if not config.METRICS_ENABLED:
+        return
+    
+    if not event.contains(engine, 'before_cursor_execute', _antes_de_ejecutar):
+        event.listen(engine, 'before_cursor_execute', _antes_de_ejecutar)
+        event.listen(engine, 'after_cursor_execute', _despues_de_ejecutar)
+        event.listen(engine, 'handle_error', _al_fallar)
+    
+    @app.before_request
+    def _iniciar_metricas():
+        RequestMetricsSystem.iniciar_peticion()
+    
+    @app.after_request
+    def _guardar_status(respuesta):
+        if 'metricas' in g:
+            g.metricas['status'] = respuesta.status_code
+            g.metricas['en_stream'] = respuesta.is_streamed
+        return respuesta
+    
+    @app.teardown_request
+    def _finalizar_metricas(error=None):
+        # Con stream_with_context (exportar-reporte) el teardown corre una vez
+        # al devolver la respuesta y otra al terminar el stream: se cierra en
+        # la segunda para incluir las consultas del generador
+        metricas = g.get('metricas')
+        if metricas is not None and metricas.pop('en_stream', False) and error is None:
+            return
+        RequestMetricsSystem.finalizar_peticion(error)
+
+# Funciones de utilidad para las rutas
+def obtener_metricas():
+    """Obtiene el resumen de métricas por endpoint del proceso"""
+    return RequestMetricsSystem.estadisticas()
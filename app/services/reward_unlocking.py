@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Sistema de Desbloqueo de Recompensas para TEA Edition
+Calcula las recompensas nuevas con una sola consulta (anti-join)
+y las inserta en bloque, sin importar el tamaño del catálogo
+"""
+
+from sqlalchemy import and_, exists, insert
+from app.extensions import db
+from app.models.tea_models import RecompensaTEA, LogroNino
+
+class RewardUnlockingSystem:
+    """Motor de desbloqueo de recompensas basado en conjuntos"""
+    
+    @classmethod
+    def obtener_recompensas_nuevas(cls, nino_id, puntos_totales):
+        """Recompensas alcanzadas con los puntos dados que el niño aún no tiene"""
+        ya_obtenida = exists().where(and_(
+            LogroNino.nino_id == nino_id,
+            LogroNino.recompensa_id == RecompensaTEA.id
+        ))
+        
+        return RecompensaTEA.query.filter(
+            RecompensaTEA.puntos_requeridos <= puntos_totales,
+            ~ya_obtenida
+        ).order_by(RecompensaTEA.puntos_requeridos, RecompensaTEA.id).all()
+    
+    @classmethod
+    def desbloquear_recompensas(cls, nino_id, puntos_totales, sesion_id=None):
+        """
+        Crea en bloque los LogroNino de las recompensas nuevas sin confirmar
+        la transacción. Devuelve la lista de RecompensaTEA desbloqueadas.
+        """
+        recompensas = cls.obtener_recompensas_nuevas(nino_id, puntos_totales)
+        
+        if recompensas:
+            db.session.execute(insert(LogroNino), [
+                {
+                    'nino_id': nino_id,
+                    'recompensa_id': recompensa.id,
+                    'sesion_id': sesion_id
+                } for recompensa in recompensas
+            ])
+        
+        return recompensas
+
+# Funciones de utilidad para las rutas
+def desbloquear_recompensas(nino_id, puntos_totales, sesion_id=None):
+    """Desbloquea las recompensas nuevas de un niño"""
+    return RewardUnlockingSystem.desbloquear_recompensas(nino_id, puntos_totales, sesion_id)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Planificador de Sesiones para TEA Edition
+Arma el plan de una sesión como una mochila acotada: maximiza la suma de
+scores de las actividades elegidas sin superar los minutos disponibles
+(suma de tiempo_estimado) y con un máximo de actividades por categoría.
+Se resuelve con programación dinámica sobre los minutos, tratando cada
+categoría como un grupo del que se elige una combinación.
+"""
+
+from itertools import combinations
+import config
+
+class SessionPlannerSystem:
+    """Selección de actividades de mayor score para el tiempo de una sesión"""
+    
+    @classmethod
+    def optimizar(cls, candidatos, minutos_disponibles, max_por_categoria=None):
+        """
+        Elige entre `candidatos` (diccionarios con 'actividad' y 'score') el
+        subconjunto de mayor score total que cabe en `minutos_disponibles`,
+        con a lo sumo `max_por_categoria` actividades de cada categoría.
+        Devuelve los candidatos elegidos ordenados por score.
+        """
+        max_por_categoria = max_por_categoria or config.PLAN_MAX_POR_CATEGORIA
+        minutos_disponibles = max(int(minutos_disponibles or 0), 0)
+        
+        por_categoria = {}
+        for candidato in candidatos:
+            por_categoria.setdefault(candidato['actividad'].categoria, []).append(candidato)
+        
+        # mejores[m]: (score, elegidos) de mayor score usando a lo sumo m minutos
+        mejores = [(0.0, ())] * (minutos_disponibles + 1)
+        for categoria in sorted(por_categoria):
+            opciones = cls._opciones_categoria(
+                por_categoria[categoria], minutos_disponibles, max_por_categoria
+            )
+            anteriores = mejores
+            mejores = list(anteriores)
+            for minutos, score, combinacion in opciones:
+                for m in range(minutos, minutos_disponibles + 1):
+                    score_total = anteriores[m - minutos][0] + score
+                    if score_total > mejores[m][0]:
+                        mejores[m] = (score_total, anteriores[m - minutos][1] + combinacion)
+        
+        return sorted(mejores[minutos_disponibles][1], key=lambda c: c['score'], reverse=True)
+    
+    @classmethod
+    def _opciones_categoria(cls, candidatos, minutos_disponibles, max_por_categoria):
+        """Combinaciones de hasta `max_por_categoria` de los mejores candidatos que caben"""
+        mejores = sorted(candidatos, key=lambda c: c['score'], reverse=True)
+        mejores = mejores[:config.PLAN_CANDIDATOS_POR_CATEGORIA]
+        
+        opciones = []
+        for cantidad in range(1, max_por_categoria + 1):
+            for combinacion in combinations(mejores, cantidad):
+                minutos = sum(cls.minutos(candidato) for candidato in combinacion)
+                if minutos <= minutos_disponibles:
+                    opciones.append((minutos, sum(c['score'] for c in combinacion), combinacion))
+        return opciones
+    
+    @staticmethod
+    def minutos(candidato):
+        """Minutos estimados de un candidato"""
+        return candidato['actividad'].tiempo_estimado or 0
+
+# Funciones de utilidad para las rutas
+def optimizar_plan_sesion(candidatos, minutos_disponibles, max_por_categoria=None):
+    """Obtiene los candidatos que forman el plan de mayor score"""
+    return SessionPlannerSystem.optimizar(candidatos, minutos_disponibles, max_por_categoria)
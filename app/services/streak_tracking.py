@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Sistema de Rachas (Días Consecutivos) para TEA Edition
+Mantiene la racha del niño de forma incremental al completar actividades
+y guarda en el perfil un mapa de bits compacto con un bit por día activo,
+usado para recalcular o rellenar la racha sin recorrer el historial.
+La lectura nunca consulta sesiones ni escribe en la base.
+"""
+
+from datetime import timedelta
+from app.utils.day_window import dia_local, hoy_local
+
+class StreakTrackingSystem:
+    """Motor único de días consecutivos"""
+    
+    @classmethod
+    def registrar_dia(cls, perfil, fecha=None):
+        """
+        Marca `fecha` como día activo y actualiza la racha sin confirmar
+        la transacción. Devuelve la racha resultante.
+        """
+        fecha = fecha or hoy_local()
+        ultimo_dia = cls.ultimo_dia_activo(perfil)
+        
+        cls._marcar_dia(perfil, fecha)
+        
+        if ultimo_dia == fecha and perfil.dias_consecutivos:
+            pass  # Mismo día, la racha no cambia
+        elif ultimo_dia == fecha - timedelta(days=1):
+            perfil.dias_consecutivos = (perfil.dias_consecutivos or 0) + 1
+        elif ultimo_dia is None or ultimo_dia < fecha:
+            perfil.dias_consecutivos = 1  # Se rompió la racha (o es la primera)
+        else:
+            # Día anterior al último registrado: recalcular desde el mapa
+            perfil.dias_consecutivos = cls.racha_hasta(perfil, cls.ultimo_dia_activo(perfil))
+        
+        return perfil.dias_consecutivos
+    
+    @classmethod
+    def dias_consecutivos(cls, perfil, hoy=None):
+        """Racha vigente a `hoy`: se pierde si no hubo actividad hoy ni ayer"""
+        hoy = hoy or hoy_local()
+        ultimo_dia = cls.ultimo_dia_activo(perfil)
+        
+        if ultimo_dia is None or (hoy - ultimo_dia).days > 1:
+            return 0
+        
+        return perfil.dias_consecutivos or 0
+    
+    @classmethod
+    def ultimo_dia_activo(cls, perfil):
+        """Último día con actividad según el mapa (o la fecha del perfil si no hay mapa)"""
+        if perfil.dias_actividad_inicio and perfil.dias_actividad:
+            datos = perfil.dias_actividad
+            for indice_byte in range(len(datos) - 1, -1, -1):
+                if datos[indice_byte]:
+                    indice = indice_byte * 8 + datos[indice_byte].bit_length() - 1
+                    return perfil.dias_actividad_inicio + timedelta(days=indice)
+        
+        if perfil.fecha_ultima_actividad:
+            return dia_local(perfil.fecha_ultima_actividad)
+        
+        return None
+    
+    @classmethod
+    def racha_hasta(cls, perfil, fecha):
+        """Días consecutivos activos que terminan en `fecha`, contados en el mapa"""
+        if fecha is None or not perfil.dias_actividad_inicio:
+            return 0
+        
+        datos = perfil.dias_actividad or b''
+        racha = 0
+        indice = (fecha - perfil.dias_actividad_inicio).days
+        while 0 <= indice < len(datos) * 8 and datos[indice // 8] & (1 << (indice % 8)):
+            racha += 1
+            indice -= 1
+        
+        return racha
+    
+    @classmethod
+    def dias_activos(cls, perfil):
+        """Lista ordenada de los días marcados en el mapa"""
+        if not perfil.dias_actividad_inicio or not perfil.dias_actividad:
+            return []
+        
+        return [
+            perfil.dias_actividad_inicio + timedelta(days=indice_byte * 8 + bit)
+            for indice_byte, valor in enumerate(perfil.dias_actividad)
+            for bit in range(8)
+            if valor & (1 << bit)
+        ]
+    
+    @classmethod
+    def construir_mapa(cls, fechas):
+        """Construye (inicio, bytes) a partir de un conjunto de días activos"""
+        fechas = sorted(set(fechas))
+        if not fechas:
+            return None, None
+        
+        inicio = fechas[0]
+        datos = bytearray((fechas[-1] - inicio).days // 8 + 1)
+        for fecha in fechas:
+            indice = (fecha - inicio).days
+            datos[indice // 8] |= 1 << (indice % 8)
+        
+        return inicio, bytes(datos)
+    
+    @classmethod
+    def reconstruir(cls, perfil, fechas):
+        """Reemplaza el mapa y la racha del perfil a partir de sus días activos (relleno)"""
+        perfil.dias_actividad_inicio, perfil.dias_actividad = cls.construir_mapa(fechas)
+        perfil.dias_consecutivos = cls.racha_hasta(perfil, cls.ultimo_dia_activo(perfil))
+        return perfil.dias_consecutivos
+    
+    @classmethod
+    def _marcar_dia(cls, perfil, fecha):
+        """Enciende el bit de `fecha`, ampliando el mapa si hace falta"""
+        inicio = perfil.dias_actividad_inicio
+        
+        if inicio is None or fecha < inicio:
+            inicio, datos = cls.construir_mapa(cls.dias_activos(perfil) + [fecha])
+            perfil.dias_actividad_inicio = inicio
+            perfil.dias_actividad = datos
+            return
+        
+        indice = (fecha - inicio).days
+        datos = bytearray(perfil.dias_actividad or b'')
+        if indice // 8 >= len(datos):
+            datos.extend(bytes(indice // 8 + 1 - len(datos)))
+        datos[indice // 8] |= 1 << (indice % 8)
+        perfil.dias_actividad = bytes(datos)
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Análisis de Tendencias para TEA Edition
+Carga los intentos recientes de uno o muchos niños en arreglos NumPy
+(instante, éxito, segundos, puntos) y calcula para todas las categorías a
+la vez la tasa de éxito (total y de los últimos intentos), el rendimiento
+con peso exponencial, la pendiente del rendimiento en el tiempo, la
+tendencia y la confianza. Lo usan los motores adaptativo y progresivo,
+así que ambos ven la misma tendencia.
+"""
+
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import func
+from app.extensions import db
+from app.models.tea_models import SesionActividad, SesionTEA
+from app.services.activity_catalog import ActivityCatalogSystem
+
+class TrendAnalysisSystem:
+    """Tendencia de rendimiento por niño y categoría, vectorizada"""
+    
+    VENTANA_DIAS = 14
+    # Intentos de la tasa de éxito móvil
+    VENTANA_MOVIL = 5
+    # Días en que el peso de un intento cae a la mitad
+    MEDIA_VIDA_DIAS = 3.0
+    INTENTOS_MINIMOS = 3
+    INTENTOS_CONFIANZA = 10
+    # Cambio de rendimiento a lo largo de la ventana para marcar tendencia
+    UMBRAL_TENDENCIA = 0.1
+    
+    SIN_DATOS = {
+        'intentos': 0,
+        'tasa_exito': 0.0,
+        'tasa_exito_reciente': 0.0,
+        'rendimiento_ponderado': 0.5,
+        'pendiente': 0.0,
+        'tendencia': 'estable',
+        'confianza': 0.0,
+        'puntos': 0
+    }
+    
+    @classmethod
+    def analizar_nino(cls, nino_id, ahora=None):
+        """Análisis por categoría de un niño: {categoria: resumen}"""
+        return cls.analizar_grupo([nino_id], ahora).get(nino_id, {})
+    
+    @classmethod
+    def analizar_grupo(cls, nino_ids, ahora=None):
+        """Análisis de muchos niños con una sola consulta: {nino_id: {categoria: resumen}}"""
+        ahora = ahora or datetime.utcnow()
+        intentos = cls.cargar_intentos(nino_ids, ahora - timedelta(days=cls.VENTANA_DIAS), ahora)
+        return cls.calcular(intentos)
+    
+    @classmethod
+    def cargar_intentos(cls, nino_ids, desde, ahora):
+        """
+        Intentos desde `desde` como arreglos paralelos: niño, código de
+        categoría, días hasta `ahora` (negativos), éxito, segundos y puntos
+        """
+        categorias = {
+            actividad.id: actividad.categoria
+            for actividad in ActivityCatalogSystem.listar(solo_activas=False)
+        }
+        nombres = sorted(set(categorias.values()))
+        codigos = {nombre: codigo for codigo, nombre in enumerate(nombres)}
+        
+        filas = []
+        if nino_ids:
+            filas = db.session.query(
+                SesionTEA.nino_id,
+                SesionActividad.actividad_id,
+                func.coalesce(SesionActividad.fecha_completada, SesionTEA.fecha),
+                SesionActividad.exitos,
+                SesionActividad.tiempo_dedicado,
+                SesionActividad.puntos_obtenidos,
+                SesionActividad.intentos
+            ).join(
+                SesionTEA, SesionActividad.sesion_id == SesionTEA.id
+            ).filter(
+                SesionTEA.nino_id.in_(list(nino_ids)),
+                SesionTEA.fecha >= desde
+            ).all()
+        
+        # Actividades que ya no están en el catálogo no tienen categoría
+        filas = [fila for fila in filas if fila[1] in categorias and fila[2] is not None]
+        
+        return {
+            'nino': np.array([fila[0] for fila in filas], dtype=np.int64),
+            'categoria': np.array([codigos[categorias[fila[1]]] for fila in filas], dtype=np.int64),
+            'dias': np.array(
+                [(fila[2] - ahora).total_seconds() / 86400 for fila in filas], dtype=np.float64
+            ),
+            # exitos y tiempo_dedicado suman todos los intentos del renglón
+            'exito': np.array([(fila[3] or 0) / (fila[6] or 1) for fila in filas], dtype=np.float64),
+            'segundos': np.array([(fila[4] or 0) / (fila[6] or 1) for fila in filas], dtype=np.float64),
+            'puntos': np.array([fila[5] or 0 for fila in filas], dtype=np.float64),
+            'nombres_categoria': nombres
+        }
+    
+    @classmethod
+    def calcular(cls, intentos):
+        """Métricas por (niño, categoría) a partir de los arreglos de cargar_intentos"""
+        if not len(intentos['nino']):
+            return {}
+        
+        total_categorias = max(len(intentos['nombres_categoria']), 1)
+        claves, grupo = np.unique(
+            intentos['nino'] * total_categorias + intentos['categoria'], return_inverse=True
+        )
+        
+        x = intentos['dias']
+        exito = intentos['exito']
+        # Rendimiento por intento, con la misma fórmula que el motor adaptativo
+        y = exito * 0.7 + (1 - np.minimum(intentos['segundos'] / 300, 1)) * 0.3
+        
+        def suma(valores):
+            return np.bincount(grupo, weights=valores, minlength=len(claves))
+        
+        n = np.bincount(grupo, minlength=len(claves)).astype(np.float64)
+        tasa_exito = suma(exito) / n
+        
+        # Rendimiento con peso exponencial: los intentos recientes pesan más
+        pesos = 0.5 ** (-x / cls.MEDIA_VIDA_DIAS)
+        rendimiento_ponderado = suma(pesos * y) / suma(pesos)
+        
+        # Pendiente por mínimos cuadrados del rendimiento en el tiempo (por día)
+        sx, sy, sxy, sxx = suma(x), suma(y), suma(x * y), suma(x * x)
+        denominador = n * sxx - sx * sx
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pendiente = np.where(denominador > 1e-9, (n * sxy - sx * sy) / denominador, 0.0)
+        
+        # Tasa de éxito de los últimos VENTANA_MOVIL intentos de cada grupo
+        orden = np.lexsort((x, grupo))
+        acumulado = np.concatenate(([0.0], np.cumsum(exito[orden])))
+        fin = np.cumsum(n).astype(np.int64)
+        inicio = np.maximum(fin - cls.VENTANA_MOVIL, fin - n.astype(np.int64))
+        tasa_reciente = (acumulado[fin] - acumulado[inicio]) / (fin - inicio)
+        
+        cambio = pendiente * cls.VENTANA_DIAS
+        suficientes = n >= cls.INTENTOS_MINIMOS
+        tendencia = np.where(
+            suficientes & (cambio >= cls.UMBRAL_TENDENCIA), 'mejorando',
+            np.where(suficientes & (cambio <= -cls.UMBRAL_TENDENCIA), 'dificultad', 'estable')
+        )
+        confianza = np.minimum(n / cls.INTENTOS_CONFIANZA, 1.0)
+        puntos = suma(intentos['puntos'])
+        
+        resultados = {}
+        for indice, clave in enumerate(claves.tolist()):
+            nino_id, codigo = divmod(clave, total_categorias)
+            resultados.setdefault(nino_id, {})[intentos['nombres_categoria'][codigo]] = {
+                'intentos': int(n[indice]),
+                'tasa_exito': float(tasa_exito[indice]),
+                'tasa_exito_reciente': float(tasa_reciente[indice]),
+                'rendimiento_ponderado': float(rendimiento_ponderado[indice]),
+                'pendiente': float(pendiente[indice]),
+                'tendencia': str(tendencia[indice]),
+                'confianza': float(confianza[indice]),
+                'puntos': int(puntos[indice])
+            }
+        return resultados
+
+# Funciones de utilidad para las rutas
+def obtener_tendencias_nino(nino_id):
+    """Obtiene la tendencia de rendimiento por categoría de un niño"""
+    return TrendAnalysisSystem.analizar_nino(nino_id)
@@ -10,6 +10,8 @@ from app.extensions import db
 from app.models.tea_models import (
     PerfilNino, ActividadTEA, ProgresoUsuario, MedallaUsuario
 )
+from app.services.streak_tracking import StreakTrackingSystem
+from app.services.activity_catalog import ActivityCatalogSystem
 
 class UserProgressSystem:
     """Sistema de progreso real del usuario"""
@@ -68,6 +70,11 @@ class UserProgressSystem:
         }
     }
     
+    @classmethod
+    def consulta_progresos(cls, nino_id):
+        """Consulta (sin ejecutar) de los ProgresoUsuario de un niño"""
+        return ProgresoUsuario.query.filter_by(nino_id=nino_id)
+    
     @classmethod
     def inicializar_progreso_categoria(cls, nino_id, categoria):
         """Inicializa el progreso para una categoría específica"""
@@ -77,33 +84,62 @@ class UserProgressSystem:
         ).first()
         
         if not progreso:
-            progreso = ProgresoUsuario(
-                nino_id=nino_id,
-                categoria=categoria,
-                nivel_actual='inicial',
-                actividades_totales=cls.ACTIVIDADES_POR_CATEGORIA.get(categoria, 0)
-            )
-            db.session.add(progreso)
+            progreso = cls._crear_progreso_categoria(nino_id, categoria)
             db.session.commit()
         
         return progreso
     
+    @classmethod
+    def _crear_progreso_categoria(cls, nino_id, categoria):
+        """Crea el progreso de una categoría sin confirmar la transacción"""
+        progreso = ProgresoUsuario(
+            nino_id=nino_id,
+            categoria=categoria,
+            nivel_actual='inicial',
+            actividades_completadas=0,
+            puntos_categoria=0,
+            actividades_totales=cls.ACTIVIDADES_POR_CATEGORIA.get(categoria, 0)
+        )
+        db.session.add(progreso)
+        return progreso
+    
     @classmethod
     def actualizar_progreso_actividad(cls, nino_id, actividad_id, puntos_obtenidos):
         """Actualiza el progreso después de completar una actividad"""
-        actividad = ActividadTEA.query.get(actividad_id)
+        actividad = ActivityCatalogSystem.obtener(actividad_id)
         if not actividad:
             return False
         
+        progresos = {
+            progreso.categoria: progreso
+            for progreso in cls.consulta_progresos(nino_id).all()
+        }
+        medallas = cls.obtener_medallas_existentes(nino_id)
+        
+        cls.registrar_actividad(nino_id, actividad, puntos_obtenidos, progresos, medallas)
+        
+        db.session.commit()
+        return True
+    
+    @classmethod
+    def registrar_actividad(cls, nino_id, actividad, puntos_obtenidos, progresos, medallas):
+        """
+        Aplica una actividad completada al progreso sin confirmar la transacción.
+        `progresos` (categoria -> ProgresoUsuario) y `medallas` (conjunto de
+        (tipo_medalla, categoria)) vienen precargados y se actualizan en sitio.
+        """
         categoria = actividad.categoria
         
         # Inicializar progreso si no existe
-        progreso = cls.inicializar_progreso_categoria(nino_id, categoria)
+        progreso = progresos.get(categoria)
+        if not progreso:
+            progreso = cls._crear_progreso_categoria(nino_id, categoria)
+            progresos[categoria] = progreso
         
         # Actualizar estadísticas
         progreso.actividades_completadas += 1
         progreso.puntos_categoria += puntos_obtenidos
-        progreso.ultima_actividad_id = actividad_id
+        progreso.ultima_actividad_id = actividad.id
         progreso.fecha_ultima_actividad = datetime.utcnow()
         progreso.fecha_actualizacion = datetime.utcnow()
         
@@ -111,10 +147,19 @@ class UserProgressSystem:
         cls._actualizar_nivel_progresion(progreso)
         
         # Verificar medallas
-        cls._verificar_medallas(nino_id, categoria, progreso)
+        puntos_totales = sum(prog.puntos_categoria or 0 for prog in progresos.values())
+        cls._verificar_medallas(nino_id, categoria, progreso, puntos_totales, medallas)
         
-        db.session.commit()
-        return True
+        return progreso
+    
+    @classmethod
+    def obtener_medallas_existentes(cls, nino_id):
+        """Obtiene las medallas ya otorgadas como conjunto de (tipo_medalla, categoria)"""
+        filas = db.session.query(
+            MedallaUsuario.tipo_medalla,
+            MedallaUsuario.categoria
+        ).filter(MedallaUsuario.nino_id == nino_id).all()
+        return {(tipo, categoria) for tipo, categoria in filas}
     
     @classmethod
     def _actualizar_nivel_progresion(cls, progreso):
@@ -133,31 +178,30 @@ class UserProgressSystem:
             progreso.nivel_actual = 'inicial'
     
     @classmethod
-    def _verificar_medallas(cls, nino_id, categoria, progreso):
+    def _verificar_medallas(cls, nino_id, categoria, progreso, puntos_totales, medallas):
         """Verifica y otorga medallas según el progreso"""
         # Medalla por primera actividad
         if progreso.actividades_completadas == 1:
-            cls._otorgar_medalla(nino_id, 'primera_actividad', categoria)
+            cls._otorgar_medalla(nino_id, 'primera_actividad', medallas, categoria)
         
         # Medalla por iniciar categoría
         if progreso.actividades_completadas == 1:
-            cls._otorgar_medalla(nino_id, 'categoria_iniciada', categoria)
+            cls._otorgar_medalla(nino_id, 'categoria_iniciada', medallas, categoria)
         
         # Medalla por completar categoría
         if progreso.actividades_completadas >= progreso.actividades_totales:
-            cls._otorgar_medalla(nino_id, 'categoria_completa', categoria)
+            cls._otorgar_medalla(nino_id, 'categoria_completa', medallas, categoria)
         
         # Medallas por puntos acumulados
-        puntos_totales = cls._obtener_puntos_totales(nino_id)
-        if puntos_totales >= 100 and not cls._tiene_medalla(nino_id, 'puntos_100'):
-            cls._otorgar_medalla(nino_id, 'puntos_100')
-        elif puntos_totales >= 500 and not cls._tiene_medalla(nino_id, 'puntos_500'):
-            cls._otorgar_medalla(nino_id, 'puntos_500')
+        if puntos_totales >= 100 and not cls._tiene_medalla(medallas, 'puntos_100'):
+            cls._otorgar_medalla(nino_id, 'puntos_100', medallas)
+        elif puntos_totales >= 500 and not cls._tiene_medalla(medallas, 'puntos_500'):
+            cls._otorgar_medalla(nino_id, 'puntos_500', medallas)
     
     @classmethod
-    def _otorgar_medalla(cls, nino_id, tipo_medalla, categoria=None):
-        """Otorga una medalla al usuario"""
-        if cls._tiene_medalla(nino_id, tipo_medalla, categoria):
+    def _otorgar_medalla(cls, nino_id, tipo_medalla, medallas, categoria=None):
+        """Otorga una medalla al usuario (sin confirmar la transacción)"""
+        if cls._tiene_medalla(medallas, tipo_medalla, categoria):
             return  # Ya tiene esta medalla
         
         config_medalla = cls.TIPOS_MEDALLAS.get(tipo_medalla)
@@ -175,25 +219,19 @@ class UserProgressSystem:
         )
         
         db.session.add(medalla)
-        db.session.commit()
+        medallas.add((tipo_medalla, categoria))
     
     @classmethod
-    def _tiene_medalla(cls, nino_id, tipo_medalla, categoria=None):
+    def _tiene_medalla(cls, medallas, tipo_medalla, categoria=None):
         """Verifica si el usuario ya tiene una medalla específica"""
-        query = MedallaUsuario.query.filter_by(
-            nino_id=nino_id,
-            tipo_medalla=tipo_medalla
-        )
-        
         if categoria:
-            query = query.filter_by(categoria=categoria)
-        
-        return query.first() is not None
+            return (tipo_medalla, categoria) in medallas
+        return any(tipo == tipo_medalla for tipo, _ in medallas)
     
     @classmethod
     def _obtener_puntos_totales(cls, nino_id):
         """Obtiene los puntos totales del usuario"""
-        progresos = ProgresoUsuario.query.filter_by(nino_id=nino_id).all()
+        progresos = cls.consulta_progresos(nino_id).all()
         return sum(prog.puntos_categoria for prog in progresos)
     
     @classmethod
@@ -207,8 +245,13 @@ class UserProgressSystem:
         if not progreso:
             progreso = cls.inicializar_progreso_categoria(nino_id, categoria)
         
+        return cls._resumir_progreso_categoria(progreso)
+    
+    @classmethod
+    def _resumir_progreso_categoria(cls, progreso):
+        """Convierte un ProgresoUsuario en el diccionario usado por las vistas"""
         return {
-            'categoria': categoria,
+            'categoria': progreso.categoria,
             'nivel_actual': progreso.nivel_actual,
             'actividades_completadas': progreso.actividades_completadas,
             'actividades_totales': progreso.actividades_totales,
@@ -220,15 +263,31 @@ class UserProgressSystem:
     @classmethod
     def obtener_progreso_completo(cls, nino_id):
         """Obtiene el progreso completo del usuario"""
-        categorias = ['lenguaje', 'numeros', 'colores', 'animales']
+        progresos = {
+            progreso.categoria: progreso
+            for progreso in cls.consulta_progresos(nino_id).all()
+        }
+        
+        # Inicializar las categorías que aún no tienen progreso
+        faltantes = [c for c in cls.ACTIVIDADES_POR_CATEGORIA if c not in progresos]
+        for categoria in faltantes:
+            progresos[categoria] = cls._crear_progreso_categoria(nino_id, categoria)
+        if faltantes:
+            db.session.commit()
+        
+        return cls._construir_progreso_completo(progresos)
+    
+    @classmethod
+    def _construir_progreso_completo(cls, progresos):
+        """Construye el progreso completo a partir de los ProgresoUsuario ya cargados"""
         progreso_completo = {}
         
-        for categoria in categorias:
-            progreso_completo[categoria] = cls.obtener_progreso_categoria(nino_id, categoria)
+        for categoria in cls.ACTIVIDADES_POR_CATEGORIA:
+            progreso_completo[categoria] = cls._resumir_progreso_categoria(progresos[categoria])
         
         # Estadísticas generales
         progreso_completo['estadisticas_generales'] = {
-            'puntos_totales': cls._obtener_puntos_totales(nino_id),
+            'puntos_totales': sum(prog.puntos_categoria or 0 for prog in progresos.values()),
             'actividades_totales_completadas': sum(
                 prog['actividades_completadas'] for prog in progreso_completo.values()
                 if isinstance(prog, dict) and 'actividades_completadas' in prog
@@ -286,20 +345,31 @@ class UserProgressSystem:
     
     @classmethod
     def obtener_estadisticas_dashboard(cls, nino_id):
-        """Obtiene estadísticas para el dashboard del niño"""
+        """Obtiene estadísticas para el dashboard del niño (servidas desde la caché)"""
+        from app.services.learner_state import LearnerStateSystem
+        return LearnerStateSystem.obtener_estado(nino_id)
+    
+    @classmethod
+    def calcular_estadisticas_dashboard(cls, nino_id):
+        """Calcula desde la base de datos las estadísticas del dashboard del niño"""
         progreso_completo = cls.obtener_progreso_completo(nino_id)
         medallas = cls.obtener_medallas_usuario(nino_id)
         
         # Calcular días consecutivos (simplificado)
         dias_consecutivos = cls._calcular_dias_consecutivos(nino_id)
         
+        return cls._construir_estadisticas(progreso_completo, len(medallas), dias_consecutivos)
+    
+    @classmethod
+    def _construir_estadisticas(cls, progreso_completo, medallas_obtenidas, dias_consecutivos):
+        """Arma el diccionario de estadísticas del dashboard"""
         return {
             'puntos_totales': progreso_completo['estadisticas_generales']['puntos_totales'],
             'actividades_completadas': progreso_completo['estadisticas_generales']['actividades_totales_completadas'],
             'categorias_completadas': progreso_completo['estadisticas_generales']['categorias_completadas'],
             'nivel_general': progreso_completo['estadisticas_generales']['nivel_general'],
             'dias_consecutivos': dias_consecutivos,
-            'medallas_obtenidas': len(medallas),
+            'medallas_obtenidas': medallas_obtenidas,
             'progreso_por_categoria': {
                 cat: prog for cat, prog in progreso_completo.items()
                 if isinstance(prog, dict) and 'categoria' in prog
@@ -308,47 +378,12 @@ class UserProgressSystem:
     
     @classmethod
     def _calcular_dias_consecutivos(cls, nino_id):
-        """Calcula los días consecutivos de actividad"""
-        try:
-            from datetime import datetime, timedelta
-            from app.models.tea_models import SesionTEA
-            
-            # Obtener las últimas sesiones del niño
-            sesiones = SesionTEA.query.filter_by(
-                nino_id=nino_id,
-                estado='completada'
-            ).order_by(desc(SesionTEA.fecha)).all()
-            
-            if not sesiones:
-                return 0
-            
-            # Calcular días consecutivos
-            dias_consecutivos = 0
-            fecha_actual = datetime.utcnow().date()
-            
-            for sesion in sesiones:
-                fecha_sesion = sesion.fecha.date()
-                diferencia_dias = (fecha_actual - fecha_sesion).days
-                
-                if diferencia_dias == dias_consecutivos:
-                    dias_consecutivos += 1
-                    fecha_actual = fecha_sesion
-                elif diferencia_dias == dias_consecutivos + 1:
-                    dias_consecutivos += 1
-                    fecha_actual = fecha_sesion
-                else:
-                    break
-            
-            # Actualizar el perfil del niño
-            nino = PerfilNino.query.get(nino_id)
-            if nino:
-                nino.dias_consecutivos = dias_consecutivos
-                nino.fecha_ultima_actividad = datetime.utcnow()
-                db.session.commit()
-            
-            return dias_consecutivos
-        except Exception as e:
+        """Días consecutivos de actividad (leídos del perfil, sin recorrer el historial)"""
+        nino = PerfilNino.query.get(nino_id)
+        if not nino:
             return 0
+        
+        return StreakTrackingSystem.dias_consecutivos(nino)
 
 # Funciones de utilidad para las rutas
 def actualizar_progreso_actividad(nino_id, actividad_id, puntos_obtenidos):
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Caché en memoria del proceso — LRU acotada con expiración (TTL).
+Cada worker de gunicorn mantiene su propia copia; el TTL limita
+cuánto puede quedar desactualizada respecto a otros workers.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """Caché LRU con tamaño máximo y tiempo de vida por entrada"""
+    
+    def __init__(self, capacidad=1024, ttl_segundos=60):
+        self.capacidad = capacidad
+        self.ttl_segundos = ttl_segundos
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+    
+    def obtener(self, clave, defecto=None):
+        """Devuelve el valor vigente de `clave` o `defecto` si no existe o expiró"""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return defecto
+            
+            valor, expira = entrada
+            if expira < time.monotonic():
+                del self._datos[clave]
+                self.fallos += 1
+                return defecto
+            
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+    
+    def guardar(self, clave, valor):
+        """Guarda `valor` y descarta la entrada menos usada si se supera la capacidad"""
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic() + self.ttl_segundos)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.capacidad:
+                self._datos.popitem(last=False)
+    
+    def invalidar(self, clave):
+        """Elimina una entrada si existe"""
+        with self._lock:
+            self._datos.pop(clave, None)
+    
+    def limpiar(self):
+        """Elimina todas las entradas"""
+        with self._lock:
+            self._datos.clear()
+    
+    def estadisticas(self):
+        """Tamaño actual y tasa de aciertos"""
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._datos),
+                'capacidad': self.capacidad,
+                'ttl_segundos': self.ttl_segundos,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': round(self.aciertos / total, 3) if total else 0
+            }
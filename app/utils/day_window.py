@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Ventanas de día para las consultas TEA
+Las marcas de tiempo se guardan en UTC sin zona (datetime.utcnow). Estas
+funciones convierten días del calendario local (config.LOCAL_TZ) en rangos
+semiabiertos [inicio, fin) de esas marcas, para filtrar con comparaciones
+que aprovechan los índices en lugar de func.date(columna) == dia.
+"""
+
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import and_, func
+import config
+
+def zona_local():
+    """Zona horaria del despliegue"""
+    return ZoneInfo(config.LOCAL_TZ)
+
+def dia_local(instante):
+    """Día local de una marca de tiempo UTC sin zona"""
+    return instante.replace(tzinfo=timezone.utc).astimezone(zona_local()).date()
+
+def hoy_local():
+    """Día actual en la zona local"""
+    return dia_local(datetime.utcnow())
+
+def inicio_dia(dia):
+    """Medianoche local de `dia` como marca de tiempo UTC sin zona"""
+    medianoche = datetime.combine(dia, time.min, tzinfo=zona_local())
+    return medianoche.astimezone(timezone.utc).replace(tzinfo=None)
+
+def ventana_dias(desde, hasta=None):
+    """Rango [inicio, fin) en UTC que cubre los días locales desde..hasta (inclusive)"""
+    hasta = hasta or desde
+    return inicio_dia(desde), inicio_dia(hasta + timedelta(days=1))
+
+def en_dia(columna, dia):
+    """Condición `columna` dentro del día local `dia`"""
+    inicio, fin = ventana_dias(dia)
+    return and_(columna >= inicio, columna < fin)
+
+def filtrar_dias(consulta, columna, desde=None, hasta=None):
+    """Filtra la consulta a los días locales [desde, hasta]; ambos extremos son opcionales"""
+    if desde:
+        consulta = consulta.filter(columna >= inicio_dia(desde))
+    if hasta:
+        consulta = consulta.filter(columna < inicio_dia(hasta + timedelta(days=1)))
+    return consulta
+
+def dia_local_sql(columna, dialecto):
+    """
+    Expresión SQL con el día local de `columna`, para agrupar por día en
+    procesos de reconstrucción (no para filtrar: ahí se usan los rangos).
+    En PostgreSQL la conversión es exacta; en otros motores se aplica el
+    desplazamiento actual de la zona, exacto en zonas sin horario de verano.
+    """
+    if dialecto == 'postgresql':
+        return func.date(func.timezone(config.LOCAL_TZ, func.timezone('UTC', columna)))
+    
+    segundos = int(datetime.now(zona_local()).utcoffset().total_seconds())
+    if dialecto == 'sqlite':
+        return func.date(columna, f'{segundos:+d} seconds')
+    
+    return func.date(columna + timedelta(seconds=segundos))
@@ -12,7 +12,6 @@ try:
 except ImportError:
     from backports.zoneinfo import ZoneInfo  # py38
 
-from googleapiclient.discovery import build
 
 # Zona horaria desde config; usa America/Panama por defecto
 try:
@@ -63,6 +62,8 @@ def get_events_range(
     Lee eventos desde start_date 00:00 hasta (start_date + days-1) 23:59:59 del calendario indicado.
     Retorna: {"YYYY-MM-DD": [ {hora, actividad, categoria, done}, ... ], ...}
     """
+    # googleapiclient tarda en importarse: solo se carga al consultar el calendario
+    from googleapiclient.discovery import build
     service = build("calendar", "v3", credentials=creds)
     tz = ZoneInfo(LOCAL_TZ)
 
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para medir los endpoints principales de TEA Edition con datos sintéticos
+Uso: python benchmark_endpoints.py [ninos] [dias] [peticiones] [archivo.json]
+     Genera (con semilla fija) `ninos` perfiles con `dias` días de sesiones,
+     recorre los endpoints con el cliente de pruebas de Flask y guarda
+     p50/p95/p99, consultas por petición y throughput en JSON.
+     Por defecto: 100 niños, 90 días, 200 peticiones por endpoint.
+Comparar: python benchmark_endpoints.py comparar base.json nuevo.json [tolerancia_%]
+     Muestra las diferencias por endpoint y sale con código 1 si alguna
+     latencia p95 o el promedio de consultas empeora más que la tolerancia (10%).
+Variables de entorno:
+     BENCHMARK_DATABASE_URL  base a usar (por defecto SQLite en el directorio
+                             temporal; nunca la DATABASE_URL de la aplicación)
+     BENCHMARK_SEMILLA       semilla de la población y de las peticiones (42)
+     BENCHMARK_REUSAR=1      medir sobre la población ya generada
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# La base del benchmark se elige antes de importar config/app
+os.environ['DATABASE_URL'] = os.environ.get(
+    'BENCHMARK_DATABASE_URL',
+    'sqlite:///' + os.path.join(tempfile.gettempdir(), 'benchmark_tea.db')
+)
+os.environ.setdefault('DB_AUTO_CREATE', '1')
+
+CATEGORIAS = ['lenguaje', 'numeros', 'colores', 'animales']
+ACTIVIDADES_POR_NIVEL = 4
+NINOS_POR_PADRE = 20
+PROBABILIDAD_SESION = 0.6
+PETICIONES_CALENTAMIENTO = 5
+TAMANO_LOTE = 5000
+
+# (nombre, método, ruta); {nino_id} y {actividad_id} se completan por petición
+ENDPOINTS = [
+    ('completar', 'post', '/tea/actividades/api/completar/{actividad_id}'),
+    ('recomendaciones', 'get', '/tea/actividades/api/recomendaciones'),
+    ('plan_sesion', 'get', '/tea/actividades/api/plan-sesion'),
+    ('mapa_zonas', 'get', '/tea/actividades/api/mapa-zonas'),
+    ('padres_estadisticas', 'get', '/tea/padres/api/estadisticas'),
+    ('padres_progreso_semanal', 'get', '/tea/padres/api/progreso-semanal'),
+    ('padres_habilidades', 'get', '/tea/padres/api/estadisticas-habilidades'),
+    ('padres_exportar_reporte', 'get', '/tea/padres/api/exportar-reporte'),
+    ('padres_caseload', 'get', '/tea/padres/api/caseload'),
+    ('padres_planes_sesion', 'get', '/tea/padres/api/planes-sesion'),
+]
+
+def _insertar(db, modelo, filas):
+    """Inserta en lotes con INSERT de varias filas"""
+    from sqlalchemy import insert
+    for inicio in range(0, len(filas), TAMANO_LOTE):
+        db.session.execute(insert(modelo), filas[inicio:inicio + TAMANO_LOTE])
+
+def _sincronizar_secuencias(db, modelos):
+    """En PostgreSQL, las secuencias deben seguir a los ids asignados a mano"""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    from sqlalchemy import text
+    for modelo in modelos:
+        tabla = modelo.__tablename__
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{tabla}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {tabla}), 1))"
+        ))
+
+def generar_poblacion(app, ninos, dias, semilla):
+    """Crea de cero catálogo, padres, niños e historial de sesiones"""
+    from app.extensions import db
+    from app.models.tea_models import (
+        PerfilNino, UsuarioPadre, ActividadTEA, SesionTEA, SesionActividad,
+        ProgresoUsuario, RecompensaTEA, Avatar
+    )
+    from app.services.permanent_progression import PermanentProgressionSystem
+    from app.services.daily_rollup import DailyRollupSystem
+    from app.services.streak_tracking import StreakTrackingSystem
+    from app.utils.day_window import hoy_local, inicio_dia, dia_local
+
+    rng = random.Random(semilla)
+    niveles = PermanentProgressionSystem.NIVELES_PROGRESION
+    umbral_exito = PermanentProgressionSystem.UMBRAL_EXITO
+    inicio = time.perf_counter()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        # Catálogo: ACTIVIDADES_POR_NIVEL actividades por categoría y nivel
+        actividades = []
+        por_nivel = {}
+        for categoria in CATEGORIAS:
+            for nivel in niveles:
+                for numero in range(ACTIVIDADES_POR_NIVEL):
+                    actividad = {
+                        'id': len(actividades) + 1,
+                        'titulo': f'{categoria.title()} {nivel} #{numero + 1}',
+                        'descripcion': 'Actividad sintética para benchmark',
+                        'tipo': 'imitacion',
+                        'nivel_dificultad': nivel,
+                        'categoria': categoria,
+                        'contenido': {
+                            'palabras': ['mamá', 'papá', 'agua', 'casa'],
+                            'instrucciones': 'Repite la palabra que escuches'
+                        },
+                        'puntos_recompensa': 10 + 5 * niveles.index(nivel),
+                        'tiempo_estimado': 5,
+                        'activa': True
+                    }
+                    actividades.append(actividad)
+                    por_nivel.setdefault((categoria, nivel), []).append(actividad)
+        _insertar(db, ActividadTEA, actividades)
+
+        _insertar(db, RecompensaTEA, [
+            {'nombre': f'Recompensa {puntos}', 'tipo': 'estrella', 'puntos_requeridos': puntos}
+            for puntos in (50, 200, 1000, 5000)
+        ])
+        _insertar(db, Avatar, [{'nombre': 'Spider-Man', 'tipo': 'superheroe', 'activo': True}])
+
+        padres = [
+            {
+                'id': numero + 1,
+                'nombre': f'Padre {numero + 1}',
+                'email': f'padre{numero + 1}@benchmark.local',
+                'password_hash': 'pbkdf2:sha256:260000$test$test'
+            }
+            for numero in range((ninos + NINOS_POR_PADRE - 1) // NINOS_POR_PADRE)
+        ]
+        _insertar(db, UsuarioPadre, padres)
+
+        hoy = hoy_local()
+        perfiles, sesiones, registros, progresos = [], [], [], []
+        dias_por_nino = {}
+
+        for numero in range(ninos):
+            nino_id = numero + 1
+            # Cada niño avanza a su ritmo: nivel más alto alcanzado al final del periodo
+            nivel_final = rng.randint(0, len(niveles) - 1)
+            totales = {'puntos': 0, 'completadas': 0, 'exitosas': 0}
+            por_categoria = {categoria: {'ids': set(), 'puntos': 0, 'ultima': None} for categoria in CATEGORIAS}
+            ultima_fecha = None
+
+            for dia_numero in range(dias):
+                if rng.random() > PROBABILIDAD_SESION:
+                    continue
+
+                dia = hoy - timedelta(days=dias - 1 - dia_numero)
+                fecha = inicio_dia(dia) + timedelta(hours=rng.randint(9, 19), minutes=rng.randint(0, 59))
+                nivel = niveles[nivel_final * dia_numero // max(dias - 1, 1)]
+                elegidas = rng.sample(
+                    [a for categoria in CATEGORIAS for a in por_nivel[(categoria, nivel)]],
+                    rng.randint(2, 5)
+                )
+
+                sesion_id = len(sesiones) + 1
+                puntos_sesion = 0
+                for orden, actividad in enumerate(elegidas, 1):
+                    puntos = rng.randint(actividad['puntos_recompensa'] // 2, actividad['puntos_recompensa'])
+                    completada_en = fecha + timedelta(minutes=3 * orden)
+                    exitosa = puntos >= actividad['puntos_recompensa'] * umbral_exito
+                    registros.append({
+                        'sesion_id': sesion_id,
+                        'actividad_id': actividad['id'],
+                        'orden': orden,
+                        'completada': True,
+                        'intentos': 1,
+                        'exitos': 1 if exitosa else 0,
+                        'tiempo_dedicado': rng.randint(60, 400),
+                        'puntos_obtenidos': puntos,
+                        'fecha_completada': completada_en
+                    })
+                    puntos_sesion += puntos
+                    totales['completadas'] += 1
+                    if exitosa:
+                        totales['exitosas'] += 1
+                    datos = por_categoria[actividad['categoria']]
+                    datos['ids'].add(actividad['id'])
+                    datos['puntos'] += puntos
+                    datos['ultima'] = (actividad['id'], completada_en)
+
+                totales['puntos'] += puntos_sesion
+                ultima_fecha = fecha + timedelta(minutes=3 * len(elegidas))
+                dias_por_nino.setdefault(nino_id, []).append(dia_local(fecha))
+                sesiones.append({
+                    'id': sesion_id,
+                    'nino_id': nino_id,
+                    'fecha': fecha,
+                    'duracion_minutos': 3 * len(elegidas),
+                    'actividades_completadas': len(elegidas),
+                    'puntos_ganados': puntos_sesion,
+                    'estado': 'completada'
+                })
+
+            perfiles.append({
+                'id': nino_id,
+                'nombre': f'Niño {nino_id}',
+                'edad': rng.randint(3, 12),
+                'nivel_dificultad': 'basico',
+                'tiempo_sesion_min': rng.choice([10, 15, 20, 30]),
+                'nivel_inicial_configurado': 'inicial',
+                'nivel_progresion_actual': niveles[nivel_final],
+                'nivel_maximo_alcanzado': niveles[nivel_final],
+                'puntos_totales_acumulados': totales['puntos'],
+                'actividades_completadas_total': totales['completadas'],
+                'actividades_exitosas_total': totales['exitosas'],
+                'fecha_ultima_actividad': ultima_fecha,
+                'padre_id': numero // NINOS_POR_PADRE + 1,
+                'activo': True
+            })
+            for categoria, datos in por_categoria.items():
+                progresos.append({
+                    'nino_id': nino_id,
+                    'categoria': categoria,
+                    'nivel_actual': niveles[nivel_final],
+                    'actividades_completadas': len(datos['ids']),
+                    'actividades_totales': len(niveles) * ACTIVIDADES_POR_NIVEL,
+                    'puntos_categoria': datos['puntos'],
+                    'ultima_actividad_id': datos['ultima'][0] if datos['ultima'] else None,
+                    'fecha_ultima_actividad': datos['ultima'][1] if datos['ultima'] else None
+                })
+
+        _insertar(db, PerfilNino, perfiles)
+        _insertar(db, SesionTEA, sesiones)
+        _insertar(db, SesionActividad, registros)
+        _insertar(db, ProgresoUsuario, progresos)
+        _sincronizar_secuencias(db, [ActividadTEA, UsuarioPadre, PerfilNino, SesionTEA])
+
+        # Resumen diario y rachas con los mismos procesos de reconstrucción del proyecto
+        DailyRollupSystem.reconstruir()
+        for perfil in PerfilNino.query.all():
+            StreakTrackingSystem.reconstruir(perfil, dias_por_nino.get(perfil.id, []))
+        db.session.commit()
+
+    return {
+        'ninos': ninos,
+        'dias': dias,
+        'padres': len(padres),
+        'actividades': len(actividades),
+        'sesiones': len(sesiones),
+        'sesion_actividades': len(registros),
+        'segundos_generacion': round(time.perf_counter() - inicio, 1)
+    }
+
+def describir_poblacion(app):
+    """Conteos de la población existente (modo BENCHMARK_REUSAR)"""
+    from app.models.tea_models import PerfilNino, UsuarioPadre, ActividadTEA, SesionTEA, SesionActividad
+    with app.app_context():
+        return {
+            'ninos': PerfilNino.query.count(),
+            'padres': UsuarioPadre.query.count(),
+            'actividades': ActividadTEA.query.count(),
+            'sesiones': SesionTEA.query.count(),
+            'sesion_actividades': SesionActividad.query.count(),
+            'reutilizada': True
+        }
+
+def _percentil(valores, percentil):
+    """Percentil con interpolación lineal sobre valores ordenados"""
+    if len(valores) == 1:
+        return valores[0]
+    posicion = (len(valores) - 1) * percentil / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(valores) - 1)
+    return valores[inferior] + (valores[superior] - valores[inferior]) * (posicion - inferior)
+
+def medir_endpoints(app, peticiones, semilla):
+    """Recorre cada endpoint con niños al azar y devuelve sus estadísticas"""
+    from sqlalchemy import event
+    from app.extensions import db
+    from app.models.tea_models import PerfilNino, ActividadTEA
+
+    rng = random.Random(semilla + 1)
+    with app.app_context():
+        ninos = db.session.query(PerfilNino.id, PerfilNino.padre_id, PerfilNino.nivel_progresion_actual).all()
+        actividades = {}
+        for actividad_id, nivel in db.session.query(ActividadTEA.id, ActividadTEA.nivel_dificultad):
+            actividades.setdefault(nivel, []).append(actividad_id)
+        engine = db.engine
+
+    consultas = [0]
+    def contar(*args, **kwargs):
+        consultas[0] += 1
+    event.listen(engine, 'before_cursor_execute', contar)
+
+    cliente = app.test_client()
+    resultados = {}
+    try:
+        for nombre, metodo, ruta in ENDPOINTS:
+            tiempos, conteos, errores = [], [], 0
+            inicio_endpoint = None
+
+            for numero in range(PETICIONES_CALENTAMIENTO + peticiones):
+                nino_id, padre_id, nivel = rng.choice(ninos)
+                with cliente.session_transaction() as sesion:
+                    sesion['user_id'] = padre_id
+                    sesion['user_type'] = 'padre'
+                    sesion['nino_id'] = nino_id
+
+                url = ruta.format(nino_id=nino_id, actividad_id=rng.choice(actividades.get(nivel) or [1]))
+                opciones = {'json': {'tiempo_dedicado': rng.randint(60, 400)}} if metodo == 'post' else {}
+
+                if numero == PETICIONES_CALENTAMIENTO:
+                    inicio_endpoint = time.perf_counter()
+                consultas[0] = 0
+                inicio = time.perf_counter()
+                respuesta = getattr(cliente, metodo)(url, **opciones)
+                respuesta.get_data()  # consume las respuestas en streaming
+                duracion = time.perf_counter() - inicio
+
+                if numero < PETICIONES_CALENTAMIENTO:
+                    continue
+                tiempos.append(duracion * 1000)
+                conteos.append(consultas[0])
+                if respuesta.status_code >= 400:
+                    errores += 1
+
+            total = time.perf_counter() - inicio_endpoint
+            tiempos.sort()
+            resultados[nombre] = {
+                'peticiones': peticiones,
+                'errores': errores,
+                'p50_ms': round(_percentil(tiempos, 50), 2),
+                'p95_ms': round(_percentil(tiempos, 95), 2),
+                'p99_ms': round(_percentil(tiempos, 99), 2),
+                'promedio_ms': round(statistics.mean(tiempos), 2),
+                'max_ms': round(tiempos[-1], 2),
+                'consultas_promedio': round(statistics.mean(conteos), 2),
+                'consultas_max': max(conteos),
+                'peticiones_por_segundo': round(peticiones / total, 1)
+            }
+            print(f"   {nombre:<26} p50 {resultados[nombre]['p50_ms']:7.1f} ms"
+                  f"   p95 {resultados[nombre]['p95_ms']:7.1f} ms"
+                  f"   p99 {resultados[nombre]['p99_ms']:7.1f} ms"
+                  f"   {resultados[nombre]['consultas_promedio']:5.1f} consultas"
+                  f"   {resultados[nombre]['peticiones_por_segundo']:6.1f} req/s"
+                  + (f"   ⚠️ {errores} errores" if errores else ""))
+    finally:
+        event.remove(engine, 'before_cursor_execute', contar)
+
+    return resultados
+
+def _commit_actual():
+    """Commit de git del árbol medido (si está disponible)"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def benchmark(ninos=100, dias=90, peticiones=200, archivo=None):
+    """Genera la población, mide los endpoints y guarda el resultado en JSON"""
+    import logging
+    from app import create_app
+    from app.extensions import engine
+
+    # Las advertencias de métricas (N+1, lentas) no aportan durante la medición
+    logging.getLogger('app.metricas').setLevel(logging.ERROR)
+    semilla = int(os.environ.get('BENCHMARK_SEMILLA', '42'))
+    app = create_app()
+
+    try:
+        print(f"🗄️  Base de datos: {engine.url.render_as_string(hide_password=True)}")
+        if os.environ.get('BENCHMARK_REUSAR') == '1':
+            poblacion = describir_poblacion(app)
+            print(f"♻️  Reutilizando población: {poblacion['ninos']} niños, "
+                  f"{poblacion['sesion_actividades']} actividades realizadas")
+        else:
+            print(f"👶 Generando {ninos} niños × {dias} días (semilla {semilla})...")
+            poblacion = generar_poblacion(app, ninos, dias, semilla)
+            print(f"   {poblacion['sesiones']} sesiones, {poblacion['sesion_actividades']} actividades "
+                  f"realizadas en {poblacion['segundos_generacion']} s")
+
+        print(f"📊 {peticiones} peticiones por endpoint:")
+        endpoints = medir_endpoints(app, peticiones, semilla)
+    except Exception as e:
+        print(f"❌ Error durante el benchmark: {e}")
+        return False
+
+    commit = _commit_actual()
+    resultado = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'motor': engine.dialect.name,
+        'python': sys.version.split()[0],
+        'semilla': semilla,
+        'peticiones_por_endpoint': peticiones,
+        'poblacion': poblacion,
+        'endpoints': endpoints
+    }
+
+    archivo = archivo or f"benchmark_{commit or 'local'}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(archivo, 'w', encoding='utf-8') as salida:
+        json.dump(resultado, salida, indent=2, ensure_ascii=False)
+    print(f"💾 Resultado guardado en {archivo}")
+
+    return all(datos['errores'] == 0 for datos in endpoints.values())
+
+def comparar(archivo_base, archivo_nuevo, tolerancia=10.0):
+    """Compara dos resultados; False si algún endpoint empeora más que la tolerancia"""
+    with open(archivo_base, encoding='utf-8') as entrada:
+        base = json.load(entrada)
+    with open(archivo_nuevo, encoding='utf-8') as entrada:
+        nuevo = json.load(entrada)
+
+    print(f"📊 {base.get('commit')} ({base['fecha']}) → {nuevo.get('commit')} ({nuevo['fecha']})")
+    if base['poblacion'].get('ninos') != nuevo['poblacion'].get('ninos') or base['motor'] != nuevo['motor']:
+        print("   ⚠️ Las mediciones usan poblaciones o motores distintos")
+
+    regresiones = []
+    for nombre, datos in nuevo['endpoints'].items():
+        anterior = base['endpoints'].get(nombre)
+        if anterior is None:
+            print(f"   {nombre:<26} (nuevo)")
+            continue
+
+        cambios = []
+        for metrica in ('p50_ms', 'p95_ms', 'consultas_promedio'):
+            variacion = (datos[metrica] - anterior[metrica]) / anterior[metrica] * 100 if anterior[metrica] else 0.0
+            cambios.append(f"{metrica} {anterior[metrica]:.1f}→{datos[metrica]:.1f} ({variacion:+.0f}%)")
+            if metrica != 'p50_ms' and variacion > tolerancia:
+                regresiones.append(f"{nombre} {metrica} {variacion:+.0f}%")
+        print(f"   {nombre:<26} " + "   ".join(cambios))
+
+    for regresion in regresiones:
+        print(f"   ❌ Regresión: {regresion}")
+    return not regresiones
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'comparar':
+        if len(sys.argv) < 4:
+            print("Uso: python benchmark_endpoints.py comparar base.json nuevo.json [tolerancia_%]")
+            sys.exit(1)
+        tolerancia = float(sys.argv[4]) if len(sys.argv) > 4 else 10.0
+        success = comparar(sys.argv[2], sys.argv[3], tolerancia)
+    else:
+        ninos = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+        dias = int(sys.argv[2]) if len(sys.argv) > 2 else 90
+        peticiones = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+        archivo = sys.argv[4] if len(sys.argv) > 4 else None
+
+        print("🚀 Ejecutando benchmark de endpoints...")
+        success = benchmark(ninos, dias, peticiones, archivo)
+
+    if success:
+        print("\n🎉 ¡Benchmark completado!")
+    else:
+        print("\n❌ Benchmark con errores o regresiones")
+        sys.exit(1)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para medir el arranque de la aplicación como lo haría un worker nuevo
+Uso: python benchmark_startup.py [repeticiones] [ruta]
+     Cada repetición corre en un proceso limpio y mide la importación de
+     `app`, create_app() y la primera petición a `ruta` (por defecto /tea/).
+     Con DB_AUTO_CREATE=1 se puede comparar contra el arranque con create_all.
+"""
+
+import sys
+import os
+import json
+import statistics
+import subprocess
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+MEDICION = """
+import json, sys, time
+inicio = time.perf_counter()
+from app import create_app
+importado = time.perf_counter()
+app = create_app()
+creado = time.perf_counter()
+respuesta = app.test_client().get(sys.argv[1])
+fin = time.perf_counter()
+print(json.dumps({
+    'importacion': importado - inicio,
+    'create_app': creado - importado,
+    'primera_peticion': fin - creado,
+    'total': fin - inicio,
+    'status': respuesta.status_code
+}))
+"""
+
+def medir_arranque(ruta):
+    """Arranca un proceso nuevo y devuelve sus tiempos en segundos"""
+    resultado = subprocess.run(
+        [sys.executable, '-c', MEDICION, ruta],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+def benchmark(repeticiones=10, ruta='/tea/'):
+    """Repite la medición y muestra mediana, mínimo y máximo por fase"""
+    try:
+        mediciones = [medir_arranque(ruta) for _ in range(repeticiones)]
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Error al arrancar la aplicación:\n{e.stderr}")
+        return False
+
+    estados = {m['status'] for m in mediciones}
+    print(f"📊 {repeticiones} arranques, GET {ruta} -> {sorted(estados)}")
+    print(f"   DB_AUTO_CREATE={os.environ.get('DB_AUTO_CREATE', '0')}")
+    for fase in ('importacion', 'create_app', 'primera_peticion', 'total'):
+        tiempos = [m[fase] * 1000 for m in mediciones]
+        print(f"   {fase:<17} mediana {statistics.median(tiempos):8.1f} ms"
+              f"   min {min(tiempos):8.1f} ms   max {max(tiempos):8.1f} ms")
+
+    return all(estado < 500 for estado in estados)
+
+if __name__ == "__main__":
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    ruta = sys.argv[2] if len(sys.argv) > 2 else '/tea/'
+
+    print("🚀 Midiendo tiempo de arranque...")
+    success = benchmark(repeticiones, ruta)
+
+    if success:
+        print("\n🎉 ¡Medición completada!")
+    else:
+        print("\n❌ Error en la medición")
+        sys.exit(1)
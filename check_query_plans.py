@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para verificar que las consultas principales de los servicios TEA
+usan los índices compuestos (y no recorren la tabla completa). Se llama a
+los métodos de los servicios y se analiza el SQL que realmente emiten.
+Uso: python check_query_plans.py
+     En PostgreSQL se desactivan los seq scans para que el planificador
+     elija el índice aunque la tabla tenga pocas filas.
+"""
+
+import sys
+import os
+import json
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from contextlib import contextmanager
+from datetime import timedelta
+from app import create_app
+from app.extensions import db
+from app.services.activity_completion import ActivityCompletionSystem
+from app.services.adaptive_learning import AdaptiveLearningSystem
+from app.services.daily_rollup import DailyRollupSystem
+from app.services.reward_unlocking import RewardUnlockingSystem
+from app.services.user_progress import UserProgressSystem
+from app.utils.day_window import hoy_local
+from sqlalchemy import event, text
+
+def consultas_principales():
+    """
+    (descripción, tabla, índice esperado, llamada) de los accesos más
+    frecuentes. Cada llamada ejecuta el código real del servicio; el SQL
+    que emite se captura en el cursor y es el que se analiza con EXPLAIN.
+    """
+    hoy = hoy_local()
+
+    return [
+        ('Sesión del día de un niño', 'sesiones_tea', 'ix_sesiones_tea_nino_fecha',
+         lambda: ActivityCompletionSystem.obtener_sesion_hoy(1)),
+        ('Actividad dentro de una sesión', 'sesion_actividades', 'uq_sesion_actividades_sesion_actividad',
+         lambda: ActivityCompletionSystem.consulta_sesion_actividad(1, 1).first()),
+        ('Última vez de una actividad', 'sesion_actividades', 'ix_sesion_actividades_actividad_fecha',
+         lambda: AdaptiveLearningSystem(1)._obtener_ultima_vez_actividad(1)),
+        ('Progreso por habilidad', 'progreso_tea', 'ix_progreso_tea_nino_habilidad',
+         lambda: AdaptiveLearningSystem(1).analizar_progreso_habilidad('emociones')),
+        ('Progreso por categoría', 'progreso_usuario', 'uq_progreso_usuario_nino_categoria',
+         lambda: UserProgressSystem.consulta_progresos(1).all()),
+        ('Medallas de un niño', 'medalla_usuario', 'uq_medalla_usuario_nino_tipo_categoria',
+         lambda: UserProgressSystem.obtener_medallas_existentes(1)),
+        ('Recompensas aún no obtenidas', 'logros_nino', 'uq_logros_nino_nino_recompensa',
+         lambda: RewardUnlockingSystem.obtener_recompensas_nuevas(1, 1000)),
+        ('Resumen diario en un rango', 'resumen_diario', 'uq_resumen_diario_nino_fecha_categoria',
+         lambda: DailyRollupSystem.totales_por_dia(1, hoy - timedelta(days=7), hoy)),
+    ]
+
+@contextmanager
+def capturar_sentencias():
+    """Captura (SQL, parámetros) de cada sentencia que llega al cursor"""
+    sentencias = []
+
+    def registrar(conexion, cursor, sentencia, parametros, contexto, executemany):
+        sentencias.append((sentencia, parametros))
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        yield sentencias
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+
+def sentencias_de(llamada, tabla):
+    """Sentencias que la llamada al servicio emite sobre la tabla"""
+    with capturar_sentencias() as sentencias:
+        llamada()
+    return [
+        (sentencia, parametros) for sentencia, parametros in sentencias
+        if tabla in sentencia and not sentencia.lstrip().upper().startswith('EXPLAIN')
+    ]
+
+def explicar(prefijo, sentencia, parametros):
+    """Ejecuta EXPLAIN sobre el SQL capturado con sus mismos parámetros"""
+    return db.session.connection().exec_driver_sql(f'{prefijo} {sentencia}', parametros)
+
+def nodos_postgres(plan):
+    """Recorre los nodos de un plan JSON de PostgreSQL"""
+    yield plan
+    for hijo in plan.get('Plans', []):
+        yield from nodos_postgres(hijo)
+
+def usa_indice_postgres(sentencia, parametros, tabla, indice):
+    plan = explicar('EXPLAIN (FORMAT JSON)', sentencia, parametros).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodos = list(nodos_postgres(plan[0]['Plan']))
+
+    recorridos = [n for n in nodos if n.get('Relation Name') == tabla and n['Node Type'] == 'Seq Scan']
+    indices = [n.get('Index Name') for n in nodos if n.get('Relation Name') == tabla]
+    return not recorridos and indice in indices, indices
+
+def columnas_indice(tabla, indice):
+    """Columnas del índice o restricción única declarado en los modelos"""
+    for elemento in list(db.metadata.tables[tabla].indexes) + list(db.metadata.tables[tabla].constraints):
+        if elemento.name == indice:
+            return [columna.name for columna in elemento.columns]
+    return []
+
+def usa_indice_sqlite(sentencia, parametros, tabla, indice):
+    filas = explicar('EXPLAIN QUERY PLAN', sentencia, parametros).fetchall()
+    detalles = [fila[-1] for fila in filas]
+
+    # SQLite nombra las restricciones únicas como sqlite_autoindex_<tabla>_N;
+    # se aceptan si cubren las mismas columnas que la restricción esperada
+    aceptados = {indice}
+    for fila in db.session.execute(text(f'PRAGMA index_list({tabla})')).fetchall():
+        nombre = fila[1]
+        columnas = [info[2] for info in db.session.execute(text(f'PRAGMA index_info({nombre})')).fetchall()]
+        if columnas == columnas_indice(tabla, indice):
+            aceptados.add(nombre)
+
+    # Ej.: "SEARCH sesiones_tea USING INDEX ix_sesiones_tea_nino_fecha (nino_id=? AND fecha>? AND fecha<?)"
+    return any(
+        f'INDEX {nombre} ' in f'{detalle} ' and tabla in detalle
+        for nombre in aceptados for detalle in detalles
+    ), detalles
+
+def verificar_planes():
+    """Ejecuta EXPLAIN sobre cada consulta y comprueba el índice usado"""
+    app = create_app()
+
+    with app.app_context():
+        dialecto = db.engine.dialect.name
+        if dialecto == 'postgresql':
+            db.session.execute(text('SET LOCAL enable_seqscan = off'))
+            verificar = usa_indice_postgres
+        elif dialecto == 'sqlite':
+            verificar = usa_indice_sqlite
+        else:
+            print(f"❌ Dialecto {dialecto} no soportado")
+            return False
+
+        fallos = 0
+        try:
+            for descripcion, tabla, indice, llamada in consultas_principales():
+                sentencias = sentencias_de(llamada, tabla)
+                if not sentencias:
+                    fallos += 1
+                    print(f"❌ {descripcion}: el servicio no consultó {tabla}")
+                    continue
+
+                resultados = [verificar(sentencia, parametros, tabla, indice) for sentencia, parametros in sentencias]
+                correcto = all(usa for usa, _ in resultados)
+                plan = [detalle for _, detalle in resultados]
+                if correcto:
+                    print(f"✅ {descripcion}: {indice}")
+                else:
+                    fallos += 1
+                    print(f"❌ {descripcion}: se esperaba {indice}, plan: {plan}")
+        finally:
+            db.session.rollback()
+
+        print(f"\n📊 Consultas verificadas: {len(consultas_principales())}, fallos: {fallos}")
+        return fallos == 0
+
+if __name__ == "__main__":
+    print("🔍 Verificando planes de consulta...")
+    success = verificar_planes()
+
+    if success:
+        print("\n🎉 ¡Todas las consultas usan sus índices!")
+    else:
+        print("\n❌ Hay consultas que no usan el índice esperado")
+        sys.exit(1)
@@ -1,22 +1,4 @@
-# -*- coding: utf-8 -*-
-from flask import g
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
-import config
-
-engine = create_engine(config.SQLALCHEMY_DATABASE_URI, echo=config.SQLALCHEMY_ECHO, future=True, pool_pre_ping=True)
-SessionLocal = scoped_session(sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True))
-Base = declarative_base()
-
-def get_db():
-    if "db" not in g:
-        g.db = SessionLocal()
-    return g.db
-
-def close_db(e=None):
-    db = g.pop("db", None)
-    if db is not None:
-        db.close()
-
-def init_db(app):
-    app.teardown_appcontext(close_db)
+# -*- coding: utf-8 -*-
+# Compatibilidad: el engine y las sesiones viven en app.extensions para no
+# abrir un segundo pool de conexiones contra la misma base de datos
+from app.extensions import engine, SessionLocal, Base, get_db, close_db, init_db  # noqa
@@ -15,6 +15,7 @@ from app.models.tea_models import (
     PerfilNino, ActividadTEA, SesionTEA, SesionActividad, 
     ProgresoUsuario, MedallaUsuario
 )
+from app.services.permanent_progression import PermanentProgressionSystem
 from app.services.user_progress import UserProgressSystem
 from datetime import datetime, timedelta
 import random
@@ -72,13 +73,18 @@ def create_progress_data():
                 
                 for j, actividad in enumerate(actividades_sesion):
                     puntos_actividad = random.randint(5, 15)
+                    intentos = random.randint(1, 3)
+                    exitosa = PermanentProgressionSystem.es_exitosa(
+                        puntos_actividad, actividad.puntos_recompensa
+                    )
                     
                     sesion_actividad = SesionActividad(
                         sesion_id=sesion.id,
                         actividad_id=actividad.id,
                         orden=j + 1,
                         completada=True,
-                        intentos=random.randint(1, 3),
+                        intentos=intentos,
+                        exitos=intentos if exitosa else 0,
                         tiempo_dedicado=random.randint(30, 120),
                         puntos_obtenidos=puntos_actividad,
                         feedback="¡Muy bien!",
@@ -140,6 +146,7 @@ def clear_progress_data():
             if nino:
                 nino.puntos_totales_acumulados = 0
                 nino.actividades_completadas_total = 0
+                nino.actividades_exitosas_total = 0
                 nino.dias_consecutivos = 0
                 nino.fecha_ultima_actividad = None
             
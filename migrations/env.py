@@ -4,14 +4,14 @@ from sqlalchemy import engine_from_config, pool
 import config as app_config
 
 # Importa Base y modelos para que Alembic “vea” las tablas
-from app.extensions import Base
-from app.models import goals, habits, plan_day  # noqa
+from app.extensions import Base, db
+from app.models import goals, habits, plan_day, tea_models  # noqa
 
 config = context.config
 if config.config_file_name:
     fileConfig(config.config_file_name)
 
-target_metadata = Base.metadata
+target_metadata = [Base.metadata, db.metadata]
 DB_URL = app_config.SQLALCHEMY_DATABASE_URI
 
 def run_migrations_offline():
@@ -0,0 +1,34 @@
+"""version cache
+
+Contadores de versión para las cachés en memoria compartidas entre procesos
+(el catálogo de actividades usa la fila 'actividades').
+
+Revision ID: 3f8a1c6d2e95
+Revises: 72d0e9cd9fdf
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8a1c6d2e95'
+down_revision: Union[str, None] = '72d0e9cd9fdf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('version_cache',
+    sa.Column('nombre', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('actualizado_en', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('nombre')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('version_cache')
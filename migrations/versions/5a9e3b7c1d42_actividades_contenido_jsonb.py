@@ -0,0 +1,75 @@
+"""actividades contenido jsonb
+
+Valida el contenido de todas las actividades contra el esquema de su tipo
+(app/models/activity_content.py) y, en PostgreSQL, convierte la columna a
+JSONB con un índice GIN (jsonb_path_ops) para consultas dentro del JSON.
+En otros motores la columna sigue siendo texto con JSON.
+
+Si alguna actividad no cumple su esquema la migración se detiene listando
+los ids para corregirlas antes de volver a ejecutarla.
+
+Revision ID: 5a9e3b7c1d42
+Revises: 3f8a1c6d2e95
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.models.activity_content import decodificar_contenido
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a9e3b7c1d42'
+down_revision: Union[str, None] = '3f8a1c6d2e95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _verificar_contenido(bind):
+    errores = []
+    for actividad_id, tipo, contenido in bind.execute(
+        sa.text("SELECT id, tipo, contenido FROM actividades_tea ORDER BY id")
+    ):
+        try:
+            decodificar_contenido(tipo, contenido)
+        except ValueError as e:
+            errores.append(f"  {actividad_id}: {e}")
+
+    if errores:
+        raise RuntimeError("Actividades con contenido inválido:\n" + "\n".join(errores))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    _verificar_contenido(bind)
+
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.alter_column(
+        'actividades_tea', 'contenido',
+        type_=postgresql.JSONB(),
+        existing_nullable=False,
+        postgresql_using='contenido::jsonb'
+    )
+    op.create_index(
+        'ix_actividades_tea_contenido', 'actividades_tea', ['contenido'],
+        postgresql_using='gin', postgresql_ops={'contenido': 'jsonb_path_ops'}
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_actividades_tea_contenido', table_name='actividades_tea')
+    op.alter_column(
+        'actividades_tea', 'contenido',
+        type_=sa.Text(),
+        existing_nullable=False,
+        postgresql_using='contenido::text'
+    )
@@ -0,0 +1,41 @@
+"""plan sesion precalculado
+
+Planes de sesión y recomendaciones calculados por el proceso nocturno
+(precalcular_planes.py), uno por niño y día.
+
+Revision ID: 8d4f2a6b1c73
+Revises: 5a9e3b7c1d42
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4f2a6b1c73'
+down_revision: Union[str, None] = '5a9e3b7c1d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('plan_sesion_precalculado',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nino_id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('duracion', sa.Integer(), nullable=False),
+    sa.Column('plan', sa.JSON(), nullable=False),
+    sa.Column('recomendaciones', sa.JSON(), nullable=False),
+    sa.Column('version_catalogo', sa.Integer(), nullable=False),
+    sa.Column('generado_en', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['nino_id'], ['perfil_nino.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('nino_id', 'fecha', name='uq_plan_sesion_precalculado_nino_fecha')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('plan_sesion_precalculado')
@@ -0,0 +1,110 @@
+"""tea hot path indexes
+
+Índices compuestos y restricciones únicas para los accesos más frecuentes
+de las tablas TEA. En PostgreSQL los índices se crean CONCURRENTLY para no
+bloquear escrituras en tablas grandes y las restricciones únicas se montan
+sobre su índice (ADD CONSTRAINT ... USING INDEX).
+
+Si una restricción única encuentra duplicados la migración se detiene
+indicando la tabla, para limpiarlos antes de volver a ejecutarla.
+
+Revision ID: b7d2e41c9a63
+Revises: 4c5581bb3c72
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e41c9a63'
+down_revision: Union[str, None] = '4c5581bb3c72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDICES = [
+    ('ix_sesiones_tea_nino_fecha', 'sesiones_tea', ['nino_id', 'fecha']),
+    ('ix_sesion_actividades_actividad_fecha', 'sesion_actividades', ['actividad_id', 'fecha_completada']),
+    ('ix_actividades_tea_categoria_activa_nivel', 'actividades_tea', ['categoria', 'activa', 'nivel_dificultad']),
+    ('ix_progreso_tea_nino_habilidad', 'progreso_tea', ['nino_id', 'habilidad']),
+]
+
+UNICOS = [
+    ('uq_sesion_actividades_sesion_actividad', 'sesion_actividades', ['sesion_id', 'actividad_id']),
+    ('uq_progreso_usuario_nino_categoria', 'progreso_usuario', ['nino_id', 'categoria']),
+    ('uq_medalla_usuario_nino_tipo_categoria', 'medalla_usuario', ['nino_id', 'tipo_medalla', 'categoria']),
+    ('uq_logros_nino_nino_recompensa', 'logros_nino', ['nino_id', 'recompensa_id']),
+]
+
+
+def _existentes(bind, tabla):
+    """Nombres de índices y restricciones únicas ya presentes en la tabla"""
+    inspector = sa.inspect(bind)
+    if not inspector.has_table(tabla):
+        return None
+    nombres = {indice['name'] for indice in inspector.get_indexes(tabla)}
+    nombres |= {unica['name'] for unica in inspector.get_unique_constraints(tabla)}
+    return nombres
+
+
+def _verificar_duplicados(bind, nombre, tabla, columnas):
+    lista = ', '.join(columnas)
+    duplicados = bind.execute(sa.text(
+        f"SELECT COUNT(*) FROM (SELECT {lista} FROM {tabla} "
+        f"GROUP BY {lista} HAVING COUNT(*) > 1) AS duplicados"
+    )).scalar()
+    if duplicados:
+        raise RuntimeError(
+            f"{tabla}: {duplicados} combinaciones duplicadas de ({lista}); "
+            f"elimínalas antes de crear {nombre}"
+        )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    es_postgres = bind.dialect.name == 'postgresql'
+
+    pendientes = []
+    for nombre, tabla, columnas in INDICES + UNICOS:
+        existentes = _existentes(bind, tabla)
+        if existentes is not None and nombre not in existentes:
+            pendientes.append((nombre, tabla, columnas))
+
+    for nombre, tabla, columnas in pendientes:
+        if nombre.startswith('uq_'):
+            _verificar_duplicados(bind, nombre, tabla, columnas)
+
+    if es_postgres:
+        # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+        with op.get_context().autocommit_block():
+            for nombre, tabla, columnas in pendientes:
+                op.create_index(
+                    nombre, tabla, columnas,
+                    unique=nombre.startswith('uq_'),
+                    postgresql_concurrently=True
+                )
+        for nombre, tabla, columnas in pendientes:
+            if nombre.startswith('uq_'):
+                op.execute(f'ALTER TABLE {tabla} ADD CONSTRAINT {nombre} UNIQUE USING INDEX {nombre}')
+    else:
+        for nombre, tabla, columnas in pendientes:
+            op.create_index(nombre, tabla, columnas, unique=nombre.startswith('uq_'))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+
+    for nombre, tabla, columnas in reversed(INDICES + UNICOS):
+        inspector = sa.inspect(bind)
+        if not inspector.has_table(tabla):
+            continue
+        unicas = {unica['name'] for unica in inspector.get_unique_constraints(tabla)}
+        indices = {indice['name'] for indice in inspector.get_indexes(tabla)}
+        if bind.dialect.name == 'postgresql' and nombre in unicas:
+            op.drop_constraint(nombre, tabla, type_='unique')
+        elif nombre in indices:
+            op.drop_index(nombre, table_name=tabla)
@@ -0,0 +1,49 @@
+"""perfil nino columnas
+
+Columnas de perfil_nino añadidas después del esquema original: contador de
+actividades exitosas, mapa de días activos y relación con el padre. El
+baseline omite perfil_nino si la tabla ya existía (bases creadas por
+create_all), así que aquí se agregan las que falten.
+
+Revision ID: c3b8e1f4a7d0
+Revises: 8d4f2a6b1c73
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3b8e1f4a7d0'
+down_revision: Union[str, None] = '8d4f2a6b1c73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    columnas = {columna['name'] for columna in inspector.get_columns('perfil_nino')}
+    indices = {indice['name'] for indice in inspector.get_indexes('perfil_nino')}
+
+    # batch: en SQLite la clave foránea requiere recrear la tabla
+    with op.batch_alter_table('perfil_nino') as batch_op:
+        if 'actividades_exitosas_total' not in columnas:
+            batch_op.add_column(sa.Column('actividades_exitosas_total', sa.Integer(), nullable=True))
+        if 'dias_actividad_inicio' not in columnas:
+            batch_op.add_column(sa.Column('dias_actividad_inicio', sa.Date(), nullable=True))
+        if 'dias_actividad' not in columnas:
+            batch_op.add_column(sa.Column('dias_actividad', sa.LargeBinary(), nullable=True))
+        if 'padre_id' not in columnas:
+            batch_op.add_column(sa.Column('padre_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key('fk_perfil_nino_padre_id', 'usuario_padre', ['padre_id'], ['id'])
+        if 'ix_perfil_nino_padre_id' not in indices:
+            batch_op.create_index(batch_op.f('ix_perfil_nino_padre_id'), ['padre_id'], unique=False)
+
+def downgrade() -> None:
+    # Las columnas pueden venir del baseline (perfil_nino creada por Alembic)
+    # y guardan datos de los niños (asignación de padres, rachas): no se
+    # eliminan al bajar de versión.
+    pass
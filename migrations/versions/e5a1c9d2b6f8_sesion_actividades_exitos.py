@@ -0,0 +1,64 @@
+"""sesion actividades exitos
+
+Guarda en sesion_actividades cuántos intentos fueron exitosos, para que los
+agregados del historial usen el mismo resultado que los contadores en vivo
+(indicador `exito` del cliente o umbral de puntos). Los renglones existentes
+se rellenan con el umbral de puntos, que era la regla usada hasta ahora.
+
+Revision ID: e5a1c9d2b6f8
+Revises: c3b8e1f4a7d0
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a1c9d2b6f8'
+down_revision: Union[str, None] = 'c3b8e1f4a7d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Porcentaje de puntos que cuenta como éxito (PermanentProgressionSystem.UMBRAL_EXITO)
+UMBRAL_EXITO = 0.7
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    columnas = {columna['name'] for columna in inspector.get_columns('sesion_actividades')}
+    if 'exitos' not in columnas:
+        op.add_column('sesion_actividades', sa.Column('exitos', sa.Integer(), nullable=True))
+
+    sesion_actividades = sa.table(
+        'sesion_actividades',
+        sa.column('actividad_id', sa.Integer),
+        sa.column('completada', sa.Boolean),
+        sa.column('intentos', sa.Integer),
+        sa.column('puntos_obtenidos', sa.Integer),
+        sa.column('exitos', sa.Integer),
+    )
+    actividades = sa.table(
+        'actividades_tea',
+        sa.column('id', sa.Integer),
+        sa.column('puntos_recompensa', sa.Integer),
+    )
+    puntos_recompensa = sa.select(actividades.c.puntos_recompensa).where(
+        actividades.c.id == sesion_actividades.c.actividad_id
+    ).scalar_subquery()
+    exitosa = sa.and_(
+        sesion_actividades.c.completada == sa.true(),
+        sesion_actividades.c.puntos_obtenidos >= puntos_recompensa * UMBRAL_EXITO,
+    )
+    op.execute(
+        sesion_actividades.update()
+        .where(sesion_actividades.c.exitos.is_(None))
+        .values(exitos=sa.case((exitosa, sesion_actividades.c.intentos), else_=0))
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('sesion_actividades') as batch_op:
+        batch_op.drop_column('exitos')
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para precalcular los planes de sesión y las recomendaciones de todos
+los niños activos (pensado para cron, p. ej. cada noche a las 23:00)
+Uso: python precalcular_planes.py [fecha|hoy|manana] [procesos]
+La tabla plan_sesion_precalculado la crea la migración 8d4f2a6b1c73
+(`alembic upgrade head`).
+"""
+
+import sys
+import os
+import time
+from datetime import date, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.extensions import db
+from app.models.tea_models import PlanSesionPrecalculado
+from app.services.plan_precompute import PlanPrecomputeSystem
+from app.utils.day_window import hoy_local
+from sqlalchemy import inspect
+
+def leer_fecha(valor):
+    """Día para el que se calculan los planes (por defecto, mañana)"""
+    if valor in (None, 'manana'):
+        return hoy_local() + timedelta(days=1)
+    if valor == 'hoy':
+        return hoy_local()
+    return date.fromisoformat(valor)
+
+def precalcular_planes(fecha, procesos=None):
+    """Calcula y guarda los planes del día indicado"""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            if not inspect(db.engine).has_table(PlanSesionPrecalculado.__tablename__):
+                print("❌ Falta la tabla plan_sesion_precalculado: ejecuta `alembic upgrade head`")
+                return False
+
+            inicio = time.perf_counter()
+            guardados = PlanPrecomputeSystem.precalcular(fecha, procesos)
+
+            print("✅ Planes precalculados correctamente")
+            print(f"📊 Planes guardados: {guardados} en {time.perf_counter() - inicio:.1f} s")
+
+        except Exception as e:
+            print(f"❌ Error al precalcular los planes: {e}")
+            db.session.rollback()
+            return False
+
+    return True
+
+if __name__ == "__main__":
+    fecha = leer_fecha(sys.argv[1] if len(sys.argv) > 1 else None)
+    procesos = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    print(f"🚀 Precalculando planes de sesión para el {fecha.isoformat()}...")
+
+    success = precalcular_planes(fecha, procesos)
+
+    if success:
+        print("\n🎉 ¡Precálculo completado!")
+    else:
+        print("\n❌ Error en el precálculo")
+        sys.exit(1)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para reconstruir la tabla resumen_diario desde el historial de sesiones
+Uso: python rebuild_daily_summary.py [nino_id]
+     python rebuild_daily_summary.py verificar [nino_id]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.extensions import db
+from app.models.tea_models import ResumenDiario
+from app.services.daily_rollup import DailyRollupSystem
+
+def rebuild_daily_summary(nino_id=None):
+    """Recalcula el resumen diario de un niño o de todos"""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            ResumenDiario.__table__.create(bind=db.engine, checkfirst=True)
+
+            print("Reconstruyendo resumen diario...")
+            filas = DailyRollupSystem.reconstruir(nino_id)
+            db.session.commit()
+
+            print("✅ Resumen diario reconstruido correctamente")
+            print(f"📊 Filas generadas: {filas}")
+
+        except Exception as e:
+            print(f"❌ Error al reconstruir el resumen diario: {e}")
+            db.session.rollback()
+            return False
+
+    return True
+
+def verify_daily_summary(nino_id=None):
+    """Compara el resumen diario con el historial sin modificarlo"""
+    app = create_app()
+
+    with app.app_context():
+        diferencias = DailyRollupSystem.verificar(nino_id)
+
+    if not diferencias:
+        print("✅ El resumen diario coincide con el historial")
+        return True
+
+    print(f"⚠️ {len(diferencias)} diferencias entre el resumen diario y el historial:")
+    for nino, fecha, categoria, metrica, actual, esperado in diferencias:
+        print(f"   niño {nino} {fecha} {categoria} {metrica}: resumen={actual} historial={esperado}")
+    return False
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    verificar = bool(argumentos) and argumentos[0] == 'verificar'
+    if verificar:
+        argumentos = argumentos[1:]
+    nino_id = int(argumentos[0]) if argumentos else None
+
+    if verificar:
+        print("🔍 Verificando el resumen diario contra el historial...")
+        if not verify_daily_summary(nino_id):
+            print("\nEjecuta el script sin 'verificar' para reconstruirlo")
+            sys.exit(1)
+        sys.exit(0)
+
+    if nino_id:
+        print(f"🚀 Reconstruyendo resumen diario del niño {nino_id}...")
+    else:
+        print("🚀 Reconstruyendo resumen diario de todos los niños...")
+
+    success = rebuild_daily_summary(nino_id)
+
+    if success:
+        print("\n🎉 ¡Reconstrucción completada!")
+    else:
+        print("\n❌ Error en la reconstrucción")
+        sys.exit(1)
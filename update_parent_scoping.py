@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para asignar niños a un padre/terapeuta (perfil_nino.padre_id).
+La columna la crea la migración c3b8e1f4a7d0 (`alembic upgrade head`).
+Uso: python update_parent_scoping.py [padre_id]
+     Con padre_id, asigna a ese padre los perfiles que aún no tienen uno.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.extensions import db
+from app.models.tea_models import PerfilNino, UsuarioPadre
+from sqlalchemy import inspect
+
+def update_database(padre_id=None):
+    """Asigna opcionalmente los perfiles huérfanos y muestra cuántos quedan sin padre"""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            columnas = [c['name'] for c in inspect(db.engine).get_columns('perfil_nino')]
+
+            if 'padre_id' not in columnas:
+                print("❌ Falta la columna perfil_nino.padre_id: ejecuta `alembic upgrade head`")
+                return False
+
+            if padre_id:
+                if not UsuarioPadre.query.get(padre_id):
+                    raise ValueError(f"No existe el padre {padre_id}")
+
+                asignados = PerfilNino.query.filter(
+                    PerfilNino.padre_id.is_(None)
+                ).update({'padre_id': padre_id}, synchronize_session=False)
+                print(f"👨‍👧 Perfiles asignados al padre {padre_id}: {asignados}")
+
+            db.session.commit()
+            print("✅ Base de datos actualizada correctamente")
+
+            sin_padre = PerfilNino.query.filter(PerfilNino.padre_id.is_(None)).count()
+            print(f"📊 Perfiles sin padre asignado: {sin_padre}")
+
+        except Exception as e:
+            print(f"❌ Error al actualizar la base de datos: {e}")
+            db.session.rollback()
+            return False
+
+    return True
+
+if __name__ == "__main__":
+    padre_id = int(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    print("🚀 Actualizando relación padre -> niños...")
+    success = update_database(padre_id)
+
+    if success:
+        print("\n🎉 ¡Actualización completada!")
+    else:
+        print("\n❌ Error en la actualización")
+        sys.exit(1)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para rellenar el mapa de días activos del perfil y la racha
+(días consecutivos) de cada niño desde su historial de sesiones.
+Las columnas las crea la migración c3b8e1f4a7d0 (`alembic upgrade head`).
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import date
+from app import create_app
+from app.extensions import db
+from app.models.tea_models import PerfilNino, SesionTEA
+from app.services.streak_tracking import StreakTrackingSystem
+from app.utils.day_window import dia_local_sql
+from sqlalchemy import inspect, or_
+
+def update_database():
+    """Reconstruye el mapa de actividad y las rachas"""
+    app = create_app()
+    
+    with app.app_context():
+        try:
+            columnas = [c['name'] for c in inspect(db.engine).get_columns('perfil_nino')]
+            dialecto = db.engine.dialect
+            
+            faltantes = {'dias_actividad_inicio', 'dias_actividad'} - set(columnas)
+            if faltantes:
+                print(f"❌ Faltan columnas en perfil_nino ({', '.join(sorted(faltantes))}): ejecuta `alembic upgrade head`")
+                return False
+            
+            # Días activos de todos los niños en una sola consulta
+            filas = db.session.query(
+                SesionTEA.nino_id,
+                dia_local_sql(SesionTEA.fecha, dialecto.name)
+            ).filter(
+                or_(SesionTEA.estado == 'completada', SesionTEA.actividades_completadas > 0)
+            ).distinct().all()
+            
+            dias_por_nino = {}
+            for nino_id, dia in filas:
+                if isinstance(dia, str):
+                    dia = date.fromisoformat(dia)
+                dias_por_nino.setdefault(nino_id, []).append(dia)
+            
+            print("Reconstruyendo rachas...")
+            actualizados = 0
+            for perfil in PerfilNino.query.all():
+                StreakTrackingSystem.reconstruir(perfil, dias_por_nino.get(perfil.id, []))
+                actualizados += 1
+            
+            db.session.commit()
+            print("✅ Base de datos actualizada correctamente")
+            print(f"📊 Perfiles actualizados: {actualizados}")
+        
+        except Exception as e:
+            print(f"❌ Error al actualizar la base de datos: {e}")
+            db.session.rollback()
+            return False
+    
+    return True
+
+if __name__ == "__main__":
+    print("🚀 Actualizando rachas de días consecutivos...")
+    success = update_database()
+    
+    if success:
+        print("\n🎉 ¡Actualización completada!")
+    else:
+        print("\n❌ Error en la actualización")
+        sys.exit(1)
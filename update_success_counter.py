@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para rellenar el contador de actividades exitosas del perfil
+(usado por la progresión permanente para evaluar el avance de nivel en O(1)).
+La columna la crea la migración c3b8e1f4a7d0 y el resultado de cada intento
+(sesion_actividades.exitos) la migración e5a1c9d2b6f8 (`alembic upgrade head`).
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.extensions import db
+from app.models.tea_models import PerfilNino, SesionTEA, SesionActividad
+from sqlalchemy import func, inspect
+
+def update_database():
+    """Rellena la columna actividades_exitosas_total desde el historial"""
+    app = create_app()
+    
+    with app.app_context():
+        try:
+            columnas = [c['name'] for c in inspect(db.engine).get_columns('perfil_nino')]
+            
+            if 'actividades_exitosas_total' not in columnas:
+                print("❌ Falta la columna perfil_nino.actividades_exitosas_total: ejecuta `alembic upgrade head`")
+                return False
+            
+            columnas = [c['name'] for c in inspect(db.engine).get_columns('sesion_actividades')]
+            
+            if 'exitos' not in columnas:
+                print("❌ Falta la columna sesion_actividades.exitos: ejecuta `alembic upgrade head`")
+                return False
+            
+            # Tasa de éxito histórica de todos los niños en una sola consulta agrupada,
+            # con el resultado guardado de cada intento
+            filas = db.session.query(
+                SesionTEA.nino_id,
+                func.sum(SesionActividad.intentos),
+                func.sum(func.coalesce(SesionActividad.exitos, 0))
+            ).join(
+                SesionTEA, SesionActividad.sesion_id == SesionTEA.id
+            ).filter(
+                SesionActividad.completada == True
+            ).group_by(SesionTEA.nino_id).all()
+            tasas = {nino_id: (exitosas or 0) / total for nino_id, total, exitosas in filas if total}
+            
+            # Se escala sobre el total de completadas para conservar la tasa histórica
+            print("Rellenando contador de actividades exitosas...")
+            actualizados = 0
+            for perfil in PerfilNino.query.all():
+                completadas = perfil.actividades_completadas_total or 0
+                perfil.actividades_exitosas_total = round(tasas.get(perfil.id, 0) * completadas)
+                actualizados += 1
+            
+            db.session.commit()
+            print("✅ Base de datos actualizada correctamente")
+            print(f"📊 Perfiles actualizados: {actualizados}")
+        
+        except Exception as e:
+            print(f"❌ Error al actualizar la base de datos: {e}")
+            db.session.rollback()
+            return False
+    
+    return True
+
+if __name__ == "__main__":
+    print("🚀 Actualizando contador de actividades exitosas...")
+    success = update_database()
+    
+    if success:
+        print("\n🎉 ¡Actualización completada!")
+    else:
+        print("\n❌ Error en la actualización")
+        sys.exit(1)